@@ -0,0 +1,61 @@
+"""
+账户挂单/持仓快照
+
+每个循环周期用一次分页的 get_order_list(instType='SWAP') 和一次 get_positions(instType='SWAP')
+取回全账户的挂单与持仓，按 instId 建索引，所有交易对共用，请求数不再随交易对数量线性增长。
+"""
+import collections
+import threading
+import time
+
+from okx.paginate import paginate
+
+# get_order_list 单页最多 100 条
+PAGE_LIMIT = 100
+
+
+class AccountSnapshot(object):
+
+    def __init__(self, trade_api, account_api, instType='SWAP', max_age=None):
+        self.trade_api = trade_api
+        self.account_api = account_api
+        self.instType = instType
+        self.max_age = max_age
+        self.orders = {}  # instId -> [挂单]
+        self.positions = {}  # (instId, posSide) -> 持仓
+        self.updated = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        orders = collections.defaultdict(list)
+        # 挂单通常只有一两页，不需要后台预取
+        for order in paginate(self.trade_api.get_order_list, limit=PAGE_LIMIT, prefetch=0, instType=self.instType):
+            orders[order['instId']].append(order)
+
+        positions = {}
+        response = self.account_api.get_positions(instType=self.instType)
+        for pos in response.get('data') or []:
+            if pos.get('pos') not in ('', '0', None):
+                positions[(pos['instId'], pos.get('posSide', 'net'))] = pos
+
+        with self._lock:
+            self.orders = dict(orders)
+            self.positions = positions
+            self.updated = time.time()
+
+    @property
+    def fresh(self):
+        if not self.updated:
+            return False
+        return self.max_age is None or time.time() - self.updated <= self.max_age
+
+    def live_orders(self, instId):
+        return list(self.orders.get(instId, ()))
+
+    def forget_orders(self, instId):
+        """该交易对的挂单已在本周期撤销，之后的读取不应再看到它们"""
+        with self._lock:
+            self.orders.pop(instId, None)
+
+    def position(self, instId, posSide):
+        return self.positions.get((instId, posSide))
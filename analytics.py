@@ -0,0 +1,363 @@
+"""
+成交分析
+
+成交（私有 WebSocket orders 频道的成交推送、REST get_fills / get_fills_history、模拟盘成交）按 tradeId 去重后
+追加写入 <path>.fills（定长二进制记录，见 FILL_DTYPE，读入后是可以按列切片的 numpy 结构化数组），
+交易对编号表保存在 <path>.symbols.json。
+每笔成交以 O(1) 更新该交易对的累计统计：已实现盈亏、手续费、平仓胜率、接针深度（成交价相对挂单时标记价格的偏离）、
+持仓时间（按数量加权的开仓时间计算）。启动时累计值按列汇总恢复，持仓只重放最后一次平仓之后的成交。
+
+daily_report 直接在整列 numpy 数组上按 (日期, 交易对) 分组汇总，几个月、上百万笔成交在 1 秒内完成。
+用法: python analytics.py <存储路径，如 state/engine> [天数]
+"""
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from okx.paginate import paginate
+
+FILL_DTYPE = np.dtype([('ts', '<i8'), ('trade', '<i8'), ('inst', '<i4'), ('side', 'i1'), ('px', '<f8'),
+                       ('sz', '<f8'), ('fee', '<f8'), ('pnl', '<f8'), ('depth', '<f8'), ('closed', '<f8'),
+                       ('held', '<f8')])
+DAY_MS = 24 * 3600 * 1000
+# get_fills 能查到的时间范围，更早的成交只能用 get_fills_history
+FILLS_RECENT_MS = 3 * DAY_MS - 3600 * 1000
+SYNC_OVERLAP_MS = 60 * 1000
+POSITION_EPSILON = 1e-9
+
+
+class PairStats(object):
+    """一个交易对的累计统计，每笔成交 O(1) 更新"""
+
+    __slots__ = ('fills', 'volume', 'fees', 'realized', 'closes', 'wins', 'depth_sum', 'depth_count',
+                 'held_sum', 'closed_sum', 'positions')
+
+    def __init__(self):
+        self.fills = 0
+        self.volume = 0.0  # 成交额（价格 × 张数）
+        self.fees = 0.0
+        self.realized = 0.0
+        self.closes = 0
+        self.wins = 0
+        self.depth_sum = 0.0
+        self.depth_count = 0
+        self.held_sum = 0.0  # Σ 持仓秒数 × 平仓张数
+        self.closed_sum = 0.0
+        self.positions = {}  # posSide -> [带符号张数, 加权开仓时间]
+
+    def update(self, ts, side, pos_side, px, sz, fee, pnl, depth):
+        """返回 (本笔平仓张数, 平仓部分的平均持仓秒数)"""
+        self.fills += 1
+        self.volume += px * sz
+        self.fees += fee
+        self.realized += pnl
+        if not math.isnan(depth):
+            self.depth_sum += depth
+            self.depth_count += 1
+        closed, held = self.move(ts, side, pos_side, sz)
+        if closed:
+            self.held_sum += held * closed
+            self.closed_sum += closed
+            self.closes += 1
+            if pnl > 0:
+                self.wins += 1
+        return closed, held
+
+    def move(self, ts, side, pos_side, sz):
+        """只更新持仓，返回 (平仓张数, 持仓秒数)"""
+        position = self.positions.setdefault(pos_side, [0.0, 0.0])
+        size, opened = position
+        if abs(size) < POSITION_EPSILON:
+            size = 0.0
+        delta = sz if side > 0 else -sz
+        if size == 0 or (size > 0) == (delta > 0):
+            # 开仓/加仓
+            position[1] = (opened * abs(size) + ts * sz) / (abs(size) + sz)
+            position[0] = size + delta
+            return 0.0, 0.0
+        closed = min(sz, abs(size))
+        position[0] = size + delta
+        if sz > closed:
+            # 反手：多出来的部分按新仓处理
+            position[1] = ts
+        return closed, (ts - opened) / 1000.0
+
+    def summary(self):
+        return {
+            'fills': self.fills,
+            'volume': self.volume,
+            'fees': self.fees,
+            'realized': self.realized,
+            'net': self.realized - self.fees,
+            'win_rate': self.wins / self.closes if self.closes else 0.0,
+            'avg_depth_pct': self.depth_sum / self.depth_count if self.depth_count else 0.0,
+            'avg_holding_s': self.held_sum / self.closed_sum if self.closed_sum else 0.0,
+        }
+
+
+class FillAnalytics(object):
+
+    def __init__(self, path, logger=None):
+        self.path = path
+        self.fills_path = path + '.fills'
+        self.symbols_path = path + '.symbols.json'
+        self.logger = logger
+        self.symbols = []
+        self.symbol_index = {}
+        self.stats = {}  # instId -> PairStats
+        self.seen = set()  # (inst, tradeId)
+        self.last_ts = 0  # 已记录的最新成交时间
+        self.synced_ts = 0  # 上次 REST 同步覆盖到的时间
+        self.resync_from = None  # 有推送缺少 tradeId 时，需要从该时间起用 REST 补齐
+        self.reference_prices = {}  # instId -> 最近一次挂单时的标记价格
+        self._lock = threading.Lock()
+        self._file = None
+
+    # ---- 存储 ----
+
+    def load(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            with open(self.symbols_path, 'r') as f:
+                self.symbols = json.load(f)
+        except FileNotFoundError:
+            self.symbols = []
+        self.symbol_index = {instId: i for i, instId in enumerate(self.symbols)}
+        records = self.records()
+        self._restore(records)
+        self.seen = set(zip(records['inst'].tolist(), records['trade'].tolist()))
+        if len(records):
+            self.last_ts = int(records['ts'].max())
+        self._file = open(self.fills_path, 'ab')
+        if self.logger and len(records):
+            self.logger.info(f"已加载 {len(records)} 笔成交统计")
+        return self
+
+    def _restore(self, records):
+        """
+        从存储的记录恢复统计：累计值按列用 bincount 一次算出；
+        持仓只需重放每个 (交易对, 方向) 最后一次平仓到零之后的记录
+        """
+        if not len(records):
+            return
+        n = len(self.symbols)
+        inst = records['inst']
+        closing = records['closed'] > 0
+        has_depth = ~np.isnan(records['depth'])
+
+        def total(weights=None):
+            return np.bincount(inst, weights=weights, minlength=n)
+
+        columns = {
+            'fills': total(), 'volume': total(records['px'] * records['sz']), 'fees': total(records['fee']),
+            'realized': total(records['pnl']), 'closes': total(closing), 'wins': total(closing & (records['pnl'] > 0)),
+            'depth_sum': total(np.where(has_depth, records['depth'], 0.0)), 'depth_count': total(has_depth),
+            'held_sum': total(records['held'] * records['closed']), 'closed_sum': total(records['closed']),
+        }
+        for i in np.flatnonzero(columns['fills']).tolist():
+            stats = self.stats[self.symbols[i]] = PairStats()
+            for name, values in columns.items():
+                value = values[i].item()
+                setattr(stats, name, int(value) if name in ('fills', 'closes', 'wins', 'depth_count') else value)
+
+        # 存储中 side 的绝对值 1 表示 long/net，2 表示 short
+        side = records['side']
+        group = inst.astype(np.int64) * 2 + (np.abs(side) == 2)
+        order = np.argsort(group, kind='stable')
+        sorted_group = group[order]
+        size = np.cumsum(np.where(side[order] > 0, records['sz'][order], -records['sz'][order]))
+        starts = np.flatnonzero(np.r_[True, sorted_group[1:] != sorted_group[:-1]])
+        size -= np.repeat(np.r_[0.0, size[starts[1:] - 1]], np.diff(np.r_[starts, len(order)]))
+        flat = np.abs(size) < POSITION_EPSILON
+        replay = np.ones(len(order), dtype=bool)
+        for begin, end in zip(starts.tolist(), np.r_[starts[1:], len(order)].tolist()):
+            zeros = np.flatnonzero(flat[begin:end])
+            if len(zeros):
+                replay[begin:begin + zeros[-1] + 1] = False
+        for record in records[np.sort(order[replay])]:
+            side = int(record['side'])
+            self.stats[self.symbols[record['inst']]].move(int(record['ts']), side, 'short' if abs(side) == 2 else 'long',
+                                                          float(record['sz']))
+
+    def records(self):
+        try:
+            data = np.fromfile(self.fills_path, dtype=np.uint8)
+        except FileNotFoundError:
+            return np.zeros(0, dtype=FILL_DTYPE)
+        # 崩溃时可能留下不完整的末尾记录
+        usable = len(data) - len(data) % FILL_DTYPE.itemsize
+        return data[:usable].view(FILL_DTYPE)
+
+    def _inst(self, instId):
+        index = self.symbol_index.get(instId)
+        if index is None:
+            index = self.symbol_index[instId] = len(self.symbols)
+            self.symbols.append(instId)
+            tmp_path = self.symbols_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.symbols, f)
+            os.replace(tmp_path, self.symbols_path)
+        return index
+
+    # ---- 写入 ----
+
+    def expect(self, instId, mark_price):
+        """挂单时记录标记价格，之后的成交据此计算接针深度"""
+        self.reference_prices[instId] = mark_price
+
+    def add(self, instId, trade_id, ts, side, pos_side, px, sz, fee, pnl):
+        """
+        :param fee: 手续费（正数为支出）
+        :return: 是否为新成交
+        """
+        with self._lock:
+            inst = self._inst(instId)
+            key = (inst, int(trade_id))
+            if key in self.seen:
+                return False
+            self.seen.add(key)
+            direction = 1 if side == 'buy' else -1
+            # 单向持仓模式 (net) 与 long 共用一个持仓槽位
+            pos_side = 'short' if pos_side == 'short' else 'long'
+            reference = self.reference_prices.get(instId)
+            depth = abs(reference - px) / reference * 100 if reference else float('nan')
+            stats = self.stats.setdefault(instId, PairStats())
+            closed, held = stats.update(ts, direction, pos_side, px, sz, fee, pnl, depth)
+            record = np.array([(ts, int(trade_id), inst, direction * (2 if pos_side == 'short' else 1), px, sz, fee,
+                                pnl, depth, closed, held)], dtype=FILL_DTYPE)
+            if self._file is not None:
+                self._file.write(record.tobytes())
+                self._file.flush()
+            self.last_ts = max(self.last_ts, ts)
+            return True
+
+    def on_order_fill(self, order):
+        """私有 WebSocket orders 频道（或模拟盘）的成交推送；没有 tradeId 的推送无法去重，留给下一次 sync 从 REST 补齐"""
+        if not order.get('tradeId'):
+            ts = int(order.get('fillTime') or order['uTime']) - SYNC_OVERLAP_MS
+            self.resync_from = ts if self.resync_from is None else min(self.resync_from, ts)
+            return False
+        return self.add(order['instId'], order['tradeId'], int(order.get('fillTime') or order['uTime']),
+                        order['side'], order.get('posSide') or 'net', float(order['fillPx']), float(order['fillSz']),
+                        -float(order.get('fillFee') or 0), float(order.get('fillPnl') or 0))
+
+    def on_rest_fill(self, fill):
+        """get_fills / get_fills_history 返回的成交"""
+        return self.add(fill['instId'], fill['tradeId'], int(fill['ts']), fill['side'], fill.get('posSide') or 'net',
+                        float(fill['fillPx']), float(fill['fillSz']), -float(fill.get('fee') or 0),
+                        float(fill.get('fillPnl') or 0))
+
+    def sync(self, trade_api, instType='SWAP'):
+        """
+        用 REST 补齐 last_ts 之后的成交（WebSocket 断开期间或进程停止期间的成交）；
+        get_fills 只有最近 3 天，首次运行或停止超过 3 天时用 get_fills_history（最近 3 个月）
+        :return: 新增的成交数
+        """
+        started = int(time.time() * 1000)
+        since = self.synced_ts or self.last_ts
+        if self.resync_from is not None:
+            since = min(since, self.resync_from) if since else self.resync_from
+        if since and started - since < FILLS_RECENT_MS:
+            rows = paginate(trade_api.get_fills, begin=since, instType=instType)
+        else:
+            rows = paginate(trade_api.get_fills_history, instType=instType)
+        fills = []
+        for fill in rows:
+            if int(fill['ts']) < since:
+                break
+            fills.append(fill)
+        added = 0
+        for fill in reversed(fills):
+            added += self.on_rest_fill(fill)
+        # 成交回报可能比请求稍晚出现在查询结果中，下次从稍早的时间开始查，重复的按 tradeId 去掉
+        self.synced_ts = started - SYNC_OVERLAP_MS
+        self.resync_from = None
+        return added
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ---- 报表 ----
+
+    def summary(self):
+        return {instId: stats.summary() for instId, stats in self.stats.items()}
+
+    def daily_report(self, days=None):
+        return daily_report(self.records(), self.symbols, days)
+
+
+def daily_report(records, symbols, days=None):
+    """
+    按 (UTC 日期, 交易对) 汇总
+    :return: [{'day', 'instId', 'fills', 'volume', 'fees', 'realized', 'net', 'closes', 'wins', 'win_rate',
+              'avg_depth_pct', 'avg_holding_s'}]，按日期、交易对排序
+    """
+    if days is not None and len(records):
+        records = records[records['ts'] >= (int(records['ts'].max()) // DAY_MS - days + 1) * DAY_MS]
+    if not len(records):
+        return []
+    day = records['ts'] // DAY_MS
+    keys, inverse = np.unique(day * len(symbols) + records['inst'], return_inverse=True)
+    n = len(keys)
+
+    def total(weights):
+        return np.bincount(inverse, weights=weights, minlength=n)
+
+    closing = records['closed'] > 0
+    has_depth = ~np.isnan(records['depth'])
+    fills = np.bincount(inverse, minlength=n)
+    volume = total(records['px'] * records['sz'])
+    fees = total(records['fee'])
+    realized = total(records['pnl'])
+    closes = np.bincount(inverse, weights=closing, minlength=n)
+    wins = np.bincount(inverse, weights=closing & (records['pnl'] > 0), minlength=n)
+    depth_sum = total(np.where(has_depth, records['depth'], 0.0))
+    depth_count = np.bincount(inverse, weights=has_depth, minlength=n)
+    held = total(records['held'] * records['closed'])
+    closed = total(records['closed'])
+    report = []
+    for i, key in enumerate(keys.tolist()):
+        report.append({
+            'day': time.strftime('%Y-%m-%d', time.gmtime(key // len(symbols) * 86400)),
+            'instId': symbols[key % len(symbols)],
+            'fills': int(fills[i]),
+            'volume': float(volume[i]),
+            'fees': float(fees[i]),
+            'realized': float(realized[i]),
+            'net': float(realized[i] - fees[i]),
+            'closes': int(closes[i]),
+            'wins': int(wins[i]),
+            'win_rate': float(wins[i] / closes[i]) if closes[i] else 0.0,
+            'avg_depth_pct': float(depth_sum[i] / depth_count[i]) if depth_count[i] else 0.0,
+            'avg_holding_s': float(held[i] / closed[i]) if closed[i] else 0.0,
+        })
+    return report
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    analytics = FillAnalytics(sys.argv[1])
+    started = time.perf_counter()
+    try:
+        with open(analytics.symbols_path, 'r') as f:
+            analytics.symbols = json.load(f)
+    except FileNotFoundError:
+        pass
+    rows = analytics.daily_report(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    for row in rows:
+        print(f"{row['day']} {row['instId']:<20} 成交 {row['fills']:>5} 成交额 {row['volume']:>14.2f} "
+              f"手续费 {row['fees']:>10.4f} 已实现 {row['realized']:>10.4f} 净盈亏 {row['net']:>10.4f} "
+              f"胜率 {row['win_rate']:>6.1%} 接针深度 {row['avg_depth_pct']:>6.3f}% 持仓 {row['avg_holding_s']:>8.0f}s")
+    print(f"{len(rows)} 行，耗时 {time.perf_counter() - started:.3f}s")
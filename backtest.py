@@ -0,0 +1,355 @@
+"""
+逐笔成交回测
+
+1分钟K线的最低价只说明价格到过，不说明挂单价上成交了多少，用K线判断接针是否成交会高估成交率。
+本模块用逐笔成交回放：
+- download_trades：用 MarketAPI.get_history_trades 从最新成交往前翻页下载，按小时写入
+  <目录>/<instId>/<YYYYmmddHH>.trades.gz（gzip 压缩的定长二进制记录，见 TRADE_DTYPE）；
+- read_trades：按块流式解压读取，内存占用只与块大小有关；
+- Backtest：按 monitor_interval 的真实节奏调用策略插件（strategies.py，与实盘同一套信号计算），
+  K线由逐笔成交实时合成（含未完成的当前K线），挂单只按成交量成交：
+  买单需要成交价低于挂单价，或成交价等于挂单价且为主动卖出，成交量先消耗 queue_ahead 再给挂单成交。
+  成交后持仓 exit_after 秒按当时成交价（taker）平仓，用来统计接针的盈亏。
+
+每个周期之间的撮合和K线合成都是对整段成交数组的 numpy 运算，Python 层的开销只与周期数有关。
+
+用法:
+    python backtest.py download <instId> <小时数> [目录] [配置文件]
+    python backtest.py run <策略名> <instId> [目录] [配置文件]
+"""
+import gzip
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from okx.candles import CLOSE, CONFIRM, HIGH, LOW, OPEN, TS, VOL, VOL_CCY, VOL_CCY_QUOTE
+from quantizer import get_quantizer
+from strategies import STRATEGIES, Bars
+
+# side: 1 主动买入，-1 主动卖出
+TRADE_DTYPE = np.dtype([('ts', '<i8'), ('px', '<f8'), ('sz', '<f8'), ('side', 'i1')])
+DEFAULT_DIR = 'data/trades'
+# history-trades 单页最多 100 条
+PAGE_LIMIT = 100
+HOUR_MS = 3600 * 1000
+MINUTE_MS = 60 * 1000
+
+
+# ---- 下载与读取 ----
+
+def _write_hour(directory, hour, trades):
+    """trades 为新的在前的元组列表，写入时改为时间顺序"""
+    name = time.strftime('%Y%m%d%H', time.gmtime(hour * 3600))
+    path = os.path.join(directory, f"{name}.trades.gz")
+    records = np.array(trades[::-1], dtype=TRADE_DTYPE)
+    tmp_path = path + '.tmp'
+    with gzip.open(tmp_path, 'wb', compresslevel=6) as f:
+        f.write(records.tobytes())
+    os.replace(tmp_path, path)
+    return path
+
+
+def download_trades(market_api, instId, directory=DEFAULT_DIR, hours=24, logger=None):
+    """
+    下载最近 hours 小时的逐笔成交，每凑齐一个小时就写一个文件，内存中最多保留一个小时的成交
+    :return: 写入的文件路径列表（时间倒序）
+    """
+    out_dir = os.path.join(directory, instId)
+    os.makedirs(out_dir, exist_ok=True)
+    since = int(time.time() * 1000) - hours * HOUR_MS
+    paths = []
+    pending = []
+    hour = None
+    after = ''
+    while True:
+        response = market_api.get_history_trades(instId=instId, after=after, limit=str(PAGE_LIMIT))
+        if response.get('code') != '0':
+            raise ValueError(f"get_history_trades failed: {response.get('msg')}")
+        page = response.get('data') or []
+        finished = len(page) < PAGE_LIMIT
+        for trade in page:
+            ts = int(trade['ts'])
+            if ts < since:
+                finished = True
+                break
+            trade_hour = ts // HOUR_MS
+            if hour is not None and trade_hour != hour and pending:
+                paths.append(_write_hour(out_dir, hour, pending))
+                if logger:
+                    logger.info(f"{instId} 已写入 {paths[-1]}（{len(pending)} 笔）")
+                pending = []
+            hour = trade_hour
+            pending.append((ts, float(trade['px']), float(trade['sz']), 1 if trade['side'] == 'buy' else -1))
+        if finished:
+            break
+        after = page[-1]['tradeId']
+    if pending:
+        paths.append(_write_hour(out_dir, hour, pending))
+    return paths
+
+
+def trade_files(directory, instId):
+    inst_dir = os.path.join(directory, instId)
+    return [os.path.join(inst_dir, name) for name in sorted(os.listdir(inst_dir)) if name.endswith('.trades.gz')]
+
+
+def read_trades(paths, chunk_rows=1 << 20):
+    """按时间顺序逐块读取成交记录，每块最多 chunk_rows 笔"""
+    chunk_bytes = chunk_rows * TRADE_DTYPE.itemsize
+    for path in paths:
+        with gzip.open(path, 'rb') as f:
+            while True:
+                buf = f.read(chunk_bytes)
+                if not buf:
+                    break
+                yield np.frombuffer(buf, dtype=TRADE_DTYPE)
+
+
+# ---- K线合成 ----
+
+class CandleBuilder(object):
+    """由逐笔成交合成1分钟K线，布局与 CandleStore 相同（新的在前，最新一根是未完成的K线）"""
+
+    def __init__(self, limit=241):
+        self.limit = limit
+        self.closed = np.empty((0, 9))
+        self.forming = None
+
+    def update(self, ts, px, sz):
+        if not len(ts):
+            return
+        minutes = ts // MINUTE_MS
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(minutes)) + 1))
+        ends = np.append(starts[1:], len(ts))
+        rows = np.zeros((len(starts), 9))
+        rows[:, TS] = minutes[starts] * MINUTE_MS
+        rows[:, OPEN] = px[starts]
+        rows[:, HIGH] = np.maximum.reduceat(px, starts)
+        rows[:, LOW] = np.minimum.reduceat(px, starts)
+        rows[:, CLOSE] = px[ends - 1]
+        rows[:, VOL] = rows[:, VOL_CCY] = np.add.reduceat(sz, starts)
+        rows[:, VOL_CCY_QUOTE] = np.add.reduceat(px * sz, starts)
+        forming = self.forming
+        if forming is not None:
+            if rows[0, TS] == forming[TS]:
+                first = rows[0]
+                first[OPEN] = forming[OPEN]
+                first[HIGH] = max(first[HIGH], forming[HIGH])
+                first[LOW] = min(first[LOW], forming[LOW])
+                first[VOL:CONFIRM] += forming[VOL:CONFIRM]
+            else:
+                rows = np.vstack((forming, rows))
+        if len(rows) > 1:
+            done = rows[-2::-1]
+            done[:, CONFIRM] = 1
+            self.closed = np.concatenate((done, self.closed))[:self.limit - 1]
+        self.forming = rows[-1].copy()
+
+    def klines(self):
+        if self.forming is None:
+            return self.closed
+        return np.concatenate((self.forming[None], self.closed))
+
+
+# ---- 回测 ----
+
+class Backtest(object):
+    """
+    单个策略、单个交易对的回测；行为与 engine.StrategyEngine.execute 一致：
+    每个周期撤掉旧挂单，按信号重新挂单，已有同方向持仓时不挂（skip_if_position）
+    :param instrument: get_instruments 返回的合约信息（tickSz/lotSz/minSz/ctVal）
+    """
+
+    def __init__(self, strategy, instId, pair_config, instrument, monitor_interval=60, maker_fee=0.0002,
+                 taker_fee=0.0005, exit_after=300, queue_ahead=0.0, warmup=241):
+        self.strategy = strategy
+        self.instId = instId
+        self.pair_config = pair_config
+        self.quantizer = get_quantizer(instrument)
+        self.ct_val = float(instrument.get('ctVal') or 1)
+        self.interval_ms = int(monitor_interval * 1000)
+        self.maker_fee = maker_fee
+        self.taker_fee = taker_fee
+        self.exit_after_ms = int(exit_after * 1000)
+        self.queue_ahead = queue_ahead
+        self.warmup = warmup
+        self.candles = CandleBuilder(limit=warmup)
+        self.next_decision = None
+        self.last_px = None
+        self.orders = {}  # side -> 挂单
+        self.positions = {}  # posSide -> 持仓
+        self.trades = 0
+        self.decisions = 0
+        self.placed = 0
+        self.fills = []  # (side, 成交价, 张数, 挂单时价格)
+        self.round_trips = []  # 每次平仓的净盈亏
+        self.fees = 0.0
+
+    def run(self, chunks):
+        started = time.perf_counter()
+        for chunk in chunks:
+            self.feed(chunk)
+        report = self.report()
+        report['seconds'] = time.perf_counter() - started
+        report['trades_per_minute'] = self.trades / report['seconds'] * 60 if report['seconds'] else 0.0
+        return report
+
+    def feed(self, chunk):
+        ts, px, sz, side = chunk['ts'], chunk['px'], chunk['sz'], chunk['side']
+        n = len(ts)
+        self.trades += n
+        if self.next_decision is None and n:
+            self.next_decision = (int(ts[0]) // self.interval_ms + 1) * self.interval_ms
+        i = 0
+        while i < n:
+            j = int(np.searchsorted(ts, self.next_decision, 'left'))
+            if j > i:
+                self._segment(ts[i:j], px[i:j], sz[i:j], side[i:j])
+                i = j
+            if i < n:
+                self._decide()
+                self.next_decision += self.interval_ms
+
+    def _segment(self, ts, px, sz, side):
+        """两个决策时刻之间的一段成交：先撮合挂单，再处理到期平仓，最后更新K线"""
+        for order_side in list(self.orders):
+            self._match(self.orders[order_side], ts, px, sz, side)
+        for pos_side, position in list(self.positions.items()):
+            k = int(np.searchsorted(ts, position['exit_ts'], 'left'))
+            if k < len(ts):
+                self._close(pos_side, position, float(px[k]))
+        self.candles.update(ts, px, sz)
+        self.last_px = float(px[-1])
+
+    def _match(self, order, ts, px, sz, side):
+        if order['side'] == 'buy':
+            mask = (px < order['px']) | ((px == order['px']) & (side < 0))
+        else:
+            mask = (px > order['px']) | ((px == order['px']) & (side > 0))
+        volume = np.cumsum(sz[mask])
+        if not len(volume) or volume[-1] <= order['queue']:
+            order['queue'] -= volume[-1] if len(volume) else 0.0
+            return
+        filled = min(order['remaining'], float(volume[-1]) - order['queue'])
+        k = int(np.searchsorted(volume, order['queue'] + filled, 'left'))
+        fill_ts = int(ts[mask][min(k, len(volume) - 1)])
+        order['queue'] = 0.0
+        order['remaining'] -= filled
+        if order['remaining'] <= 1e-12:
+            del self.orders[order['side']]
+        self._open(order, filled, fill_ts)
+
+    def _open(self, order, filled, fill_ts):
+        pos_side = 'long' if order['side'] == 'buy' else 'short'
+        fee = order['px'] * filled * self.ct_val * self.maker_fee
+        self.fees += fee
+        self.fills.append((order['side'], order['px'], filled, order['mark']))
+        position = self.positions.get(pos_side)
+        if position is None:
+            self.positions[pos_side] = {'sz': filled, 'px': order['px'], 'fee': fee,
+                                        'exit_ts': fill_ts + self.exit_after_ms}
+        else:
+            total = position['sz'] + filled
+            position['px'] = (position['px'] * position['sz'] + order['px'] * filled) / total
+            position['sz'] = total
+            position['fee'] += fee
+
+    def _close(self, pos_side, position, price):
+        fee = price * position['sz'] * self.ct_val * self.taker_fee
+        self.fees += fee
+        direction = 1 if pos_side == 'long' else -1
+        pnl = (price - position['px']) * position['sz'] * self.ct_val * direction
+        self.round_trips.append(pnl - position['fee'] - fee)
+        del self.positions[pos_side]
+
+    def _decide(self):
+        self.decisions += 1
+        self.orders = {}
+        klines = self.candles.klines()
+        if len(klines) < self.warmup or self.last_px is None:
+            return
+        mark_price = self.last_px
+        signal = self.strategy.evaluate(self.instId, self.pair_config, Bars(klines), mark_price)
+        if signal is None:
+            return
+        skip_if_position = self.pair_config.get('skip_if_position', True)
+        for side, allow, factor, amount_key, pos_side in (
+                ('buy', signal.allow_long, signal.long_factor, 'long_amount_usdt', 'long'),
+                ('sell', signal.allow_short, signal.short_factor, 'short_amount_usdt', 'short')):
+            if not allow or (skip_if_position and pos_side in self.positions):
+                continue
+            price = self.quantizer.price_float_for_side(mark_price * factor, side)
+            sz = self.quantizer.round_size(self.pair_config.get(amount_key, 20) / (price * self.ct_val))
+            if sz is None:
+                continue
+            self.orders[side] = {'side': side, 'px': price, 'remaining': float(sz), 'queue': self.queue_ahead,
+                                 'mark': mark_price}
+            self.placed += 1
+
+    def report(self):
+        unrealized = 0.0
+        for pos_side, position in self.positions.items():
+            direction = 1 if pos_side == 'long' else -1
+            unrealized += (self.last_px - position['px']) * position['sz'] * self.ct_val * direction
+        depths = [abs(mark - px) / mark * 100 for _, px, _, mark in self.fills]
+        wins = sum(1 for pnl in self.round_trips if pnl > 0)
+        return {
+            'trades': self.trades,
+            'decisions': self.decisions,
+            'orders': self.placed,
+            'fills': len(self.fills),
+            'fill_rate': len(self.fills) / self.placed if self.placed else 0.0,
+            'avg_depth_pct': sum(depths) / len(depths) if depths else 0.0,
+            'round_trips': len(self.round_trips),
+            'win_rate': wins / len(self.round_trips) if self.round_trips else 0.0,
+            'realized': sum(self.round_trips),
+            'fees': self.fees,
+            'unrealized': unrealized,
+        }
+
+
+def _load_config(path):
+    with open(path, 'r') as f:
+        config = json.load(f)
+    okx_config = config['okx']
+    return config, (okx_config["apiKey"], okx_config["secret"], okx_config["password"], True, '0')
+
+
+def main(argv):
+    import okx
+    from config_watcher import strategy_pairs
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('backtest')
+    if len(argv) >= 3 and argv[0] == 'download':
+        instId, hours = argv[1], float(argv[2])
+        directory = argv[3] if len(argv) > 3 else DEFAULT_DIR
+        _, credentials = _load_config(argv[4] if len(argv) > 4 else 'config.json')
+        market_api = okx.MarketAPI(*credentials)
+        paths = download_trades(market_api, instId, directory, hours=hours, logger=logger)
+        logger.info(f"下载完成，共 {len(paths)} 个文件")
+        return
+    if len(argv) >= 3 and argv[0] == 'run':
+        name, instId = argv[1], argv[2]
+        directory = argv[3] if len(argv) > 3 else DEFAULT_DIR
+        config, credentials = _load_config(argv[4] if len(argv) > 4 else 'config.json')
+        pair_config = strategy_pairs(config, name).get(instId)
+        if pair_config is None:
+            raise SystemExit(f"{instId} is not configured for strategy {name}")
+        public_api = okx.PublicAPI(*credentials)
+        instrument = public_api.get_instruments(instType='SWAP', instId=instId)['data'][0]
+        backtest = Backtest(STRATEGIES[name](), instId, pair_config, instrument,
+                            monitor_interval=config.get('monitor_interval', 60))
+        report = backtest.run(read_trades(trade_files(directory, instId)))
+        for key, value in report.items():
+            logger.info(f"{key}: {value:.6g}" if isinstance(value, float) else f"{key}: {value}")
+        return
+    print(__doc__)
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,56 @@
+"""
+K线解码基准测试：对比 response.json() + 逐字段 float() 与 okx.candles.decode_candles
+
+用本地生成的响应体，不发起网络请求。
+用法: python benchmarks/bench_candles.py [每个响应的K线数量，默认 300] [重复次数，默认 500]
+"""
+import gc
+import json
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from okx.candles import decode_candles  # noqa: E402
+
+
+def make_body(rows):
+    random.seed(1)
+    data = []
+    price = 3.7
+    for i in range(rows):
+        price *= 1 + random.uniform(-0.002, 0.002)
+        data.append([str(1697026383085 - i * 60000), f"{price:.4f}", f"{price * 1.003:.4f}", f"{price * 0.997:.4f}",
+                     f"{price:.4f}", str(random.randint(1000, 9000000)), f"{random.uniform(1e3, 1e7):.8f}",
+                     f"{random.uniform(1e3, 1e7):.8f}", '1'])
+    return json.dumps({'code': '0', 'msg': '', 'data': data}).encode()
+
+
+def legacy_decode(body):
+    response = json.loads(body)
+    return np.array([[float(field) for field in row] for row in response['data']])
+
+
+def measure(func, body, n):
+    gc.collect()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        func(body)
+    return time.perf_counter() - t0
+
+
+if __name__ == '__main__':
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    body = make_body(rows)
+    assert (legacy_decode(body) == decode_candles(body)['data']).all()
+
+    legacy = measure(legacy_decode, body, n)
+    fast = measure(decode_candles, body, n)
+    print(f"body: {len(body)} bytes, {rows} candles")
+    print(f"json + float(): {legacy / n * 1e6:.1f} us/response")
+    print(f"decode_candles: {fast / n * 1e6:.1f} us/response  (x{legacy / fast:.2f})")
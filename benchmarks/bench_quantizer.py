@@ -0,0 +1,61 @@
+"""
+量化器基准测试：对比 zhen.round_price_to_tick 与 quantizer.InstrumentQuantizer
+
+用法: python benchmarks/bench_quantizer.py [价格数量，默认 2000000]
+"""
+import os
+import random
+import sys
+import time
+from decimal import Decimal, ROUND_FLOOR
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from quantizer import InstrumentQuantizer  # noqa: E402
+
+
+def round_price_to_tick(price, tick_size):
+    # zhen.py 中原有实现（原样复制，避免导入 zhen 时读取 config.json 和初始化客户端）
+    tick_decimals = len(f"{tick_size:.10f}".rstrip('0').split('.')[1]) if '.' in f"{tick_size:.10f}" else 0
+    adjusted_price = round(price / tick_size) * tick_size
+    return f"{adjusted_price:.{tick_decimals}f}"
+
+
+def bench(n, tick_size, base):
+    rnd = random.Random(42)
+    prices = [base * (0.5 + rnd.random()) for _ in range(n)]
+    quantizer = InstrumentQuantizer('BENCH-USDT-SWAP', tick_size)
+    tick = float(tick_size)
+
+    t0 = time.perf_counter()
+    for p in prices:
+        round_price_to_tick(p, tick)
+    legacy = time.perf_counter() - t0
+
+    price_for_side = quantizer.price_for_side
+    t0 = time.perf_counter()
+    for p in prices:
+        price_for_side(p, 'buy')
+    fast = time.perf_counter() - t0
+
+    # 抽样校验：与 Decimal 精确向下取整对比（不留误差余量），以及正好在 tick 上的价格取整后不变
+    step = Decimal(tick_size)
+    errors = on_tick_errors = 0
+    for p in prices[:20000]:
+        expect = (Decimal(repr(p)) / step).to_integral_value(ROUND_FLOOR) * step
+        if Decimal(price_for_side(p, 'buy')) != expect:
+            errors += 1
+        if Decimal(price_for_side(float(expect), 'buy')) != expect or \
+                Decimal(price_for_side(float(expect), 'sell')) != expect:
+            on_tick_errors += 1
+
+    print(f"tick={tick_size:<8} n={n}: legacy {legacy:.3f}s ({legacy / n * 1e9:.0f} ns/op), "
+          f"quantizer {fast:.3f}s ({fast / n * 1e9:.0f} ns/op), speedup x{legacy / fast:.2f}, "
+          f"floor mismatches {errors}/20000, on-tick moved {on_tick_errors}/20000")
+
+
+if __name__ == '__main__':
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    for tick_size, base in (('0.0001', 0.5), ('0.1', 60000.0), ('0.00001', 0.002), ('5', 3000.0),
+                            ('0.0001', 50000.0)):
+        bench(count, tick_size, base)
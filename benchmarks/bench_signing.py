@@ -0,0 +1,68 @@
+"""
+请求签名基准测试：对比原有的 URL 拼接/签名/请求头构建流程与 okx.utils.Signer + HeaderTemplate
+
+不发起网络请求，只测量每个请求在本地的 CPU 开销。
+用法: python benchmarks/bench_signing.py [请求数量，默认 200000]
+"""
+import base64
+import hmac
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from okx import consts as c, utils  # noqa: E402
+
+API_KEY = '6b6b13c6-ea0e-4bd3-a16a-08655a592cea'
+SECRET = 'BA95AE7A8BE706B4F2D15F8D7F69389E'
+PASSPHRASE = 'passphrase'
+
+
+def legacy_parse_params_to_str(params):
+    url = '?'
+    for key, value in params.items():
+        url = url + str(key) + '=' + str(value) + '&'
+    return url[0:-1]
+
+
+def legacy_sign(message, secretKey):
+    mac = hmac.new(bytes(secretKey, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
+    return base64.b64encode(mac.digest())
+
+
+def legacy_request(params, timestamp):
+    request_path = c.MARKET_CANDLES + legacy_parse_params_to_str(params)
+    sign = legacy_sign(utils.pre_hash(timestamp, c.GET, request_path, ''), SECRET)
+    return utils.get_header(API_KEY, sign, timestamp, PASSPHRASE, '0')
+
+
+def fast_request(signer, template, params, timestamp):
+    request_path = c.MARKET_CANDLES + utils.parse_params_to_str(params)
+    sign = signer.sign(timestamp + c.GET + request_path)
+    return template.build(sign, timestamp)
+
+
+if __name__ == '__main__':
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    # 与 MarketAPI.get_candlesticks 实际发送的参数一致：after/before 为空字符串
+    params = {'instId': 'PNUT-USDT-SWAP', 'after': '', 'before': '', 'bar': '1m', 'limit': 241}
+    timestamp = utils.get_timestamp()
+
+    t0 = time.perf_counter()
+    for _ in range(n):
+        legacy_request(params, timestamp)
+    legacy = time.perf_counter() - t0
+
+    signer = utils.Signer(SECRET)
+    template = utils.HeaderTemplate(API_KEY, PASSPHRASE, '0')
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fast_request(signer, template, params, timestamp)
+    fast = time.perf_counter() - t0
+
+    print(f"legacy:  {legacy / n * 1e6:.2f} us/request")
+    print(f"signer:  {fast / n * 1e6:.2f} us/request  (x{legacy / fast:.2f})")
+    print(f"legacy URL: {c.MARKET_CANDLES + legacy_parse_params_to_str(params)}")
+    print(f"new URL:    {c.MARKET_CANDLES + utils.parse_params_to_str(params)}")
+    print(f"CPU saved at 5000 requests/min: {(legacy - fast) / n * 5000 * 1e3:.1f} ms/min")
@@ -0,0 +1,98 @@
+"""
+K线增量同步
+
+首次只做一次完整拉取（limit 根），之后每个周期用 before 游标只请求最新一根已存储K线
+（仍在形成中，需要刷新）及之后的新K线，通常只返回 1~2 根。
+如果返回的K线没有和本地最新一根衔接上（整页都是新K线），说明中间有缺口，用 after/before
+分页补齐；缺口比保存的窗口还长时直接重新完整拉取。
+K线通过 get_candles_array 直接解码成 float64 数组（列见 okx.candles），本地按列存储，
+合并/裁剪都是数组切片；返回的数组仍是新的在前，kline[4] 这样的下标访问方式不变。
+"""
+import threading
+
+import numpy as np
+
+from okx.candles import TS
+
+# candles 接口单页上限
+PAGE_LIMIT = 300
+# 增量请求的单页条数
+DELTA_LIMIT = 100
+
+
+class CandleStore(object):
+
+    def __init__(self, market_api, bar='1m', limit=241, logger=None):
+        self.market_api = market_api
+        self.bar = bar
+        self.limit = limit
+        self.logger = logger
+        self._candles = {}  # instId -> K线数组（新的在前，与交易所返回顺序一致）
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.rows = 0
+
+    def _fetch(self, instId, limit, after='', before=''):
+        response = self.market_api.get_candles_array(instId, after=after, before=before, bar=self.bar, limit=str(limit))
+        self.requests += 1
+        if response.get('code', '0') != '0':
+            raise ValueError(f"get_candlesticks failed: {response.get('msg')}")
+        data = response['data']
+        self.rows += len(data)
+        return data
+
+    def _inst_lock(self, instId):
+        lock = self._locks.get(instId)
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(instId, threading.Lock())
+        return lock
+
+    def bootstrap(self, instId):
+        data = self._fetch(instId, min(self.limit, PAGE_LIMIT))
+        while 0 < len(data) < self.limit:
+            page = self._fetch(instId, min(self.limit - len(data), PAGE_LIMIT), after=str(int(data[-1, TS])))
+            if not len(page):
+                break
+            data = np.concatenate((data, page))
+        self._candles[instId] = data
+        return data
+
+    def sync(self, instId):
+        """同步并返回该交易对最近 limit 根K线（新的在前）；数组只会被整体替换，调用方可以直接持有"""
+        with self._inst_lock(instId):
+            candles = self._candles.get(instId)
+            if candles is None or not len(candles):
+                return self.bootstrap(instId)
+
+            newest_ts = int(candles[0, TS])
+            delta = self._fetch(instId, DELTA_LIMIT, before=str(newest_ts - 1))
+            if len(delta) and delta[-1, TS] > newest_ts:
+                delta = self._backfill(instId, delta, newest_ts)
+                if delta is None:
+                    return self.bootstrap(instId)
+
+            if len(delta):
+                # delta 中包含本地最新一根（形成中的K线）的新版本，替换掉它
+                older = candles[candles[:, TS] < delta[-1, TS]]
+                candles = np.concatenate((delta, older))[:self.limit]
+                self._candles[instId] = candles
+            return candles
+
+    def _backfill(self, instId, delta, newest_ts):
+        """补齐 newest_ts 与 delta 最早一根之间的缺口；缺口超过窗口长度时返回 None"""
+        if self.logger:
+            self.logger.warning(f"{instId} K线出现缺口，开始补齐")
+        while delta[-1, TS] > newest_ts:
+            if len(delta) >= self.limit:
+                return None
+            page = self._fetch(instId, DELTA_LIMIT, after=str(int(delta[-1, TS])), before=str(newest_ts - 1))
+            if not len(page):
+                break
+            delta = np.concatenate((delta, page))
+        return delta
+
+    def drop(self, instId):
+        self._candles.pop(instId, None)
+        self._locks.pop(instId, None)
@@ -0,0 +1,173 @@
+"""
+配置文件热加载
+
+在每个循环周期开始时检查 config.json 是否被修改；修改后的文件先做校验，校验通过才与
+当前运行中的 trading_pairs_config 做差异比较，按交易对给出 新增/删除/修改 三类变更，
+由主循环在周期边界统一应用。未变化的交易对不受影响，其缓存（K线、指标、杠杆）全部保留。
+"""
+import hashlib
+import json
+import os
+
+# 交易对配置中必须为非负数值的字段
+PAIR_NUMERIC_FIELDS = (
+    'long_amount_usdt', 'short_amount_usdt', 'value_multiplier', 'ema',
+    'ema_short_period', 'ema_long_period', 'min_ema_separation_pct', 'trend_confirmation_candles',
+)
+# 修改后可以直接在运行中生效的全局配置项
+LIVE_SETTINGS = ('monitor_interval', 'leverage', 'feishu_webhook')
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def validate_config(config):
+    """
+    校验配置结构，出错时抛出 ConfigError
+    :param config: json.load 得到的配置字典
+    """
+    if not isinstance(config, dict):
+        raise ConfigError("config root must be an object")
+    okx_config = config.get('okx')
+    if not isinstance(okx_config, dict):
+        raise ConfigError("missing 'okx' section")
+    for key in ('apiKey', 'secret', 'password'):
+        if not okx_config.get(key):
+            raise ConfigError(f"missing okx.{key}")
+    _validate_pairs(config.get('tradingPairs', {}), 'tradingPairs')
+    strategies = config.get('strategies', {})
+    if not isinstance(strategies, dict):
+        raise ConfigError("'strategies' must be an object")
+    for name, section in strategies.items():
+        if not isinstance(section, dict):
+            raise ConfigError(f"strategies.{name} must be an object")
+        if 'tradingPairs' in section:
+            _validate_pairs(section['tradingPairs'], f"strategies.{name}.tradingPairs")
+    monitor_interval = config.get('monitor_interval', 60)
+    if isinstance(monitor_interval, bool) or not isinstance(monitor_interval, (int, float)) or monitor_interval <= 0:
+        raise ConfigError(f"monitor_interval must be a positive number, got {monitor_interval!r}")
+    leverage = config.get('leverage', 10)
+    if isinstance(leverage, bool) or not isinstance(leverage, (int, float)) or leverage <= 0:
+        raise ConfigError(f"leverage must be a positive number, got {leverage!r}")
+
+
+def _validate_pairs(pairs, path):
+    if not isinstance(pairs, dict):
+        raise ConfigError(f"'{path}' must be an object")
+    for instId, pair_config in pairs.items():
+        if not isinstance(pair_config, dict):
+            raise ConfigError(f"{path}.{instId} must be an object")
+        for field in PAIR_NUMERIC_FIELDS:
+            value = pair_config.get(field)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ConfigError(f"{path}.{instId}.{field} must be a non-negative number, got {value!r}")
+
+
+def strategy_pairs(config, name):
+    """策略使用的交易对配置：strategies.<name>.tradingPairs，未单独配置时使用顶层 tradingPairs"""
+    section = config.get('strategies', {}).get(name) or {}
+    return section.get('tradingPairs', config.get('tradingPairs', {}))
+
+
+class ConfigChange(object):
+    """一次配置变更：按交易对的新增/删除/修改，以及可热更新的全局配置项"""
+
+    def __init__(self, config, added, removed, updated, settings, okx_changed, strategies_changed=False):
+        self.config = config
+        self.added = added  # {instId: pair_config}
+        self.removed = removed  # [instId]
+        self.updated = updated  # {instId: pair_config}
+        self.settings = settings  # {key: new_value}
+        self.okx_changed = okx_changed
+        self.strategies_changed = strategies_changed  # strategies 段有变化，由引擎按策略重新比较交易对
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated or self.settings or self.okx_changed
+                    or self.strategies_changed)
+
+    def __str__(self):
+        return (f"added={sorted(self.added)}, removed={sorted(self.removed)}, "
+                f"updated={sorted(self.updated)}, settings={self.settings}")
+
+
+def diff_pairs(old_pairs, new_pairs):
+    """:return: (新增 {instId: pair_config}, 删除 [instId], 修改 {instId: pair_config})"""
+    added = {k: v for k, v in new_pairs.items() if k not in old_pairs}
+    removed = [k for k in old_pairs if k not in new_pairs]
+    updated = {k: v for k, v in new_pairs.items() if k in old_pairs and old_pairs[k] != v}
+    return added, removed, updated
+
+
+def diff_config(old_config, new_config):
+    added, removed, updated = diff_pairs(old_config.get('tradingPairs', {}), new_config.get('tradingPairs', {}))
+    settings = {k: new_config.get(k) for k in LIVE_SETTINGS if old_config.get(k) != new_config.get(k)}
+    okx_changed = old_config.get('okx') != new_config.get('okx')
+    strategies_changed = old_config.get('strategies', {}) != new_config.get('strategies', {})
+    return ConfigChange(new_config, added, removed, updated, settings, okx_changed, strategies_changed)
+
+
+class ConfigWatcher(object):
+    """
+    通过 mtime/size 快速判断文件是否变化，再用内容哈希排除仅 touch 的情况
+    poll() 只在周期边界调用，不需要额外线程
+    """
+
+    def __init__(self, path, config, logger=None):
+        self.path = path
+        self.config = config
+        self.logger = logger
+        self._stat = self._stat_key()
+        self._digest = self._read_digest()[1]
+        self._failed_digest = None
+
+    def _stat_key(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _read_digest(self):
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except OSError:
+            return None, None
+        return raw, hashlib.sha1(raw).hexdigest()
+
+    def poll(self):
+        """
+        检查配置文件
+        :return: ConfigChange；文件未变化、内容无差异或校验失败时返回 None
+        """
+        stat_key = self._stat_key()
+        if stat_key is None or stat_key == self._stat:
+            return None
+        raw, digest = self._read_digest()
+        if raw is None:
+            return None
+        if digest == self._digest:
+            self._stat = stat_key
+            return None
+        try:
+            new_config = json.loads(raw.decode('utf-8'))
+            validate_config(new_config)
+        except (ValueError, UnicodeDecodeError) as e:
+            # 校验失败时不记录 stat/digest，下个周期重新读取（编辑器非原子写入时可能读到写了一半的文件）；
+            # 同一内容只报一次错
+            if self.logger and digest != self._failed_digest:
+                self.logger.error(f"配置文件 {self.path} 校验失败，继续使用当前配置: {e}")
+            self._failed_digest = digest
+            return None
+        self._stat = stat_key
+        self._digest = digest
+        change = diff_config(self.config, new_config)
+        self.config = new_config
+        if not change:
+            return None
+        if change.okx_changed and self.logger:
+            self.logger.warning("okx 账户配置已修改，需要重启进程才能生效")
+        return change
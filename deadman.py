@@ -0,0 +1,92 @@
+"""
+交易所端的死人开关（cancel-all-after）
+
+后台线程每 timeout/3 秒调用一次 cancel_all_after(timeOut=timeout)，交易所在 timeout 秒内收不到刷新就撤销
+全部带本程序 tag 的挂单。线程不是无条件刷新：主循环每次有进展时调用 beat()，超过 stall_after 秒没有
+beat 说明周期卡住了（请求挂起、死锁等），线程停止刷新，挂单在 timeout 秒后由交易所撤销。
+进程崩溃时线程随之消失，效果相同。
+"""
+import threading
+import time
+
+# OKX 允许的 timeOut 范围（秒），0 表示关闭
+MIN_TIMEOUT = 10
+MAX_TIMEOUT = 120
+
+
+class DeadMansSwitch(object):
+
+    def __init__(self, trade_api, timeout=60, stall_after=180, tag='', logger=None):
+        """
+        :param timeout: 交易所倒计时（秒），限制在 10~120
+        :param stall_after: 超过该秒数没有 beat() 时停止刷新
+        :param tag: 只撤销带该 tag 的挂单
+        """
+        self.trade_api = trade_api
+        self.timeout = max(MIN_TIMEOUT, min(MAX_TIMEOUT, int(timeout)))
+        self.stall_after = stall_after
+        self.tag = tag
+        self.logger = logger
+        self.interval = self.timeout / 3.0
+        self.last_beat = time.monotonic()
+        self.last_refresh = 0.0
+        self.trigger_time = None  # 交易所返回的预计撤单时间（毫秒时间戳）
+        self.stalled = False
+        self._stop = threading.Event()
+        self._thread = None
+
+    def beat(self):
+        """主循环有进展时调用"""
+        self.last_beat = time.monotonic()
+        if self.stalled:
+            self.stalled = False
+            if self.logger:
+                self.logger.info("主循环恢复，继续刷新 cancel-all-after")
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.beat()
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, name='cancel-all-after', daemon=True)
+        self._thread.start()
+
+    def refresh(self):
+        try:
+            response = self.trade_api.cancel_all_after(timeOut=str(self.timeout), tag=self.tag)
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"刷新 cancel-all-after 失败: {e}")
+            return False
+        if response.get('code') != '0':
+            if self.logger:
+                self.logger.error(f"刷新 cancel-all-after 失败: {response.get('msg')}")
+            return False
+        data = response.get('data') or [{}]
+        self.trigger_time = data[0].get('triggerTime')
+        self.last_refresh = time.monotonic()
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            if time.monotonic() - self.last_beat > self.stall_after:
+                if not self.stalled:
+                    self.stalled = True
+                    if self.logger:
+                        self.logger.error(f"主循环已 {self.stall_after}s 无进展，停止刷新 cancel-all-after，"
+                                          f"挂单将在 {self.timeout}s 内被交易所撤销")
+                continue
+            self.refresh()
+
+    def stop(self, disarm=True):
+        """停止刷新；disarm 为 True 时同时关闭交易所倒计时（正常退出并已自行撤单时使用）"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if disarm:
+            try:
+                self.trade_api.cancel_all_after(timeOut='0', tag=self.tag)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"关闭 cancel-all-after 失败: {e}")
@@ -0,0 +1,873 @@
+"""
+策略引擎
+
+在一个进程中运行多个策略插件（strategies.py），共用同一套基础设施：
+API 客户端与限速器（okx.ratelimit）、合约信息、全市场行情/账户快照、K线缓存、私有 WebSocket、
+下单通道、订单簿与 tickers 订阅。每个周期每个交易对只取一次标记价格和K线，交给交易该交易对的
+所有策略计算信号，因此增加策略不会增加行情请求；各策略有独立的 OMS（clOrdId 前缀不同），
+撤单只撤自己的挂单。
+
+用法: python engine.py [策略名 ...]，不指定时运行 config.json 中 strategies 配置的全部策略
+zhen.py / zhen_2.py 分别以单个策略运行本引擎，行为与原脚本一致。
+"""
+import time
+startup_begin = time.perf_counter()
+import json
+import logging
+import signal
+import sys
+import threading
+from logging.handlers import TimedRotatingFileHandler
+
+import requests
+
+import okx
+from okx.concurrency import AimdController
+from account_snapshot import AccountSnapshot
+from analytics import FillAnalytics
+from candle_store import CandleStore
+from config_watcher import ConfigWatcher, diff_pairs, strategy_pairs
+from deadman import DeadMansSwitch
+from journal import Journal
+from market_snapshot import MarketSnapshot
+from oms import OrderManager
+from order_gateway import ORDER_TAG, OrderGateway
+from quantizer import get_quantizer
+from reactive import RepositionTrigger, TickerFeed
+from strategies import STRATEGIES, Bars
+imports_done = time.perf_counter()
+
+# 状态日志中的合约信息在该时间（秒）内直接使用，不再请求 instruments
+INSTRUMENTS_MAX_AGE = 24 * 3600
+
+
+def setup_logger(name, log_file):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.INFO)
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    file_handler = TimedRotatingFileHandler(log_file, when='midnight', interval=1, backupCount=7, encoding='utf-8')
+    file_handler.suffix = "%Y-%m-%d"
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    logger.addHandler(console_handler)
+    return logger
+
+
+class InstrumentRegistry(object):
+    """合约信息，所有策略共用；USDT 本位线性合约的张数换算在本地完成，不再请求 convert-contract-coin"""
+
+    def __init__(self, public_api, instType='SWAP', logger=None, journal=None):
+        self.public_api = public_api
+        self.instType = instType
+        self.logger = logger
+        self.journal = journal
+        self.instruments = {}
+        self.updated = 0.0
+
+    def refresh(self):
+        self.logger.info(f"Fetching all instruments for type: {self.instType}")
+        response = self.public_api.get_instruments(instType=self.instType)
+        if 'data' not in response or len(response['data']) == 0:
+            raise ValueError("Unexpected response structure or no instrument data available")
+        self.instruments = {instrument['instId']: instrument for instrument in response['data']}
+        self.updated = time.time()
+        self.logger.info(f"Stored {len(self.instruments)} instruments")
+        if self.journal is not None:
+            self.journal.put('instruments', self.instType, {'updated': self.updated, 'data': self.instruments})
+
+    def restore(self, max_age):
+        """从状态日志恢复合约信息，超过 max_age 秒的视为过期；返回是否恢复成功"""
+        saved = self.journal.get('instruments', self.instType) if self.journal is not None else None
+        if not saved or time.time() - saved['updated'] > max_age:
+            return False
+        self.instruments = saved['data']
+        self.updated = saved['updated']
+        self.logger.info(f"Restored {len(self.instruments)} instruments from journal")
+        return True
+
+    def __contains__(self, instId):
+        return instId in self.instruments
+
+    def get(self, instId):
+        return self.instruments.get(instId)
+
+    def quantizer(self, instId):
+        return get_quantizer(self.instruments[instId])
+
+    def contracts(self, instId, amount_usdt, px):
+        """
+        把 USDT 金额换算成开仓张数（向下取整到 lotSz）
+        :return: (张数字符串或 None, 失败信息)；张数不足 minSz 时返回 (None, '')
+        """
+        instrument = self.instruments[instId]
+        quantizer = get_quantizer(instrument)
+        if instrument.get('ctType') == 'linear' and instrument.get('settleCcy') == 'USDT' and instrument.get('ctVal'):
+            return quantizer.round_size(float(amount_usdt) / (float(px) * float(instrument['ctVal']))), ''
+        response = self.public_api.convert_contract_coin(type='1', instId=instId, sz=str(amount_usdt), px=str(px),
+                                                         unit='usdt', opType='open')
+        if response['code'] != '0':
+            return None, response['msg']
+        return quantizer.round_size(response['data'][0]['sz']), ''
+
+
+class StrategySlot(object):
+    """引擎中的一个策略：策略对象、它的交易对配置、独立的 OMS 和改单触发器"""
+
+    def __init__(self, strategy, pairs, logger, journal=None):
+        self.strategy = strategy
+        self.name = strategy.name
+        self.pairs = dict(pairs)
+        self.oms = OrderManager(prefix=strategy.prefix, logger=logger, journal=journal)
+        self.trigger = None
+
+
+class StrategyEngine(object):
+
+    def __init__(self, strategy_names=None, config_path='config.json', log_file='log/engine.log', logger_name='engine',
+                 overrides=None):
+        """:param overrides: 覆盖配置文件中的顶层设置（回放等场景使用）"""
+        with open(config_path, 'r') as f:
+            self.config = config = json.load(f)
+        config.update(overrides or {})
+        self.logger = logger = setup_logger(logger_name, log_file)
+        self.okx_config = okx_config = config['okx']
+        self.monitor_interval = config.get('monitor_interval', 60)
+        self.feishu_webhook = config.get('feishu_webhook', '')
+        self.leverage_value = config.get('leverage', 10)
+        self.use_websocket = config.get('use_websocket', True)
+        self.use_orderbook = config.get('use_orderbook', False)
+        self.reactive_reposition = config.get('reactive_reposition', False)
+        self.reposition_fraction = config.get('reposition_fraction', 0.25)
+        self.market_bus_name = config.get('market_bus')  # 共享内存行情总线名称，由 market_bus.py 行情进程创建
+        self.cancel_all_after = config.get('cancel_all_after', 60)  # 交易所死人开关倒计时（秒），0 表示不启用
+        self.cycle_timeout = config.get('cycle_timeout', 120)  # 单个周期超过该秒数没有进展视为卡住
+        # 每个周期同时处理的交易对数量由 AIMD 控制器按延迟和限速错误自动调整
+        self.concurrency = AimdController(initial=config.get('concurrency', 5),
+                                          maximum=config.get('max_concurrency', 32))
+        self.concurrency_decreases = 0
+        self.paper_trading = config.get('paper', False)  # 模拟盘：行情用实盘，订单在本地撮合
+        # 录制所有 REST 响应和 WebSocket 消息，用 replay.py 回放
+        self.tape = None
+        if config.get('record_tape'):
+            from okx.tape import TapeRecorder, install
+            self.tape = TapeRecorder(config['record_tape'])
+            install(self.tape)
+            logger.info(f"录制交易所数据到 {config['record_tape']}")
+        # 状态日志，重启时据此恢复订单/合约信息/杠杆/挂单目标，只与交易所核对差异；
+        # 录制时不启用，保证启动时的状态全部来自交易所，回放不依赖本地文件
+        state_path = f"{config.get('journal_dir', 'state')}/{logger_name}{'-paper' if self.paper_trading else ''}"
+        self.journal = None
+        if config.get('journal', True) and self.tape is None:
+            self.journal = Journal(state_path, logger=logger)
+        # 成交分析：按交易对累计已实现盈亏/手续费/胜率/接针深度/持仓时间，每天输出一次日报
+        self.analytics = None
+        if config.get('analytics', True) and self.tape is None:
+            self.analytics = FillAnalytics(state_path, logger=logger)
+        self.report_day = None
+
+        credentials = (okx_config["apiKey"], okx_config["secret"], okx_config["password"], True, '0')
+        self.trade_api = okx.TradeAPI(*credentials)
+        self.market_api = okx.MarketAPI(*credentials)
+        self.public_api = okx.PublicAPI(*credentials)
+        self.account_api = okx.AccountAPI(*credentials)
+        self.paper = None
+        self.trade_feed = None
+        if self.paper_trading:
+            self.start_paper(config.get('paper_fee', 0.0002), logger_name)
+
+        if strategy_names is None:
+            strategy_names = list(config.get('strategies') or {}) or ['zhen']
+        self.slots = []
+        for name in strategy_names:
+            if name not in STRATEGIES:
+                raise ValueError(f"unknown strategy {name!r}, available: {sorted(STRATEGIES)}")
+            self.slots.append(StrategySlot(STRATEGIES[name](logger), strategy_pairs(config, name), logger,
+                                           self.journal))
+
+        self.instruments = InstrumentRegistry(self.public_api, logger=logger, journal=self.journal)
+        self.leverage_cache = {}  # (instId, posSide) -> 已设置的杠杆，杠杆是账户级设置，所有策略共用
+        self.config_watcher = ConfigWatcher(config_path, config, logger)
+        self.order_gateway = OrderGateway(self.trade_api, logger=logger)
+        self.market_snapshot = MarketSnapshot(self.market_api, instType='SWAP', max_age=self.monitor_interval)
+        self.account_snapshot = AccountSnapshot(self.trade_api, self.account_api, instType='SWAP',
+                                                max_age=self.monitor_interval)
+        self.candle_store = CandleStore(self.market_api, bar='1m', limit=241, logger=logger)
+        self.market_bus = None
+        self.private_stream = None
+        self.book_feed = None
+        self.ticker_feed = None
+        self.deadman = None
+
+    # ---- 交易对 ----
+
+    def inst_ids(self):
+        """所有策略交易对的并集，保持配置中的顺序"""
+        seen = {}
+        for slot in self.slots:
+            for instId in slot.pairs:
+                seen.setdefault(instId, None)
+        return list(seen)
+
+    # ---- 通知 ----
+
+    def send_feishu_notification(self, message):
+        if self.feishu_webhook:
+            headers = {'Content-Type': 'application/json'}
+            data = {"msg_type": "text", "content": {"text": message}}
+            response = requests.post(self.feishu_webhook, headers=headers, json=data)
+            if response.status_code == 200:
+                self.logger.info("飞书通知发送成功")
+            else:
+                self.logger.error(f"飞书通知发送失败: {response.text}")
+
+    # ---- 行情 ----
+
+    def attach_market_bus(self):
+        """映射行情进程的共享内存；行情进程未运行或已退出时回退到自己请求行情，每个周期重试"""
+        from market_bus import DEFAULT_NAME, MarketBusReader
+
+        if self.market_bus is not None:
+            if self.market_bus.alive:
+                return
+            self.logger.warning("行情总线已关闭，改为直接请求行情")
+            self.market_bus.close()
+            self.market_bus = None
+        name = self.market_bus_name if isinstance(self.market_bus_name, str) else DEFAULT_NAME
+        try:
+            self.market_bus = MarketBusReader(name)
+            self.logger.info(f"已连接行情总线 {name}")
+        except (FileNotFoundError, ValueError) as e:
+            self.logger.debug(f"行情总线 {name} 不可用: {e}")
+
+    def get_mark_price(self, instId):
+        # 优先读取行情总线，其次本周期的全市场快照，没有时才单独请求
+        if self.market_bus is not None:
+            last_price = self.market_bus.last(instId, max_age=self.monitor_interval)
+            if last_price is not None:
+                return last_price
+        if self.market_snapshot.fresh:
+            last_price = self.market_snapshot.last(instId)
+            if last_price is not None:
+                return last_price
+        response = self.market_api.get_ticker(instId)
+        if 'data' in response and len(response['data']) > 0:
+            return float(response['data'][0]['last'])
+        raise ValueError("Unexpected response structure or missing 'last' key")
+
+    def get_klines(self, instId):
+        if self.market_bus is not None:
+            klines = self.market_bus.candles(instId, max_age=self.monitor_interval)
+            if klines is not None and len(klines) >= self.candle_store.limit:
+                return klines
+        klines = self.candle_store.sync(instId)
+        if len(klines):
+            return klines
+        raise ValueError("Unexpected response structure or missing candlestick data")
+
+    # ---- 模拟盘 ----
+
+    def start_paper(self, maker_fee, account_name):
+        """用模拟账户替换 trade_api / account_api，订单回报直接交给各策略的 OMS"""
+        from paper import PaperExchange
+
+        self.paper = PaperExchange(
+            ct_val=lambda instId: float((self.instruments.get(instId) or {}).get('ctVal') or 1),
+            book=lambda instId: self.book_feed.get(instId) if self.book_feed is not None else None,
+            maker_fee=maker_fee, logger=self.logger)
+        account = self.paper.account(account_name)
+        account.on_order = self.on_order
+        account.on_fill = self.on_paper_fill
+        self.trade_api = self.account_api = account
+        # 私有 WebSocket 连接的是实盘账户，模拟盘不使用
+        self.use_websocket = False
+        self.logger.info("模拟盘模式：订单不会发送到交易所")
+
+    def on_paper_fill(self, order):
+        self.logger.info(f"[模拟盘] {order['instId']} 成交: {order['side']} {order['fillSz']} @ {order['fillPx']}, 订单状态: {order['state']}")
+        self.record_fill(order)
+
+    def start_trade_feed(self):
+        try:
+            from paper import TradeFeed
+            self.trade_feed = TradeFeed(self.paper, logger=self.logger)
+        except ImportError as e:
+            self.logger.warning(f"未订阅逐笔成交，模拟盘每个周期按最新价撮合: {e}")
+            return
+        self.trade_feed.subscribe(self.inst_ids())
+        self.trade_feed.start()
+
+    def log_paper_summary(self):
+        summary = self.paper.account(self.trade_api.name).summary()
+        self.logger.info(f"[模拟盘] 已实现盈亏: {summary['realized']:.4f}, 手续费: {summary['fee']:.4f}, "
+                         f"未实现盈亏: {summary['unrealized']:.4f}, 成交订单: {summary['fills']}, 持仓: {summary['positions']}")
+
+    # ---- 成交分析 ----
+
+    def record_fill(self, order):
+        if self.analytics is None:
+            return
+        try:
+            self.analytics.on_order_fill(order)
+        except Exception as e:
+            self.logger.error(f"记录成交失败: {e}")
+
+    def sync_fills(self):
+        """私有 WebSocket 不可用（或断开期间）、或有推送缺少 tradeId 时用 REST 补齐成交；模拟盘的成交全部来自本地撮合"""
+        if self.analytics is None or self.paper is not None:
+            return
+        try:
+            added = self.analytics.sync(self.trade_api)
+            if added:
+                self.logger.info(f"同步 {added} 笔成交")
+        except Exception as e:
+            self.logger.error(f"同步成交失败: {e}")
+
+    def log_daily_report(self):
+        """UTC 日期变化时输出前一天各交易对的成交统计"""
+        if self.analytics is None:
+            return
+        day = int(time.time() // 86400)
+        if self.report_day is None:
+            self.report_day = day
+        if day == self.report_day:
+            return
+        self.report_day = day
+        for row in self.analytics.daily_report(days=2):
+            if row['day'] != time.strftime('%Y-%m-%d', time.gmtime((day - 1) * 86400)):
+                continue
+            message = (f"日报 {row['day']} {row['instId']}: 成交 {row['fills']} 笔, 已实现盈亏 {row['realized']:.4f}, "
+                       f"手续费 {row['fees']:.4f}, 净盈亏 {row['net']:.4f}, 胜率 {row['win_rate']:.1%} ({row['closes']} 次平仓), "
+                       f"平均接针深度 {row['avg_depth_pct']:.3f}%, 平均持仓 {row['avg_holding_s']:.0f}s")
+            self.logger.info(message)
+            self.send_feishu_notification(message)
+
+    # ---- WebSocket ----
+
+    def on_fill(self, order):
+        message = f"{order['instId']} 成交: {order['side']} {order['fillSz']} @ {order['fillPx']}, 订单状态: {order['state']}"
+        self.logger.info(message)
+        self.send_feishu_notification(message)
+        self.record_fill(order)
+
+    def on_order(self, msg):
+        # 每个 OMS 只认自己生成的 clOrdId，其余推送直接忽略
+        for slot in self.slots:
+            slot.oms.on_update(msg)
+
+    def start_private_stream(self):
+        try:
+            from private_stream import PrivateStream
+        except ImportError as e:
+            self.logger.warning(f"未启用私有WebSocket，挂单查询使用REST: {e}")
+            return
+        okx_config = self.okx_config
+        self.private_stream = PrivateStream(okx_config["apiKey"], okx_config["secret"], okx_config["password"], '0',
+                                            trade_api=self.trade_api, account_api=self.account_api,
+                                            logger=self.logger, on_fill=self.on_fill,
+                                            on_order=self.on_order)
+        self.order_gateway.ws = self.private_stream.ws
+        self.private_stream.start()
+
+    def start_book_feed(self):
+        try:
+            from orderbook import BookFeed
+            self.book_feed = BookFeed(logger=self.logger)
+        except ImportError as e:
+            self.logger.warning(f"未启用本地订单簿: {e}")
+            return
+        self.book_feed.subscribe(self.inst_ids())
+        self.book_feed.start()
+
+    def log_queue_ahead(self, instId, target_price_long, target_price_short):
+        # 目标价前方的挂单量：多单看更高的买盘，空单看更低的卖盘
+        book = self.book_feed.get(instId) if self.book_feed is not None else None
+        if book is None:
+            return
+        long_ahead = book.queue_ahead('buy', target_price_long)
+        short_ahead = book.queue_ahead('sell', target_price_short)
+        self.logger.info(f"{instId} 盘口 买一: {book.best_bid()}, 卖一: {book.best_ask()}, 多单前方挂单量: {long_ahead}, 空单前方挂单量: {short_ahead}")
+
+    def start_ticker_feed(self):
+        for slot in self.slots:
+            slot.trigger = RepositionTrigger(lambda *args, slot=slot: self.reposition_orders(slot, *args),
+                                             fraction=self.reposition_fraction)
+        try:
+            self.ticker_feed = TickerFeed(self.on_tick)
+        except ImportError as e:
+            self.logger.warning(f"未启用行情驱动改单: {e}")
+            for slot in self.slots:
+                slot.trigger.shutdown(wait=False)
+                slot.trigger = None
+            return
+        self.ticker_feed.subscribe(self.inst_ids())
+        self.ticker_feed.start()
+
+    def on_tick(self, instId, price):
+        for slot in self.slots:
+            slot.trigger.on_tick(instId, price)
+
+    def reposition_orders(self, slot, instId, price, long_factor, short_factor, selected_value):
+        # 由 RepositionTrigger 在价格偏离锚定价过多时调用，按最新价改该策略的挂单；
+        # 返回是否还有挂单，由触发器以新价格为锚重新 arm（期间 execute 已用新因子 arm 过则不覆盖）
+        try:
+            quantizer = self.instruments.quantizer(instId)
+            live_orders = slot.oms.active_orders(instId)
+            for order in live_orders:
+                factor = long_factor if order.side == 'buy' else short_factor
+                if factor is None:
+                    continue
+                new_px = quantizer.price_for_side(price * factor, order.side)
+                if new_px == order.px:
+                    continue
+                result = self.order_gateway.amend_order(instId, clOrdId=order.clOrdId, newPx=new_px).result(timeout=10)
+                self.logger.info(f"[{slot.name}] {instId} 价格偏移至 {price}，{order.side} 挂单 {order.px} -> {new_px}: {result.get('code')} {result.get('msg')}")
+                if result.get('code') == '0':
+                    order.px = new_px
+                    slot.oms.record(order)
+            return bool(live_orders)
+        except Exception as e:
+            self.logger.error(f"[{slot.name}] {instId} 改单失败: {e}")
+            return False
+
+    # ---- 账户 ----
+
+    def get_live_orders(self, instId):
+        # 私有流就绪时直接读本地挂单簿，其次读本周期的账户快照，最后才单独请求
+        if self.private_stream is not None and self.private_stream.ready:
+            return self.private_stream.live_orders(instId)
+        if self.account_snapshot.fresh:
+            return self.account_snapshot.live_orders(instId)
+        return self.trade_api.get_order_list(instId=instId, state='live')['data']
+
+    def has_open_position(self, instId, pos_side):
+        if self.private_stream is not None and self.private_stream.ready:
+            return self.private_stream.position(instId, pos_side) is not None
+        if self.account_snapshot.fresh:
+            return self.account_snapshot.position(instId, pos_side) is not None
+        return False
+
+    def cancel_orders(self, slot, instId):
+        """撤销该交易对上除其他策略挂单以外的所有挂单（包括手动挂单和本策略以前运行时留下的挂单）"""
+        others = [s.oms for s in self.slots if s is not slot]
+        live = self.get_live_orders(instId)
+        orders = [{'instId': instId, 'ordId': order['ordId']} for order in live
+                  if not any(oms.owns(order.get('clOrdId', '')) for oms in others)]
+        # OMS 中仍活跃、但不在挂单列表里的订单（撤单回报丢失、下单结果未知）按 clOrdId 再撤一次，
+        # 撤不掉的查询最终状态，否则该方向无法再下新单
+        listed = {order['ordId'] for order in live}
+        stale = [order for order in slot.oms.active_orders(instId) if order.ordId not in listed]
+        orders += [{'instId': instId, 'clOrdId': order.clOrdId} for order in stale]
+        for future in self.order_gateway.cancel_batch(orders):
+            for result in future.result(timeout=10).get('data', []):
+                if result.get('sCode') == '0':
+                    slot.oms.mark_canceled(ordId=result.get('ordId', ''), clOrdId=result.get('clOrdId', ''))
+        for order in stale:
+            if order.active:
+                self.reconcile_order(slot, order)
+        if len(self.slots) == 1:
+            self.account_snapshot.forget_orders(instId)
+        self.logger.info(f"[{slot.name}] {instId}挂单取消成功.")
+
+    def reconcile_order(self, slot, order):
+        """按 clOrdId 查询订单的最终状态；交易所查不到时说明下单请求未被接受"""
+        response = self.trade_api.get_orders(order.instId, clOrdId=order.clOrdId)
+        for data in response.get('data') or []:
+            slot.oms.on_update(data)
+        if order.active and (response.get('code') != '0' or not response.get('data')):
+            slot.oms.mark_canceled(clOrdId=order.clOrdId)
+        self.logger.info(f"[{slot.name}] 对账: {order}")
+
+    def cancel_all_orders(self, owned_only=False):
+        """
+        启动/退出时批量撤销所有交易对的挂单，每次请求最多撤 20 个（不再逐个交易对撤单）
+        :param owned_only: 只撤本进程各策略生成的挂单（退出时使用，不影响同一账户下的其他进程）
+        :return: 是否全部撤销成功
+        """
+        inst_ids = set(self.inst_ids())
+        if self.private_stream is not None and self.private_stream.ready:
+            live = self.private_stream.all_live_orders()
+        else:
+            self.account_snapshot.refresh()
+            live = self.account_snapshot.orders
+        orders = [{'instId': instId, 'ordId': order['ordId']}
+                  for instId, instrument_orders in live.items() if instId in inst_ids
+                  for order in instrument_orders
+                  if not owned_only or any(slot.oms.owns(order.get('clOrdId', '')) for slot in self.slots)]
+        if not orders:
+            return True
+        canceled = 0
+        for future in self.order_gateway.cancel_batch(orders):
+            try:
+                results = future.result(timeout=10).get('data', [])
+            except Exception as e:
+                self.logger.error(f"批量撤单失败: {e}")
+                continue
+            for result in results:
+                if result.get('sCode') == '0':
+                    canceled += 1
+                    for slot in self.slots:
+                        slot.oms.mark_canceled(ordId=result.get('ordId', ''), clOrdId=result.get('clOrdId', ''))
+        for instId in inst_ids:
+            self.account_snapshot.forget_orders(instId)
+        self.logger.info(f"批量撤单: {canceled}/{len(orders)}")
+        return canceled == len(orders)
+
+    def start_deadman(self):
+        # 周期之间要睡 monitor_interval 秒，所以允许的无进展时间是 monitor_interval + cycle_timeout
+        self.deadman = DeadMansSwitch(self.trade_api, timeout=self.cancel_all_after,
+                                      stall_after=self.monitor_interval + self.cycle_timeout, tag=ORDER_TAG,
+                                      logger=self.logger)
+        self.deadman.start()
+        self.logger.info(f"已启用 cancel-all-after: {self.deadman.timeout}s，周期卡住 {self.deadman.stall_after}s 后停止刷新")
+
+    def beat(self):
+        if self.deadman is not None:
+            self.deadman.beat()
+
+    def set_leverage(self, instId, leverage, mgnMode='isolated', posSide=None):
+        cache_key = (instId, posSide)
+        if self.leverage_cache.get(cache_key) == leverage:
+            return
+        try:
+            body = {"instId": instId, "lever": str(leverage), "mgnMode": mgnMode}
+            if mgnMode == 'isolated' and posSide:
+                body["posSide"] = posSide
+            response = self.account_api.set_leverage(**body)
+            if response['code'] == '0':
+                self.leverage_cache[cache_key] = leverage
+                if self.journal is not None:
+                    self.journal.put('leverage', f"{instId}|{posSide}", leverage)
+                self.logger.info(f"Leverage set to {leverage}x for {instId} with mgnMode: {mgnMode}")
+            else:
+                self.logger.error(f"Failed to set leverage: {response['msg']}")
+        except Exception as e:
+            self.logger.error(f"Error setting leverage: {e}")
+
+    def place_order(self, slot, instId, price, amount_usdt, side):
+        if instId not in self.instruments:
+            self.logger.error(f"Instrument {instId} not found in instrument info dictionary")
+            return
+        quantizer = self.instruments.quantizer(instId)
+        # 多单价格向下取整，空单价格向上取整，保证挂单不会比目标价更靠近当前价
+        adjusted_price = quantizer.price_for_side(price, side)
+        sz, error = self.instruments.contracts(instId, amount_usdt, adjusted_price)
+        if error:
+            self.logger.info(f"{instId}转换失败: {error}")
+            self.send_feishu_notification(f"{instId}转换失败: {error}")
+            return
+        if sz is None:
+            self.logger.info(f"{instId}计算出的合约张数太小，无法下单。")
+            return
+        pos_side = 'long' if side == 'buy' else 'short'
+        self.set_leverage(instId, self.leverage_value, mgnMode='isolated', posSide=pos_side)
+        # clOrdId 由 OMS 生成，REST 请求超时后由 Client 用同一个 clOrdId 重试，不会重复下单
+        order = slot.oms.new_order(instId, side, pos_side, adjusted_price, sz)
+        if order is None:
+            return
+        order_result = slot.oms.submit(order, lambda o: self.order_gateway.place_order(
+            instId=instId, tdMode='isolated', posSide=pos_side, side=side, ordType='limit', sz=sz,
+            px=adjusted_price, clOrdId=o.clOrdId).result(timeout=10))
+        self.logger.info(f"[{slot.name}] Order placed: {order}, response: {order_result}")
+
+    # ---- 每个周期 ----
+
+    def process_instrument(self, instId):
+        """取一次行情和K线，依次交给交易该交易对的每个策略"""
+        slots = [slot for slot in self.slots if instId in slot.pairs]
+        try:
+            mark_price = self.get_mark_price(instId)
+            if self.paper is not None and self.trade_feed is None:
+                self.paper.on_price(instId, mark_price)
+            bars = Bars(self.get_klines(instId))
+        except Exception as e:
+            error_message = f'Error processing {instId}: {e}'
+            self.logger.error(error_message)
+            self.send_feishu_notification(error_message)
+            return
+        for slot in slots:
+            try:
+                pair_config = slot.pairs[instId]
+                signal = slot.strategy.evaluate(instId, pair_config, bars, mark_price)
+                if signal is not None:
+                    self.execute(slot, instId, pair_config, mark_price, signal)
+            except Exception as e:
+                error_message = f'Error processing {instId} ({slot.name}): {e}'
+                self.logger.error(error_message)
+                self.send_feishu_notification(error_message)
+
+    def execute(self, slot, instId, pair_config, mark_price, signal):
+        """按策略信号撤掉旧挂单并重新挂单"""
+        if self.analytics is not None:
+            self.analytics.expect(instId, mark_price)
+        target_price_long = mark_price * signal.long_factor
+        target_price_short = mark_price * signal.short_factor
+        self.logger.info(f"[{slot.name}] {instId} Long target price: {target_price_long:.6f}, Short target price: {target_price_short:.6f}")
+        self.log_queue_ahead(instId, target_price_long, target_price_short)
+
+        if slot.trigger is not None:
+            slot.trigger.disarm(instId)
+        self.cancel_orders(slot, instId)
+
+        allow_long, allow_short = signal.allow_long, signal.allow_short
+        # 已有同方向持仓时不再挂新单
+        skip_if_position = pair_config.get('skip_if_position', True)
+        if skip_if_position and allow_long and self.has_open_position(instId, 'long'):
+            self.logger.info(f"[{slot.name}] {instId} 已有多头持仓，跳过多单挂单")
+            allow_long = False
+        if skip_if_position and allow_short and self.has_open_position(instId, 'short'):
+            self.logger.info(f"[{slot.name}] {instId} 已有空头持仓，跳过空单挂单")
+            allow_short = False
+
+        if allow_long:
+            self.logger.info(f"[{slot.name}] {instId} 当前为多头趋势，允许挂多单")
+            self.place_order(slot, instId, target_price_long, pair_config.get('long_amount_usdt', 20), 'buy')
+        else:
+            self.logger.info(f"[{slot.name}] {instId} 当前非多头趋势，跳过多单挂单")
+        if allow_short:
+            self.logger.info(f"[{slot.name}] {instId} 当前为空头趋势，允许挂空单")
+            self.place_order(slot, instId, target_price_short, pair_config.get('short_amount_usdt', 20), 'sell')
+        else:
+            self.logger.info(f"[{slot.name}] {instId} 当前非空头趋势，跳过空单挂单")
+
+        if self.journal is not None:
+            self.journal.put('targets', f"{slot.name}|{instId}", {
+                'mark_price': mark_price, 'selected_value': signal.selected_value,
+                'long_factor': signal.long_factor if allow_long else None,
+                'short_factor': signal.short_factor if allow_short else None, 'updated': time.time()})
+
+        # 以本次挂单价格为锚，价格偏移时由行情推送触发改单
+        if slot.trigger is not None:
+            slot.trigger.arm(instId, mark_price, signal.selected_value,
+                             signal.long_factor if allow_long else None,
+                             signal.short_factor if allow_short else None,
+                             pair_config.get('reposition_fraction'))
+
+    def apply_config_change(self, change):
+        self.logger.info(f"配置文件已更新: {change}")
+        before = set(self.inst_ids())
+        for slot in self.slots:
+            added, removed, updated = diff_pairs(slot.pairs, strategy_pairs(change.config, slot.name))
+            for instId in removed:
+                try:
+                    self.cancel_orders(slot, instId)
+                except Exception as e:
+                    self.logger.error(f"[{slot.name}] {instId} 撤单失败: {e}")
+                if slot.trigger is not None:
+                    slot.trigger.disarm(instId)
+                del slot.pairs[instId]
+            slot.pairs.update(updated)
+            slot.pairs.update(added)
+        if set(change.config.get('strategies') or {}) - {slot.name for slot in self.slots}:
+            self.logger.warning("strategies 中新增的策略需要重启进程才能运行")
+
+        after = set(self.inst_ids())
+        dropped = [instId for instId in before if instId not in after]
+        new = [instId for instId in after if instId not in before]
+        for instId in dropped:
+            for key in [k for k in self.leverage_cache if k[0] == instId]:
+                del self.leverage_cache[key]
+                if self.journal is not None:
+                    self.journal.delete('leverage', f"{key[0]}|{key[1]}")
+            self.candle_store.drop(instId)
+        for feed in (self.book_feed, self.ticker_feed, self.trade_feed):
+            if feed is not None:
+                feed.unsubscribe(dropped)
+                feed.subscribe(new)
+
+        settings = change.settings
+        if 'monitor_interval' in settings:
+            self.monitor_interval = settings['monitor_interval'] or 60
+            if self.deadman is not None:
+                self.deadman.stall_after = self.monitor_interval + self.cycle_timeout
+        if 'feishu_webhook' in settings:
+            self.feishu_webhook = settings['feishu_webhook'] or ''
+        if 'leverage' in settings:
+            self.leverage_value = settings['leverage'] or 10
+            self.leverage_cache.clear()
+            if self.journal is not None:
+                for key in self.journal.get('leverage'):
+                    self.journal.delete('leverage', key)
+        if any(instId not in self.instruments for instId in new):
+            self.instruments.refresh()
+
+    def refresh_snapshots(self):
+        if self.market_bus_name:
+            self.attach_market_bus()
+        if self.market_bus is None:
+            try:
+                self.market_snapshot.max_age = self.monitor_interval
+                self.market_snapshot.refresh()
+            except Exception as e:
+                self.logger.error(f"获取全市场行情失败，本周期逐个请求: {e}")
+        if self.private_stream is None or not self.private_stream.ready:
+            try:
+                self.account_snapshot.max_age = self.monitor_interval
+                self.account_snapshot.refresh()
+            except Exception as e:
+                self.logger.error(f"获取账户挂单/持仓失败，本周期逐个请求: {e}")
+            self.sync_fills()
+        elif self.analytics is not None and self.analytics.resync_from is not None:
+            self.sync_fills()
+
+    def run_cycle(self):
+        # 周期边界应用配置变更，未变化的交易对状态全部保留
+        change = self.config_watcher.poll()
+        if change:
+            self.apply_config_change(change)
+        self.refresh_snapshots()
+        self.beat()
+        # 每完成一个交易对算一次进展，请求全部挂住时心跳随之停止
+        self.concurrency.map(self.process_instrument, self.inst_ids(), on_done=lambda _: self.beat())
+        self.log_concurrency()
+
+    def log_concurrency(self):
+        metrics = self.concurrency.metrics()
+        message = (f"并发: 上限 {metrics['limit']}, 延迟 {metrics['latency_ms']:.0f}ms (基准 {metrics['baseline_ms']:.0f}ms), "
+                   f"限速 {metrics['throttled']} 次, 增加 {metrics['increases']} 次, 减少 {metrics['decreases']} 次, "
+                   f"最近决定: {metrics['decision']} {metrics['reason']}")
+        if metrics['decreases'] != self.concurrency_decreases:
+            self.concurrency_decreases = metrics['decreases']
+            self.logger.warning(message)
+        else:
+            self.logger.info(message)
+
+    def recover(self):
+        """
+        从状态日志恢复上次运行的状态，再与交易所核对差异：
+        日志中仍在挂的订单按交易所数据更新；日志中活跃、交易所已不在挂单列表中的订单单独查询最终状态；
+        交易所上本进程不认识的挂单（手动挂单、日志未落盘的订单）批量撤销。
+        没有状态日志时退化为撤销交易对上的全部挂单。
+        """
+        state = self.journal.state if self.journal is not None else {}
+        for key, leverage in state.get('leverage', {}).items():
+            instId, posSide = key.split('|')
+            self.leverage_cache[(instId, None if posSide == 'None' else posSide)] = leverage
+        if not state.get('orders'):
+            return self.cancel_all_orders()
+        for slot in self.slots:
+            restored = slot.oms.restore(state['orders'])
+            if restored:
+                self.logger.info(f"[{slot.name}] 恢复 {len(restored)} 个活跃订单")
+
+        inst_ids = set(self.inst_ids())
+        self.account_snapshot.refresh()
+        live = {order['ordId'] for orders in self.account_snapshot.orders.values() for order in orders}
+        unknown = []
+        for instId, orders in self.account_snapshot.orders.items():
+            if instId not in inst_ids:
+                continue
+            for order in orders:
+                if any(slot.oms.on_update(order) is not None for slot in self.slots):
+                    continue
+                unknown.append({'instId': instId, 'ordId': order['ordId']})
+        for slot in self.slots:
+            for order in slot.oms.active_orders():
+                if order.ordId in live:
+                    continue
+                self.reconcile_order(slot, order)
+        if unknown:
+            for future in self.order_gateway.cancel_batch(unknown):
+                future.result(timeout=10)
+            self.logger.info(f"撤销 {len(unknown)} 个日志中没有的挂单")
+        return True
+
+    def restore_triggers(self):
+        targets = self.journal.get('targets') if self.journal is not None else {}
+        for slot in self.slots:
+            if slot.trigger is None:
+                continue
+            for instId, pair_config in slot.pairs.items():
+                target = targets.get(f"{slot.name}|{instId}")
+                if target and slot.oms.active_orders(instId):
+                    slot.trigger.arm(instId, target['mark_price'], target['selected_value'], target['long_factor'],
+                                     target['short_factor'], pair_config.get('reposition_fraction'))
+
+    def start(self):
+        if self.journal is not None:
+            self.journal.load()
+        if not self.instruments.restore(INSTRUMENTS_MAX_AGE):
+            self.instruments.refresh()
+        # 先恢复状态并清掉上次运行（可能是崩溃）留下的未知挂单，再启用死人开关
+        try:
+            self.recover()
+        except Exception as e:
+            self.logger.error(f"启动对账失败: {e}")
+        if self.journal is not None:
+            self.journal.start()
+        if self.analytics is not None:
+            self.analytics.load()
+            self.sync_fills()
+        if self.cancel_all_after:
+            self.start_deadman()
+        if self.use_websocket:
+            self.start_private_stream()
+        if self.use_orderbook:
+            self.start_book_feed()
+        if self.paper is not None:
+            self.start_trade_feed()
+        if self.reactive_reposition:
+            self.start_ticker_feed()
+            self.restore_triggers()
+        self.logger.info(f"运行策略: {[slot.name for slot in self.slots]}, 交易对: {self.inst_ids()}")
+
+    def run(self, started=None):
+        """
+        :param started: 进程开始导入的时间（time.perf_counter()），用于统计启动耗时，默认为导入本模块的时间
+        """
+        started = startup_begin if started is None else started
+        self.start()
+        now = time.perf_counter()
+        self.logger.info(f"启动耗时: 导入 {imports_done - started:.3f}s, 初始化 {now - imports_done:.3f}s, 到首个周期共 {now - started:.3f}s")
+        # 让 SIGTERM 与 Ctrl+C 一样经过 finally 撤单退出
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, _exit_on_sigterm)
+        try:
+            while True:
+                self.beat()
+                self.run_cycle()
+                self.beat()
+                if self.paper is not None:
+                    self.log_paper_summary()
+                self.log_daily_report()
+                time.sleep(self.monitor_interval)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """正常退出（Ctrl+C / SIGTERM）时撤掉本进程的挂单；撤单没有全部成功时保留交易所倒计时兜底"""
+        if self.deadman is not None:
+            self.deadman.stop(disarm=False)
+        # 先停掉行情驱动的改单，等进行中的改单结束，撤单之后不会再有改单请求
+        if self.ticker_feed is not None:
+            self.ticker_feed.stop()
+        for slot in self.slots:
+            if slot.trigger is not None:
+                slot.trigger.shutdown()
+        try:
+            canceled = self.cancel_all_orders(owned_only=True)
+        except Exception as e:
+            self.logger.error(f"退出时批量撤单失败: {e}")
+            canceled = False
+        if self.deadman is not None and canceled:
+            self.deadman.stop(disarm=True)
+        for feed in (self.book_feed, self.trade_feed, self.private_stream):
+            if feed is not None:
+                feed.stop()
+        if self.journal is not None:
+            self.journal.close()
+        if self.analytics is not None:
+            self.analytics.close()
+        self.concurrency.close()
+        if self.tape is not None:
+            self.tape.close()
+        self.logger.info("已退出")
+
+
+def _exit_on_sigterm(signum, frame):
+    raise SystemExit(0)
+
+
+if __name__ == '__main__':
+    StrategyEngine(sys.argv[1:] or None).run()
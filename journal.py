@@ -0,0 +1,155 @@
+"""
+崩溃安全的状态日志
+
+运行时状态（合约信息、OMS 订单、杠杆缓存、每个交易对的挂单目标）以键值记录的形式追加写入
+<path>.journal，每行一条 JSON：{"k": 类别, "id": 键, "v": 值}，值为 null 表示删除。
+写入只进内存缓冲区，后台线程每 flush_interval 秒把缓冲区写入文件并 fsync 一次（批量落盘），
+追加记录数超过 compact_every 时把当前状态整体写成 <path>.snapshot（先写临时文件、fsync、再原子替换），
+然后清空日志。
+
+重启时 load() 读取快照并重放日志即可恢复状态，不需要请求交易所；进程在写入中途崩溃留下的
+残缺末行直接丢弃。最后 flush_interval 秒内的记录可能丢失，因此恢复后仍要与交易所对账
+（engine.StrategyEngine.recover），只是对账的范围只剩日志与交易所之间的差异。
+"""
+import json
+import os
+import threading
+import time
+
+
+class Journal(object):
+
+    def __init__(self, path, flush_interval=0.2, compact_every=5000, logger=None):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.snapshot_path = path + '.snapshot'
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.logger = logger
+        self.state = {}  # 类别 -> {键: 值}
+        self.records = 0  # 上次压缩以来追加的记录数
+        self.fsyncs = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ---- 恢复 ----
+
+    def load(self):
+        """读取快照并重放日志，返回恢复出的状态；随后压缩一次，让日志从空文件开始"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        state = {}
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            # 快照是原子替换的，正常情况下不会损坏
+            if self.logger:
+                self.logger.error(f"状态快照 {self.snapshot_path} 无法解析，忽略: {e}")
+        replayed = 0
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 崩溃时写了一半的末行
+                        break
+                    _apply(state, record['k'], record['id'], record['v'])
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            self.state = state
+            self._compact()
+        if self.logger and (state or replayed):
+            counts = {kind: len(values) for kind, values in state.items()}
+            self.logger.info(f"已从状态日志恢复: {counts}，重放 {replayed} 条记录")
+        return state
+
+    def get(self, kind, key=None, default=None):
+        values = self.state.get(kind, {})
+        if key is None:
+            return dict(values)
+        return values.get(key, default)
+
+    # ---- 写入 ----
+
+    def put(self, kind, key, value):
+        """记录一个键值；value 为 None 表示删除"""
+        line = json.dumps({'k': kind, 'id': key, 'v': value}, separators=(',', ':'), ensure_ascii=False)
+        with self._lock:
+            _apply(self.state, kind, key, value)
+            self._buffer.append(line)
+            self.records += 1
+
+    def delete(self, kind, key):
+        self.put(kind, key, None)
+
+    def start(self):
+        if self._file is None:
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='journal', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"状态日志写入失败: {e}")
+
+    def sync(self):
+        """把缓冲区写入文件并 fsync；记录数达到 compact_every 时压缩"""
+        with self._lock:
+            self._write()
+            if self.records >= self.compact_every:
+                self._compact()
+
+    def _write(self):
+        if not self._buffer or self._file is None:
+            return
+        self._file.write('\n'.join(self._buffer) + '\n')
+        self._buffer = []
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    def _compact(self):
+        """调用方持有 _lock；当前状态已包含缓冲区中的记录，直接写快照后清空日志"""
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, separators=(',', ':'), ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.journal_path, 'w', encoding='utf-8')
+        self._buffer = []
+        self.records = 0
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._lock:
+            self._compact()
+            self._file.close()
+            self._file = None
+
+
+def _apply(state, kind, key, value):
+    if value is None:
+        state.get(kind, {}).pop(key, None)
+    else:
+        state.setdefault(kind, {})[key] = value
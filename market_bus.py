@@ -0,0 +1,320 @@
+"""
+共享内存行情总线
+
+一个行情进程（python market_bus.py [config.json ...]）定时拉取全市场 tickers 和配置中各交易对的1分钟K线，
+写入 multiprocessing.shared_memory；任意数量的策略进程（config.json 中设置 "market_bus"）直接映射同一块内存读取，
+不再各自请求 OKX。
+
+内存布局（所有偏移由 capacity / ring 决定，读端从头部读出后自行计算）：
+    header   int64[8]              magic, 布局版本, capacity, ring, 合约数量, tickers 序号, tickers 更新时间(ns), 保留
+    names    S32[capacity]         合约ID，按写入顺序分配槽位，只追加不删除
+    seq      int64[capacity]       每个槽位K线的 seqlock 序号
+    meta     int64[capacity, 4]    head（最新一根所在行）, count, 最新K线 ts, 更新时间(ns)
+    tickers  float64[capacity, F]  market_snapshot.FIELDS 各列，F = len(FIELDS)
+    candles  float64[capacity, ring, 9]  K线环形缓冲区，列见 okx.candles
+
+只有一个写进程。seqlock：写之前把序号加一（奇数表示正在写），写完再加一；读端在序号为偶数且读前读后
+一致时才接受读到的数据，否则重试。读端每次只复制一个槽位（241根K线约 17KB），不经过任何序列化。
+numpy 的写入是普通内存拷贝，依赖 x86 的存储顺序保证；其他架构上读端偶尔可能多重试一次。
+"""
+import json
+import logging
+import sys
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from candle_store import CandleStore
+from market_snapshot import FIELDS
+from okx.candles import TS
+
+MAGIC = 0x4f4b584d44425553  # 'OKXMDBUS'
+LAYOUT_VERSION = 1
+HEADER_SIZE = 8
+NAME_SIZE = 32
+CANDLE_COLUMNS = 9
+DEFAULT_NAME = 'okx_market_bus'
+
+# header 下标
+H_MAGIC, H_VERSION, H_CAPACITY, H_RING, H_COUNT, H_TICKER_SEQ, H_TICKER_NS = range(7)
+# meta 列
+M_HEAD, M_COUNT, M_NEWEST_TS, M_UPDATED_NS = range(4)
+
+
+def _layout(capacity, ring):
+    """返回各区域的 (偏移, dtype, 形状) 以及总字节数"""
+    regions = {}
+    offset = 0
+    for name, dtype, shape in (
+            ('header', np.int64, (HEADER_SIZE,)),
+            ('names', 'S%d' % NAME_SIZE, (capacity,)),
+            ('seq', np.int64, (capacity,)),
+            ('meta', np.int64, (capacity, 4)),
+            ('tickers', np.float64, (capacity, len(FIELDS))),
+            ('candles', np.float64, (capacity, ring, CANDLE_COLUMNS))):
+        offset = (offset + 7) // 8 * 8
+        regions[name] = (offset, dtype, shape)
+        offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+    return regions, offset
+
+
+def _views(buf, capacity, ring):
+    regions, _ = _layout(capacity, ring)
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buf, offset=offset)
+            for name, (offset, dtype, shape) in regions.items()}
+
+
+class MarketBusWriter(object):
+    """行情进程持有，创建并独占写入共享内存"""
+
+    def __init__(self, name=DEFAULT_NAME, capacity=512, ring=241):
+        _, size = _layout(capacity, ring)
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # 上次行情进程异常退出留下的旧内存，清理后重新创建
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.capacity = capacity
+        self.ring = ring
+        views = _views(self.shm.buf, capacity, ring)
+        self.header, self.names, self.seq = views['header'], views['names'], views['seq']
+        self.meta, self.ticker_rows, self.candle_rows = views['meta'], views['tickers'], views['candles']
+        self.header[:] = 0
+        self.seq[:] = 0
+        self.meta[:] = 0
+        self.ticker_rows[:] = np.nan
+        self.slots = {}
+        self.header[H_CAPACITY] = capacity
+        self.header[H_RING] = ring
+        self.header[H_VERSION] = LAYOUT_VERSION
+        # magic 最后写入，读端看到 magic 时其余头部字段已经就绪
+        self.header[H_MAGIC] = MAGIC
+
+    def slot(self, instId):
+        """返回合约的槽位，没有时分配新槽位；槽位用完时返回 None"""
+        slot = self.slots.get(instId)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= self.capacity:
+                return None
+            self.names[slot] = instId.encode()
+            self.slots[instId] = slot
+            # 名字写完后再增加数量，读端只会看到完整的名字
+            self.header[H_COUNT] = slot + 1
+        return slot
+
+    def publish_tickers(self, snapshot):
+        """写入 MarketSnapshot 中的全部合约行情"""
+        with snapshot._lock:
+            index, values = snapshot.index, snapshot.values
+        rows, slots = [], []
+        for instId, row in index.items():
+            slot = self.slot(instId)
+            if slot is not None:
+                rows.append(row)
+                slots.append(slot)
+        header = self.header
+        header[H_TICKER_SEQ] += 1
+        self.ticker_rows[slots] = values[rows]
+        header[H_TICKER_NS] = time.time_ns()
+        header[H_TICKER_SEQ] += 1
+        return len(slots)
+
+    def publish_candles(self, instId, klines):
+        """
+        把 CandleStore 返回的K线（新的在前）写入环形缓冲区，只写入比缓冲区最新一根更新（含形成中的那根）的部分
+        :return: 写入的行数
+        """
+        slot = self.slot(instId)
+        if slot is None or not len(klines):
+            return 0
+        meta = self.meta[slot]
+        ring = self.ring
+        head, count, newest_ts = int(meta[M_HEAD]), int(meta[M_COUNT]), int(meta[M_NEWEST_TS])
+        if count:
+            fresh = klines[klines[:, TS] >= newest_ts]
+            if not len(fresh):
+                return 0
+        if not count or len(fresh) >= ring or int(fresh[-1, TS]) != newest_ts:
+            # 首次写入或与缓冲区接不上，整体重写
+            rows = klines[:ring][::-1]
+            head, count = -1, 0
+        else:
+            rows = fresh[::-1]  # 旧的在前，依次写入
+        seq = self.seq
+        seq[slot] += 1
+        buf = self.candle_rows[slot]
+        for row in rows:
+            if count and int(row[TS]) == newest_ts:
+                buf[head] = row  # 形成中的K线，原地更新
+            else:
+                head = (head + 1) % ring
+                buf[head] = row
+                count = min(count + 1, ring)
+            newest_ts = int(row[TS])
+        meta[M_HEAD], meta[M_COUNT], meta[M_NEWEST_TS], meta[M_UPDATED_NS] = head, count, newest_ts, time.time_ns()
+        seq[slot] += 1
+        return len(rows)
+
+    def close(self):
+        self.header[H_MAGIC] = 0
+        self.shm.close()
+        self.shm.unlink()
+
+
+class MarketBusReader(object):
+    """策略进程持有，只读映射；行情进程没有运行时构造会抛出 FileNotFoundError"""
+
+    def __init__(self, name=DEFAULT_NAME, max_retries=1000):
+        self.shm = _attach(name)
+        header = np.ndarray((HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        if header[H_MAGIC] != MAGIC or header[H_VERSION] != LAYOUT_VERSION:
+            self.shm.close()
+            raise ValueError(f"shared memory {name} is not a market bus (or layout version mismatch)")
+        self.capacity, self.ring = int(header[H_CAPACITY]), int(header[H_RING])
+        views = _views(self.shm.buf, self.capacity, self.ring)
+        self.header, self.names, self.seq = views['header'], views['names'], views['seq']
+        self.meta, self.ticker_rows, self.candle_rows = views['meta'], views['tickers'], views['candles']
+        self.max_retries = max_retries
+        self.slots = {}
+        self.retries = 0
+
+    @property
+    def alive(self):
+        return self.header[H_MAGIC] == MAGIC
+
+    def slot(self, instId):
+        slot = self.slots.get(instId)
+        if slot is None:
+            count = int(self.header[H_COUNT])
+            if len(self.slots) < count:
+                self.slots = {self.names[i].decode(): i for i in range(count)}
+                slot = self.slots.get(instId)
+        return slot
+
+    def ticker(self, instId):
+        """返回 (行情行 float64[F], 更新时间 秒)，没有该合约时返回 None"""
+        slot = self.slot(instId)
+        if slot is None:
+            return None
+        header = self.header
+        for _ in range(self.max_retries):
+            before = int(header[H_TICKER_SEQ])
+            if before & 1 == 0:
+                row = self.ticker_rows[slot].copy()
+                updated = int(header[H_TICKER_NS])
+                if int(header[H_TICKER_SEQ]) == before:
+                    return row, updated / 1e9
+            self.retries += 1
+            time.sleep(0)
+        raise TimeoutError(f"market bus tickers kept changing while reading {instId}")
+
+    def last(self, instId, max_age=None):
+        """最新价；没有数据或超过 max_age 秒未更新时返回 None"""
+        result = self.ticker(instId)
+        if result is None:
+            return None
+        row, updated = result
+        if max_age is not None and time.time() - updated > max_age:
+            return None
+        value = row[FIELDS.index('last')]
+        return None if np.isnan(value) else float(value)
+
+    def candles(self, instId, max_age=None):
+        """返回该合约缓冲区中的全部K线（新的在前，与 CandleStore.sync 相同），没有数据或过期时返回 None"""
+        slot = self.slot(instId)
+        if slot is None:
+            return None
+        seq, meta = self.seq, self.meta[slot]
+        ring = self.ring
+        for _ in range(self.max_retries):
+            before = int(seq[slot])
+            if before & 1 == 0:
+                head, count, updated = int(meta[M_HEAD]), int(meta[M_COUNT]), int(meta[M_UPDATED_NS])
+                rows = self.candle_rows[slot][(head - np.arange(count)) % ring]
+                if int(seq[slot]) == before:
+                    if not count or max_age is not None and time.time() - updated / 1e9 > max_age:
+                        return None
+                    return rows
+            self.retries += 1
+            time.sleep(0)
+        raise TimeoutError(f"market bus candles kept changing while reading {instId}")
+
+    def close(self):
+        self.shm.close()
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: 读端不登记到 resource_tracker，退出时不会删除行情进程的共享内存
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+def run_feed(config_paths, name=None, interval=None):
+    """行情进程主循环：每 interval 秒刷新一次全市场 tickers，并同步所有配置文件中交易对的K线"""
+    import okx
+    from config_watcher import strategy_pairs
+    from market_snapshot import MarketSnapshot
+
+    logger = logging.getLogger('market_bus')
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    logger.addHandler(handler)
+
+    def load_inst_ids():
+        inst_ids = {}
+        for path in config_paths:
+            with open(path, 'r') as f:
+                config = json.load(f)
+            for section in [None] + list(config.get('strategies') or {}):
+                pairs = config.get('tradingPairs', {}) if section is None else strategy_pairs(config, section)
+                for instId in pairs:
+                    inst_ids.setdefault(instId, None)
+        return config, list(inst_ids)
+
+    config, inst_ids = load_inst_ids()
+    okx_config = config['okx']
+    name = name or config.get('market_bus') or DEFAULT_NAME
+    interval = interval or config.get('market_bus_interval', 5)
+    market_api = okx.MarketAPI(okx_config["apiKey"], okx_config["secret"], okx_config["password"], True, '0')
+    snapshot = MarketSnapshot(market_api, instType='SWAP')
+    candle_store = CandleStore(market_api, bar='1m', limit=241, logger=logger)
+    writer = MarketBusWriter(name, ring=candle_store.limit)
+    logger.info(f"行情总线 {name} 已创建，K线交易对: {inst_ids}，刷新间隔 {interval}s")
+    try:
+        while True:
+            started = time.monotonic()
+            try:
+                snapshot.refresh()
+                writer.publish_tickers(snapshot)
+            except Exception as e:
+                logger.error(f"刷新全市场行情失败: {e}")
+            for instId in inst_ids:
+                try:
+                    writer.publish_candles(instId, candle_store.sync(instId))
+                except Exception as e:
+                    logger.error(f"{instId} 同步K线失败: {e}")
+            try:
+                _, inst_ids = load_inst_ids()
+            except (OSError, ValueError) as e:
+                logger.error(f"读取配置失败，继续使用原交易对: {e}")
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        writer.close()
+
+
+if __name__ == '__main__':
+    run_feed(sys.argv[1:] or ['config.json'])
@@ -0,0 +1,82 @@
+"""
+全市场行情快照
+
+每个循环周期只调用一次 get_tickers(instType='SWAP')，把所有永续合约的行情解析成一个
+float64 数组（每行一个合约，列见 FIELDS），按 instId -> 行号 建索引，供该周期内所有
+process_pair 读取。100个交易对时每周期少 99 次 get_ticker 请求。
+"""
+import threading
+import time
+
+import numpy as np
+
+FIELDS = ('last', 'bidPx', 'askPx', 'open24h', 'high24h', 'low24h', 'vol24h', 'volCcy24h')
+COLUMN = {name: i for i, name in enumerate(FIELDS)}
+
+
+class MarketSnapshot(object):
+
+    def __init__(self, market_api, instType='SWAP', max_age=None):
+        self.market_api = market_api
+        self.instType = instType
+        self.max_age = max_age  # 快照最长有效期（秒），None 表示只要刷新过就可用
+        self.index = {}  # instId -> 行号
+        self.values = np.empty((0, len(FIELDS)), dtype=np.float64)
+        self.ts = np.empty(0, dtype=np.int64)  # 每个合约行情的交易所时间戳
+        self.updated = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """拉取一次全市场行情并重建数组，返回合约数量"""
+        response = self.market_api.get_tickers(instType=self.instType)
+        data = response.get('data') or []
+        if not data:
+            raise ValueError("Unexpected response structure or missing ticker data")
+        values = np.array([[t.get(f) or 'nan' for f in FIELDS] for t in data], dtype=np.float64)
+        ts = np.array([t.get('ts') or 0 for t in data], dtype=np.int64)
+        index = self.index
+        if len(index) != len(data) or any(index.get(t['instId']) != i for i, t in enumerate(data)):
+            index = {t['instId']: i for i, t in enumerate(data)}
+        with self._lock:
+            self.values, self.ts, self.index = values, ts, index
+            self.updated = time.time()
+        return len(data)
+
+    @property
+    def fresh(self):
+        if not self.updated:
+            return False
+        return self.max_age is None or time.time() - self.updated <= self.max_age
+
+    def get(self, instId, field='last'):
+        """返回某个合约的某个字段，快照中没有该合约时返回 None"""
+        with self._lock:
+            row = self.index.get(instId)
+            if row is None:
+                return None
+            value = self.values[row, COLUMN[field]]
+        return None if np.isnan(value) else float(value)
+
+    def row(self, instId):
+        with self._lock:
+            row = self.index.get(instId)
+            if row is None:
+                return None
+            values = self.values[row]
+        return dict(zip(FIELDS, values.tolist()))
+
+    def last(self, instId):
+        return self.get(instId, 'last')
+
+    def bid(self, instId):
+        return self.get(instId, 'bidPx')
+
+    def ask(self, instId):
+        return self.get(instId, 'askPx')
+
+    def change_24h(self, instId):
+        """24小时涨跌幅"""
+        last, open24h = self.get(instId, 'last'), self.get(instId, 'open24h')
+        if last is None or not open24h:
+            return None
+        return last / open24h - 1
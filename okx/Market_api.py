@@ -35,6 +35,15 @@ class MarketAPI(Client):
         params = {'instId': instId, 'after': after, 'before': before, 'bar': bar, 'limit': limit}
         return self._request_with_params(GET, MARKET_CANDLES, params)
 
+    # Get Candlesticks as a float64 array (rows newest first, columns see okx.candles)
+    def get_candles_array(self, instId, after='', before='', bar='', limit='', endpoint=MARKET_CANDLES):
+        from .candles import CANDLE_ENDPOINTS, decode_candles  # numpy is only loaded when arrays are requested
+
+        if endpoint not in CANDLE_ENDPOINTS:
+            raise ValueError('not a candle endpoint: %s' % endpoint)
+        params = {'instId': instId, 'after': after, 'before': before, 'bar': bar, 'limit': limit}
+        return self._request_with_params(GET, endpoint, params, decode=decode_candles)
+
     # GGet Candlesticks History（top currencies only）
     def get_history_candlesticks(self, instId, after='', before='', bar='', limit=''):
         params = {'instId': instId, 'after': after, 'before': before, 'bar': bar, 'limit': limit}
@@ -2,4 +2,44 @@
 
 .. moduleauthor:: Sam McHardy
 
+API classes are importable from the package (``okx.TradeAPI``) and their module is only
+loaded on first access, so a script pays for the clients it actually uses.
 """
+import importlib
+
+_LAZY = {
+    'AccountAPI': 'Account_api',
+    'AffiliateAPI': 'Affiliate_api',
+    'BrokerAPI': 'Broker_api',
+    'ConvertAPI': 'Convert_api',
+    'CopytradingAPI': 'Copytrading_api',
+    'FDBrokerAPI': 'FDBroker_api',
+    'FinanceAPI': 'Finance_api',
+    'FundingAPI': 'Funding_api',
+    'MarketAPI': 'Market_api',
+    'PublicAPI': 'Public_api',
+    'RecurringAPI': 'Recurring_api',
+    'RfqAPI': 'Rfq_api',
+    'SprdAPI': 'SprdApi_api',
+    'StatusAPI': 'status_api',
+    'SubAccountAPI': 'subAccount_api',
+    'TradeAPI': 'Trade_api',
+    'TradingBotAPI': 'TradingBot_api',
+    'TradingDataAPI': 'TradingData_api',
+    'WsClient': 'ws_client',
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
@@ -0,0 +1,79 @@
+"""Decode candle responses straight into a float64 array.
+
+Candle endpoints return ``data`` as a list of string lists, e.g.
+``[["1697026383085","3.721","3.743","3.677","3.708","8422410","22698348.04","12698348.04","1"], ...]``.
+Going through ``response.json()`` builds one Python str per field and every caller then
+converts them with ``float()`` again. ``decode_candles`` instead cuts the ``data`` section
+out of the raw body, strips the brackets and quotes and parses all numbers in a single
+``np.fromstring`` call. Rows stay in exchange order (newest first); the millisecond
+timestamp is exact in float64.
+"""
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # optional, only used for the envelope and the fallback path
+    orjson = None
+
+from . import consts as c
+
+# column indexes of market / history candles
+TS, OPEN, HIGH, LOW, CLOSE, VOL, VOL_CCY, VOL_CCY_QUOTE, CONFIRM = range(9)
+# mark-price / index candles only carry ts, o, h, l, c, confirm
+INDEX_CONFIRM = 5
+
+CANDLE_ENDPOINTS = (
+    c.MARKET_CANDLES,
+    c.HISTORY_CANDLES,
+    c.INDEX_CANSLES,
+    c.MARKPRICE_CANDLES,
+    c.HISTORY_INDEX_CANDLES,
+    c.HISTORY_MARK_PRICE_CANDLES,
+)
+
+_DATA_KEY = b'"data":'
+_STRIP = b'[]" \n\r\t'
+
+
+def loads(body):
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+def _to_array(rows):
+    if not rows:
+        return np.empty((0, 0), dtype=np.float64)
+    return np.array([[field or 'nan' for field in row] for row in rows], dtype=np.float64)
+
+
+def _decode_fallback(body):
+    response = loads(body)
+    response['data'] = _to_array(response.get('data') or [])
+    return response
+
+
+def decode_candles(body):
+    """
+    :param body: raw response bytes of a candle endpoint
+    :return: the usual ``{'code', 'msg', 'data'}`` dict with ``data`` as an (n, columns) float64 array
+    """
+    key = body.find(_DATA_KEY)
+    start = body.find(b'[', key) if key >= 0 else -1
+    end = body.rfind(b']]')
+    if start < 0 or end < start:
+        # empty data or an unexpected layout
+        return _decode_fallback(body)
+    end += 2
+    section = body[start:end]
+    columns = section.count(b',', 0, section.find(b']')) + 1
+    try:
+        values = np.fromstring(section.translate(None, _STRIP).decode('ascii'), dtype=np.float64, sep=',')
+    except ValueError:
+        return _decode_fallback(body)
+    if values.size % columns or values.size // columns != section.count(b']') - 1:
+        # empty fields or nested values the fast path cannot represent
+        return _decode_fallback(body)
+    response = loads(body[:start] + b'[]' + body[end:])
+    response['data'] = values.reshape(-1, columns)
+    return response
@@ -1,61 +1,117 @@
 import requests
 import json
+import time
 from . import consts as c, utils, exceptions
+from .clock import server_clock
+from .ratelimit import RATE_LIMIT_CODES, rate_limiter
+from .retry import RETRYABLE_STATUS, default_policy
 
 
 class Client(object):
 
-    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, flag='1'):
+    # okx.tape.install() sets this to record or replay every client's traffic
+    transport = None
+
+    def __init__(self, api_key, api_secret_key, passphrase, use_server_time=False, flag='1', policy=None, limiter=None):
 
         self.API_KEY = api_key
         self.API_SECRET_KEY = api_secret_key
         self.PASSPHRASE = passphrase
         self.use_server_time = use_server_time
         self.flag = flag
-
-    def _request(self, method, request_path, params):
-
+        self.policy = policy or default_policy
+        # shared by every client in the process unless a separate limiter is passed
+        self.limiter = limiter or rate_limiter
+        self._signer = utils.Signer(api_secret_key)
+        self._header = utils.HeaderTemplate(api_key, passphrase, flag)
+        if use_server_time:
+            # offset is estimated in the background and applied by utils.get_timestamp
+            server_clock.start()
+
+    def _request(self, method, request_path, params, decode=None):
+
+        endpoint = request_path
         if method == c.GET:
             request_path = request_path + utils.parse_params_to_str(params)
         # url
         url = c.API_URL + request_path
 
-        timestamp = utils.get_timestamp()
-
-        # sign & header
-        if self.use_server_time:
-            timestamp = self._get_timestamp()
-
         body = json.dumps(params) if method == c.POST else ""
 
-        sign = utils.sign(utils.pre_hash(timestamp, method, request_path, str(body)), self.API_SECRET_KEY)
-        header = utils.get_header(self.API_KEY, sign, timestamp, self.PASSPHRASE, self.flag)
-
-        # send request
-        response = None
-
-        # print("url:", url)
-        # print("headers:", header)
-        # print("body:", body)
+        policy = self.policy
+        breaker = policy.breaker(endpoint)
+        timeout = policy.timeout(endpoint)
+        attempts = policy.attempts(method, params)
+        started = time.monotonic()
+
+        for attempt in range(attempts):
+            breaker.before_request()
+            last_attempt = attempt == attempts - 1
+            # every path below reports to the breaker, otherwise a half-open trial never ends
+            try:
+                self.limiter.acquire(endpoint)
+
+                # sign & header
+                timestamp = utils.get_timestamp()
+                sign = self._signer.sign(timestamp + method + request_path + body)
+                header = self._header.build(sign, timestamp)
+
+                # send request
+                response = self._send(method, url, body, header, timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                breaker.record_failure()
+                if last_attempt or not self._may_retry(policy, attempt, started):
+                    raise
+                continue
+            except BaseException:
+                breaker.record_failure()
+                raise
+
+            # 2xx and 4xx other than 429 mean the server is up and answering
+            if response.status_code in RETRYABLE_STATUS:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+
+            # exception handle
+            if str(response.status_code).startswith('2'):
+                # decode(bytes) lets endpoints such as candles skip the generic json -> str lists step
+                if decode is not None:
+                    return decode(response.content)
+                result = response.json()
+                if isinstance(result, dict) and result.get('code') in RATE_LIMIT_CODES:
+                    self.limiter.penalize(endpoint)
+                return result
+
+            if response.status_code == 429:
+                self.limiter.penalize(endpoint)
+            if response.status_code in RETRYABLE_STATUS:
+                if not last_attempt and self._may_retry(policy, attempt, started):
+                    continue
+            raise exceptions.OkxAPIException(response)
 
+    def _send(self, method, url, body, header, timeout):
+        if self.transport is not None:
+            return self.transport.send(method, url, body, header, timeout)
         if method == c.GET:
-            response = requests.get(url, headers=header)
+            return requests.get(url, headers=header, timeout=timeout)
         elif method == c.POST:
-            response = requests.post(url, data=body, headers=header)
-
-        # exception handle
-        # print(response.headers)
-
-        if not str(response.status_code).startswith('2'):
-            raise exceptions.OkxAPIException(response)
+            return requests.post(url, data=body, headers=header, timeout=timeout)
 
-        return response.json()
+    @staticmethod
+    def _may_retry(policy, attempt, started):
+        # sleep before the next attempt unless that would exceed the per-call budget
+        delay = policy.backoff(attempt)
+        if time.monotonic() - started + delay > policy.max_elapsed:
+            return False
+        time.sleep(delay)
+        return True
 
     def _request_without_params(self, method, request_path):
         return self._request(method, request_path, {})
 
-    def _request_with_params(self, method, request_path, params):
-        return self._request(method, request_path, params)
+    def _request_with_params(self, method, request_path, params, decode=None):
+        return self._request(method, request_path, params, decode)
 
     def _get_timestamp(self):
         url = c.API_URL + c.SERVER_TIMESTAMP_URL
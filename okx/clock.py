@@ -0,0 +1,78 @@
+import threading
+import time
+
+import requests
+
+from . import consts as c, utils
+
+
+class ServerClock(object):
+    """
+    Estimates the offset between the local clock and OKX server time.
+
+    Each sync takes several samples of /api/v5/public/time; per sample the offset is
+    server_ts - (t_send + t_recv) / 2, and like NTP the sample with the smallest round
+    trip is kept since its midpoint assumption carries the least error (at most rtt / 2).
+    The result is pushed into utils so request signing never waits on the network.
+    """
+
+    def __init__(self, samples=5, refresh_interval=300.0, timeout=(3.05, 5.0)):
+        self.samples = samples
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self.offset_ms = 0.0
+        self.rtt_ms = None
+        self.last_sync = 0.0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def sample(self):
+        t0 = time.time()
+        response = requests.get(c.API_URL + c.SERVER_TIMESTAMP_URL, timeout=self.timeout)
+        t1 = time.time()
+        server_ms = int(response.json()['data'][0]['ts'])
+        return server_ms - (t0 + t1) * 500.0, (t1 - t0) * 1000.0
+
+    def sync(self):
+        best = None
+        for _ in range(self.samples):
+            try:
+                offset, rtt = self.sample()
+            except Exception:
+                continue
+            if best is None or rtt < best[1]:
+                best = (offset, rtt)
+        if best is None:
+            return False
+        self.offset_ms, self.rtt_ms = best
+        self.last_sync = time.time()
+        utils.set_clock_offset(self.offset_ms)
+        return True
+
+    def start(self, wait=False):
+        """
+        Keep the offset refreshed in a daemon thread. The first sync also runs there unless
+        wait is set, so creating clients does not block on several round trips; until it
+        lands timestamps use the local clock.
+        """
+        with self._lock:
+            # a clock stopped before it started (e.g. while replaying a tape) stays stopped
+            if self._thread is not None or self._stop.is_set():
+                return
+            if wait:
+                self.sync()
+            self._thread = threading.Thread(target=self._run, name='okx-server-clock', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        if not self.last_sync:
+            self.sync()
+        while not self._stop.wait(self.refresh_interval if self.last_sync else 5.0):
+            self.sync()
+
+
+server_clock = ServerClock()
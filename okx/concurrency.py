@@ -0,0 +1,157 @@
+"""Adaptive limit on concurrent REST work.
+
+AimdController runs tasks (each one or more REST calls) with at most `limit` of them in
+flight and moves the limit the way TCP moves its congestion window:
+
+- additive increase: after a window of `limit` completions during which callers had to
+  queue for a slot, the limit grows by one;
+- multiplicative decrease: a rate limit answer (HTTP 429 / 50011, counted by the shared
+  RateLimiter) or a smoothed latency above `tolerance` times the baseline cuts it by
+  `backoff`, at most once per window.
+
+The baseline is the lowest recent task latency, allowed to drift up slowly so a lasting
+change in network conditions does not pin the limit down forever. Every decision is
+counted and available from `metrics()`.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .ratelimit import rate_limiter
+
+
+class AimdController(object):
+
+    def __init__(self, initial=5, minimum=1, maximum=32, backoff=0.5, tolerance=2.0, smoothing=0.2,
+                 drift=0.01, limiter=None):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.drift = drift
+        self.limiter = limiter or rate_limiter
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = None  # EWMA of task latency, seconds
+        self.baseline = None
+        self.completed = 0
+        self.throttled = 0
+        self.increases = 0
+        self.decreases = 0
+        self.decision = 'hold'
+        self.reason = ''
+        self._window = 0
+        self._queued = False
+        self._decreased_at = 0.0
+        self._throttle_mark = self.limiter.throttled
+        self._cond = threading.Condition()
+        self._executor = None
+
+    def acquire(self):
+        """Block until a slot is free; returns the start time to pass to release()."""
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                self.waiting += 1
+                while self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                self.waiting -= 1
+            self.in_flight += 1
+        return time.monotonic()
+
+    def release(self, started):
+        now = time.monotonic()
+        with self._cond:
+            self.in_flight -= 1
+            self._observe(started, now)
+            self._cond.notify_all()
+
+    def _observe(self, started, now):
+        latency = now - started
+        self.completed += 1
+        if self.latency is None:
+            self.latency = self.baseline = latency
+        else:
+            self.latency += (latency - self.latency) * self.smoothing
+            self.baseline = min(latency, self.baseline + (latency - self.baseline) * self.drift)
+
+        throttled = self.limiter.throttled
+        if throttled != self._throttle_mark:
+            self.throttled += throttled - self._throttle_mark
+            self._throttle_mark = throttled
+            # tasks started before the last cut were sent at the old limit; don't cut again for them
+            if started >= self._decreased_at:
+                self._decrease('rate limited', now)
+                return
+
+        self._window += 1
+        if self.waiting:
+            self._queued = True
+        if self._window < int(self.limit):
+            return
+        if self.latency > self.baseline * self.tolerance:
+            self._decrease('latency %.0fms > %.1f x %.0fms' % (self.latency * 1000, self.tolerance,
+                                                                self.baseline * 1000), now)
+        elif self._queued and self.limit < self.maximum:
+            self.limit = min(self.maximum, self.limit + 1)
+            self.increases += 1
+            self._set('increase', 'saturated')
+        else:
+            self._set('hold', '')
+
+    def _decrease(self, reason, now):
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self.decreases += 1
+        self._decreased_at = now
+        self._set('decrease', reason)
+
+    def _set(self, decision, reason):
+        self.decision = decision
+        self.reason = reason
+        self._window = 0
+        self._queued = False
+
+    def map(self, fn, items, on_done=None):
+        """
+        Run fn(item) for every item, at most `limit` at a time, and return the results in
+        completion order. on_done(result) is called from the caller's thread as each one finishes.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.maximum, thread_name_prefix='okx-aimd')
+
+        def run(item):
+            started = self.acquire()
+            try:
+                return fn(item)
+            finally:
+                self.release(started)
+
+        results = []
+        for future in as_completed([self._executor.submit(run, item) for item in items]):
+            result = future.result()
+            results.append(result)
+            if on_done is not None:
+                on_done(result)
+        return results
+
+    def metrics(self):
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'latency_ms': (self.latency or 0.0) * 1000,
+                'baseline_ms': (self.baseline or 0.0) * 1000,
+                'completed': self.completed,
+                'throttled': self.throttled,
+                'increases': self.increases,
+                'decreases': self.decreases,
+                'decision': self.decision,
+                'reason': self.reason,
+            }
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -18,6 +18,15 @@ POST = "POST"
 
 SERVER_TIMESTAMP_URL = '/api/v5/public/time'
 
+# websocket
+WS_PUBLIC_URL = 'wss://ws.okx.com:8443/ws/v5/public'
+WS_PRIVATE_URL = 'wss://ws.okx.com:8443/ws/v5/private'
+WS_BUSINESS_URL = 'wss://ws.okx.com:8443/ws/v5/business'
+WS_PUBLIC_URL_DEMO = 'wss://wspap.okx.com:8443/ws/v5/public?brokerId=9999'
+WS_PRIVATE_URL_DEMO = 'wss://wspap.okx.com:8443/ws/v5/private?brokerId=9999'
+WS_BUSINESS_URL_DEMO = 'wss://wspap.okx.com:8443/ws/v5/business?brokerId=9999'
+WS_LOGIN_PATH = '/users/self/verify'
+
 # account
 POSITION_RISK='/api/v5/account/account-position-risk'
 ACCOUNT_INFO = '/api/v5/account/balance'
@@ -0,0 +1,180 @@
+"""Streaming iterators over paginated history endpoints.
+
+History endpoints return at most `limit` rows per call, newest first, and page backwards
+with `after` set to a cursor taken from the last row. `paginate` walks every page and
+yields rows one by one; a background thread fetches the next page while the caller is
+still consuming the current one, and at most `prefetch` pages wait in memory.
+`apaginate` is the asyncio version. `paginate_ranges` splits a time span into disjoint
+ranges fetched concurrently and yields them in order, newest range first.
+
+Requests go through the normal Client, so they wait on the shared per-endpoint token
+bucket (okx.ratelimit) and get the usual 429 retries: concurrent ranges split one budget
+instead of exceeding it.
+"""
+import asyncio
+import queue
+import threading
+from collections import deque
+
+from .exceptions import OkxParamsException, OkxRequestException
+
+# method name -> (cursor field, time field, how a time range is applied)
+#   'params': the endpoint takes begin/end
+#   'cursor': the cursor is the timestamp itself, so a range starts at after=end
+#   None: no time range support (ids only)
+SPECS = {
+    'get_fills': ('billId', 'ts', 'params'),
+    'get_fills_history': ('billId', 'ts', None),
+    'get_orders_history': ('ordId', 'cTime', 'params'),
+    'get_bills_details': ('billId', 'ts', 'params'),
+    'get_positions_history': ('uTime', 'uTime', 'cursor'),
+    'get_history_candlesticks': (0, 0, 'cursor'),
+    'get_order_list': ('ordId', 'cTime', None),
+}
+PAGE_LIMIT = 100
+
+_DONE = object()
+
+
+def _spec(method):
+    spec = SPECS.get(method.__name__)
+    if spec is None:
+        raise OkxParamsException('no pagination spec for %s' % method.__name__)
+    return spec
+
+
+def _pages(method, limit, params, begin=None, end=None):
+    """Yield pages (lists of rows) newest first, optionally restricted to [begin, end) in ms."""
+    key, time_field, range_mode = _spec(method)
+    params = dict(params, limit=str(limit))
+    if begin is not None or end is not None:
+        if range_mode is None:
+            raise OkxParamsException('%s does not support time ranges' % method.__name__)
+        if range_mode == 'params':
+            params.update(begin=str(begin) if begin is not None else '', end=str(end) if end is not None else '')
+        elif end is not None:
+            params['after'] = str(end)
+    while True:
+        response = method(**params)
+        if response.get('code') != '0':
+            raise OkxRequestException('%s failed: %s %s' % (method.__name__, response.get('code'), response.get('msg')))
+        page = response.get('data') or []
+        full = len(page) == limit
+        if begin is not None and page and int(page[-1][time_field]) < begin:
+            page = [row for row in page if int(row[time_field]) >= begin]
+            full = False
+        if page:
+            yield page
+        if not full:
+            return
+        params['after'] = str(page[-1][key])
+
+
+def _prefetch(pages, depth):
+    """Run a page generator in a thread, keeping up to `depth` pages ready."""
+    buffer = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for page in pages:
+                if not put(page):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+
+    def consume():
+        try:
+            while True:
+                item = buffer.get()
+                if item is _DONE:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            # the caller may stop early; let the fetch thread exit instead of blocking on put
+            stop.set()
+
+    # start fetching now rather than on the first next(), so queued ranges load in parallel
+    threading.Thread(target=run, name='okx-paginate', daemon=True).start()
+    return consume()
+
+
+def paginate(method, limit=PAGE_LIMIT, prefetch=1, begin=None, end=None, **params):
+    """
+    Iterate over every row of a history endpoint, newest first.
+
+        for fill in paginate(trade_api.get_fills_history, instType='SWAP'):
+            ...
+
+    begin/end (ms) restrict the rows to [begin, end); prefetch=0 disables the background fetch.
+    """
+    pages = _pages(method, limit, params, begin, end)
+    if prefetch:
+        pages = _prefetch(pages, prefetch)
+    for page in pages:
+        yield from page
+
+
+def paginate_ranges(method, ranges, workers=4, limit=PAGE_LIMIT, prefetch=1, **params):
+    """
+    Fetch disjoint (begin, end) ranges concurrently and yield their rows newest first.
+
+    `ranges` should be ordered newest first and not overlap. Up to `workers` ranges are
+    fetched at once; each buffers at most `prefetch` pages until its turn comes.
+    """
+    ranges = deque(ranges)
+    active = deque()
+
+    def start_next():
+        if ranges:
+            begin, end = ranges.popleft()
+            active.append(_prefetch(_pages(method, limit, params, begin, end), prefetch))
+
+    for _ in range(max(1, workers)):
+        start_next()
+    while active:
+        pages = active[0]
+        for page in pages:
+            yield from page
+        active.popleft()
+        start_next()
+
+
+def split_range(begin, end, parts):
+    """Split [begin, end) ms into `parts` disjoint ranges, newest first."""
+    step = max(1, (end - begin + parts - 1) // parts)
+    bounds = list(range(begin, end, step)) + [end]
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 2, -1, -1)]
+
+
+async def apaginate(method, limit=PAGE_LIMIT, begin=None, end=None, **params):
+    """
+    asyncio version of paginate; pages are fetched in the default executor and the next
+    page is requested before the rows of the current one are handed out.
+    """
+    loop = asyncio.get_running_loop()
+    pages = _pages(method, limit, params, begin, end)
+
+    def fetch():
+        return next(pages, None)
+
+    next_page = loop.run_in_executor(None, fetch)
+    while True:
+        page = await next_page
+        if page is None:
+            return
+        next_page = loop.run_in_executor(None, fetch)
+        for row in page:
+            yield row
@@ -0,0 +1,89 @@
+"""Client-side rate limiting.
+
+OKX limits REST calls per endpoint (mostly per user id, some per IP) over a 2 second
+window and answers 50011 once a limit is exceeded. Every Client waits on a token bucket
+per endpoint before sending, so any number of API objects and strategies in one process
+share a single budget instead of each assuming it owns the full limit.
+"""
+import threading
+import time
+
+from . import consts as c
+
+# (requests, seconds) per endpoint, from the OKX v5 docs
+LIMITS = {
+    c.MARKET_CANDLES: (40, 2.0),
+    c.HISTORY_CANDLES: (20, 2.0),
+    c.TICKERS_INFO: (20, 2.0),
+    c.TICKER_INFO: (20, 2.0),
+    c.INSTRUMENT_INFO: (20, 2.0),
+    c.ORDERS_PENDING: (60, 2.0),
+    c.ORDER_INFO: (60, 2.0),
+    c.ORDER_FILLS: (60, 2.0),
+    c.ORDERS_FILLS_HISTORY: (10, 2.0),
+    c.POSITION_INFO: (10, 2.0),
+    c.SET_LEVERAGE: (20, 2.0),
+    c.CONVERT_CONTRACT_COIN: (10, 2.0),
+    c.PLACR_ORDER: (60, 2.0),
+    c.BATCH_ORDERS: (300, 2.0),
+    c.AMEND_ORDER: (60, 2.0),
+    c.CANAEL_ORDER: (60, 2.0),
+    c.CANAEL_BATCH_ORDERS: (300, 2.0),
+    c.CANCEL_ALL_AFTER: (1, 1.0),
+}
+DEFAULT_LIMIT = (10, 2.0)
+# error codes OKX returns when a request exceeded a rate limit
+RATE_LIMIT_CODES = ('50011', '50061')
+
+
+class TokenBucket(object):
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'stamp')
+
+    def __init__(self, count, seconds):
+        self.rate = count / seconds
+        self.capacity = float(count)
+        self.tokens = float(count)
+        self.stamp = time.monotonic()
+
+    def reserve(self, now):
+        """Take one token and return how long the caller has to wait for it."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= 1.0
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class RateLimiter(object):
+
+    def __init__(self, limits=None, default=DEFAULT_LIMIT):
+        self.limits = dict(LIMITS if limits is None else limits)
+        self.default = default
+        self.waited = 0.0
+        self.throttled = 0  # rate limit answers received despite the buckets
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, endpoint):
+        with self._lock:
+            bucket = self._buckets.get(endpoint)
+            if bucket is None:
+                bucket = self._buckets[endpoint] = TokenBucket(*self.limits.get(endpoint, self.default))
+            delay = bucket.reserve(time.monotonic())
+            self.waited += delay
+        # sleep outside the lock; later callers queue behind the reserved (negative) tokens
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def penalize(self, endpoint):
+        """The exchange rejected a call as rate limited: empty the bucket so callers back off."""
+        with self._lock:
+            self.throttled += 1
+            bucket = self._buckets.get(endpoint)
+            if bucket is not None:
+                bucket.reserve(time.monotonic())
+                bucket.tokens = min(bucket.tokens, 0.0)
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,108 @@
+import random
+import threading
+import time
+
+from . import consts as c
+from .exceptions import OkxRequestException
+
+# HTTP status codes worth retrying: rate limited or server side failure
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class CircuitBreaker(object):
+    """
+    Per-endpoint breaker: after `failure_threshold` consecutive failures the endpoint
+    fast-fails for `reset_timeout` seconds, then a single trial request is let through.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, endpoint, failure_threshold=5, reset_timeout=30.0):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return
+            raise OkxRequestException('circuit open for %s after %d consecutive failures'
+                                      % (self.endpoint, self.failures))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class RequestPolicy(object):
+    """
+    Timeout, retry and circuit breaker settings shared by Client instances.
+
+    timeouts: {request_path: (connect, read)} overrides of `default_timeout`
+    max_attempts: total tries for idempotent requests (GET, or POST carrying clOrdId)
+    max_elapsed: retries stop once this many seconds have been spent on one call
+    """
+
+    def __init__(self, default_timeout=(3.05, 10.0), timeouts=None, max_attempts=3, backoff_base=0.2,
+                 backoff_cap=2.0, max_elapsed=15.0, failure_threshold=5, reset_timeout=30.0):
+        self.default_timeout = default_timeout
+        self.timeouts = dict(timeouts or {})
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_elapsed = max_elapsed
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def timeout(self, endpoint):
+        return self.timeouts.get(endpoint, self.default_timeout)
+
+    def breaker(self, endpoint):
+        breaker = self._breakers.get(endpoint)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(endpoint)
+                if breaker is None:
+                    breaker = CircuitBreaker(endpoint, self.failure_threshold, self.reset_timeout)
+                    self._breakers[endpoint] = breaker
+        return breaker
+
+    def attempts(self, method, params):
+        return self.max_attempts if is_idempotent(method, params) else 1
+
+    def backoff(self, attempt):
+        # full jitter: uniform over [0, min(cap, base * 2^attempt)]
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * (2 ** attempt)))
+
+
+def is_idempotent(method, params):
+    """GETs are always safe to repeat; POSTs only when every order carries a clOrdId."""
+    if method == c.GET:
+        return True
+    if isinstance(params, dict):
+        return bool(params.get('clOrdId'))
+    if isinstance(params, list) and params:
+        return all(isinstance(p, dict) and p.get('clOrdId') for p in params)
+    return False
+
+
+default_policy = RequestPolicy()
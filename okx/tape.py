@@ -0,0 +1,310 @@
+"""Recording and deterministic replay of exchange traffic.
+
+A tape is a gzip stream of JSON lines, one per REST response or WebSocket message:
+    {"t": wall time, "k": "rest", "m": method, "u": url, "b": body, "s": status, "c": content}
+    {"t": wall time, "k": "ws", "u": ws url, "c": raw message}
+The writer appends and flushes in batches, so a crash loses at most the last batch and
+leaves a truncated member that the reader skips.
+
+`install(tape)` routes every Client (and WsClient) in the process through a tape:
+TapeRecorder sends for real and records, TapeReplay answers from the tape. Replay matches
+a request to the next recorded response with the same method, url and body, falling back
+to the same method, path and run-independent fields (instId, side, ordType, ...) of the
+body or query; the rest may differ when it carries timestamps or session-based client order
+ids. Keeping those fields in the fallback means concurrent order requests for different
+instruments each get their own recorded ack whatever order they arrive in. With a speed, each response is held until
+its recorded offset / speed has passed since replay started; without one it is returned
+immediately.
+
+Pushes are gated on tape order: a recorded WebSocket message is delivered only after every
+REST response recorded before it has been served, so order and fill pushes reach the OMS
+in the same order relative to REST results as they did live. A REST record the replayed
+code never asks for would hold pushes back forever; after `stall_timeout` seconds without
+REST progress the records in the way are skipped.
+"""
+import gzip
+import heapq
+import json
+import threading
+import time
+import zlib
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from . import consts as c
+
+
+# request fields that are the same on every run; the fallback match must agree on them
+STABLE_FIELDS = ('instId', 'instType', 'side', 'posSide', 'ordType')
+
+
+class TapeExhausted(Exception):
+    """The tape has no more responses for this request."""
+
+
+def read_tape(path):
+    """Yield tape records in order, stopping quietly at a truncated end."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+        except (EOFError, zlib.error, OSError):
+            return
+
+
+def _loose_key(method, url, body):
+    """(method, path, STABLE_FIELDS of each order in the body or of the query)"""
+    parts = urlsplit(url)
+    if body:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            payload = {}
+    else:
+        payload = dict(parse_qsl(parts.query))
+    items = payload if isinstance(payload, list) else [payload]
+    return method, parts.path, tuple(tuple(item.get(f, '') for f in STABLE_FIELDS) if isinstance(item, dict) else ()
+                                     for item in items)
+
+
+class TapeResponse(object):
+    """Just enough of requests.Response for Client._request and OkxAPIException."""
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content.encode('utf-8') if isinstance(content, str) else content
+        self.request = None
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class TapeRecorder(object):
+
+    def __init__(self, path, flush_every=100):
+        self.path = path
+        self.flush_every = flush_every
+        self.records = 0
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def send(self, method, url, body, header, timeout):
+        if method == c.GET:
+            response = requests.get(url, headers=header, timeout=timeout)
+        else:
+            response = requests.post(url, data=body, headers=header, timeout=timeout)
+        self._write({'t': time.time(), 'k': 'rest', 'm': method, 'u': url, 'b': body,
+                     's': response.status_code, 'c': response.text})
+        return response
+
+    def record_ws(self, url, message):
+        self._write({'t': time.time(), 'k': 'ws', 'u': url, 'c': message})
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n'
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            self.records += 1
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class TapeReplay(object):
+
+    def __init__(self, path, speed=None, stall_timeout=2.0):
+        self.path = path
+        self.speed = speed
+        self.stall_timeout = stall_timeout
+        self.served = 0
+        self._records = read_tape(path)
+        self._exact = defaultdict(deque)  # (method, url, body) -> records read ahead
+        self._loose = defaultdict(deque)  # (method, path, stable fields) -> the same records
+        self._ws = defaultdict(deque)  # ws url -> records
+        self._origin = None
+        self._started = time.monotonic()
+        self._eof = False
+        self._read = 0  # records read so far; each record's 'i' is its position on the tape
+        self._unserved = []  # heap of positions of REST records not served yet (lazy deletion)
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+
+    # ---- REST ----
+
+    def send(self, method, url, body, header, timeout):
+        with self._lock:
+            record = self._take(method, url, body)
+        if record is None:
+            raise TapeExhausted(f"{method} {url}")
+        self._wait(record)
+        with self._lock:
+            self.served += 1
+            self._pending.discard(record['i'])
+            self._progress.notify_all()
+        return TapeResponse(record['s'], record['c'])
+
+    def _take(self, method, url, body):
+        exact_key = (method, url, body)
+        loose_key = _loose_key(method, url, body)
+        while True:
+            for queue, key in ((self._exact, exact_key), (self._loose, loose_key)):
+                if queue[key]:
+                    record = queue[key][0]
+                    self._exact[(record['m'], record['u'], record['b'])].remove(record)
+                    self._loose[record['loose']].remove(record)
+                    return record
+            if not self._read_next():
+                return None
+
+    def _read_next(self):
+        if self._eof:
+            return False
+        record = next(self._records, None)
+        if record is None:
+            self._eof = True
+            return False
+        if self._origin is None:
+            self._origin = record['t']
+        record['i'] = self._read
+        self._read += 1
+        if record['k'] == 'rest':
+            heapq.heappush(self._unserved, record['i'])
+            self._pending.add(record['i'])
+            self._exact[(record['m'], record['u'], record['b'])].append(record)
+            record['loose'] = _loose_key(record['m'], record['u'], record['b'])
+            self._loose[record['loose']].append(record)
+        else:
+            self._ws[record['u']].append(record)
+        return True
+
+    def _wait(self, record):
+        if not self.speed:
+            return
+        delay = (record['t'] - self._origin) / self.speed - (time.monotonic() - self._started)
+        if delay > 0:
+            time.sleep(delay)
+
+    @property
+    def exhausted(self):
+        """Every REST response on the tape has been served."""
+        return self._eof and not any(self._loose.values())
+
+    # ---- WebSocket ----
+
+    def _rest_pending(self, position):
+        """Whether a REST record before `position` on the tape is still unserved."""
+        while self._unserved and self._unserved[0] not in self._pending:
+            heapq.heappop(self._unserved)
+        return bool(self._unserved) and self._unserved[0] < position
+
+    def _skip_before(self, position):
+        while self._unserved and self._unserved[0] < position:
+            self._pending.discard(heapq.heappop(self._unserved))
+
+    def _next_push(self, client):
+        """
+        The next recorded push for client, once every REST record before it has been served.
+        Reads the tape no further than the first unserved REST record.
+        """
+        with self._lock:
+            while not client._stop.is_set():
+                queue = self._ws[client.url]
+                record = next((r for r in queue if _is_push_for(client, r)), None)
+                barrier = record['i'] if record is not None else self._read
+                if not self._rest_pending(barrier):
+                    if record is not None:
+                        queue.remove(record)
+                        return record
+                    if self._read_next():
+                        continue
+                    return None
+                served = self.served
+                self._progress.wait(self.stall_timeout)
+                if self.served == served and not client._stop.is_set():
+                    # the replayed code is not going to ask for these responses
+                    self._skip_before(barrier)
+        return None
+
+    def _next_ws(self, url, match=None):
+        with self._lock:
+            while True:
+                for record in self._ws[url]:
+                    if match is None or match(record):
+                        self._ws[url].remove(record)
+                        return record
+                if not self._read_next():
+                    return None
+
+    def play_ws(self, client):
+        """Feed the recorded pushes for client.url to it, in place of a connection."""
+        def run():
+            client.ready = True
+            if client.on_connect:
+                client.on_connect()
+            while not client._stop.is_set():
+                record = self._next_push(client)
+                if record is None:
+                    break
+                self._wait(record)
+                client._on_raw_message(None, record['c'])
+            client.ready = False
+
+        thread = threading.Thread(target=run, name='okx-ws-replay', daemon=True)
+        thread.start()
+        return thread
+
+    def ws_request(self, client, op):
+        """Resolve a WebSocket request with the next recorded response to the same op."""
+        future = Future()
+        record = self._next_ws(client.url, lambda r: '"id"' in r['c'] and json.loads(r['c']).get('op') == op)
+        if record is None:
+            future.set_exception(TapeExhausted(f"ws {op}"))
+        else:
+            future.set_result(json.loads(record['c']))
+        return future
+
+
+def _is_push_for(client, record):
+    # login/subscribe events and request responses are produced by the live connection
+    # itself; only channel pushes matching this client's subscriptions are replayed
+    if '"arg"' not in record['c'] or '"event"' in record['c']:
+        return False
+    arg = json.loads(record['c']).get('arg') or {}
+    return any(all(arg.get(k) == v for k, v in sub.items()) for sub in client._subscriptions)
+
+
+def install(tape):
+    """Route every REST client and WebSocket client in this process through tape (None to undo)."""
+    from .client import Client
+    from .clock import server_clock
+
+    Client.transport = tape
+    try:
+        from .ws_client import WsClient
+        WsClient.tape = tape
+    except ImportError:
+        pass
+    if isinstance(tape, TapeReplay):
+        # server time comes from the tape's responses, not the network
+        server_clock.stop()
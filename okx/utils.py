@@ -1,9 +1,15 @@
 import hmac
 import base64
+import hashlib
 import time
-import datetime
 from . import consts as c
 
+_TRANS_36 = bytes(x ^ 0x36 for x in range(256))
+_TRANS_5C = bytes(x ^ 0x5C for x in range(256))
+
+# local clock correction in milliseconds (server - local), maintained by clock.ServerClock
+_clock_offset_ms = 0.0
+
 
 def sign(message, secretKey):
     mac = hmac.new(bytes(secretKey, encoding='utf8'), bytes(message, encoding='utf-8'), digestmod='sha256')
@@ -27,16 +33,70 @@ def get_header(api_key, sign, timestamp, passphrase, flag):
 
 
 def parse_params_to_str(params):
-    url = '?'
-    for key, value in params.items():
-        url = url + str(key) + '=' + str(value) + '&'
-    return url[0:-1]
+    # empty optional params are left out: shorter URL, shorter string to sign
+    query = '&'.join([str(key) + '=' + str(value) for key, value in params.items() if value != '' and value is not None])
+    return '?' + query if query else ''
+
+
+class Signer(object):
+    """
+    HMAC-SHA256 signer keyed once per client.
+
+    The key-padded inner and outer sha256 states are computed up front (RFC 2104) and
+    copied per request, which skips re-keying and the Python-level hmac.HMAC wrapper.
+    """
+
+    __slots__ = ('_inner', '_outer')
+
+    def __init__(self, secretKey):
+        key = bytes(secretKey, encoding='utf8')
+        if len(key) > 64:
+            key = hashlib.sha256(key).digest()
+        key = key.ljust(64, b'\0')
+        self._inner = hashlib.sha256(key.translate(_TRANS_36))
+        self._outer = hashlib.sha256(key.translate(_TRANS_5C))
+
+    def sign(self, message):
+        inner = self._inner.copy()
+        inner.update(message.encode('utf-8'))
+        outer = self._outer.copy()
+        outer.update(inner.digest())
+        return base64.b64encode(outer.digest())
+
+
+class HeaderTemplate(object):
+    """Static header fields built once per client; only sign and timestamp vary per request."""
+
+    __slots__ = ('_base',)
+
+    def __init__(self, api_key, passphrase, flag):
+        self._base = {
+            c.CONTENT_TYPE: c.APPLICATION_JSON,
+            c.OK_ACCESS_KEY: api_key,
+            c.OK_ACCESS_PASSPHRASE: passphrase,
+            'x-simulated-trading': flag,
+        }
+
+    def build(self, sign, timestamp):
+        header = self._base.copy()
+        header[c.OK_ACCESS_SIGN] = sign
+        header[c.OK_ACCESS_TIMESTAMP] = timestamp
+        return header
+
+
+def set_clock_offset(offset_ms):
+    global _clock_offset_ms
+    _clock_offset_ms = float(offset_ms)
 
 
 def get_timestamp():
-    now = datetime.datetime.utcnow()
-    t = now.isoformat("T", "milliseconds")
-    return t + "Z"
+    now_ms = int(time.time() * 1000 + _clock_offset_ms)
+    seconds, millis = divmod(now_ms, 1000)
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(seconds)) + '.%03dZ' % millis
+
+
+def get_epoch_seconds():
+    return str(int(time.time() + _clock_offset_ms / 1000))
 
 
 def signature(timestamp, method, request_path, body, secret_key):
@@ -0,0 +1,206 @@
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import websocket
+
+from . import consts as c, utils
+
+
+class NotSentError(ConnectionError):
+    """The request never left this process, so it is safe to send it another way."""
+
+
+class WsClient(object):
+    """
+    Threaded OKX v5 WebSocket connection with login, subscription replay and reconnect.
+
+    Messages are decoded and handed to `on_message(msg)` on the socket thread.
+    `on_connect()` fires once the socket is usable (after login for private endpoints)
+    and `on_disconnect()` when it drops; the client reconnects and re-subscribes by itself.
+    Operations with a response (order, amend-order, ...) go through `request()`, which
+    correlates on the message id and returns a Future resolved with the raw response.
+    """
+
+    # okx.tape.install() sets this to record or replay every connection's messages
+    tape = None
+
+    def __init__(self, url, api_key=None, api_secret_key=None, passphrase=None, on_message=None,
+                 on_connect=None, on_disconnect=None, ping_interval=20.0, reconnect_delay=1.0,
+                 max_reconnect_delay=30.0):
+        self.url = url
+        self.API_KEY = api_key
+        self.PASSPHRASE = passphrase
+        self._signer = utils.Signer(api_secret_key) if api_secret_key else None
+        self.on_message = on_message
+        self.on_connect = on_connect
+        self.on_disconnect = on_disconnect
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self.ready = False
+        self._ws = None
+        self._subscriptions = []
+        self._send_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_recv = 0.0
+        self._pending = {}
+        # guards _pending, which request() fills on the caller's thread and the socket thread drains
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
+
+    @classmethod
+    def public(cls, flag='0', **kwargs):
+        return cls(c.WS_PUBLIC_URL_DEMO if flag == '1' else c.WS_PUBLIC_URL, **kwargs)
+
+    @classmethod
+    def private(cls, api_key, api_secret_key, passphrase, flag='0', **kwargs):
+        url = c.WS_PRIVATE_URL_DEMO if flag == '1' else c.WS_PRIVATE_URL
+        return cls(url, api_key, api_secret_key, passphrase, **kwargs)
+
+    @property
+    def is_private(self):
+        return self._signer is not None
+
+    def start(self):
+        if self._thread is None and getattr(self.tape, 'play_ws', None) is not None:
+            self._stop.clear()
+            self._thread = self.tape.play_ws(self)
+            return
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='okx-ws', daemon=True)
+            self._thread.start()
+            threading.Thread(target=self._keepalive, name='okx-ws-ping', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    def subscribe(self, args):
+        args = [a for a in args if a not in self._subscriptions]
+        self._subscriptions.extend(args)
+        if self.ready and args:
+            self.send({'op': 'subscribe', 'args': args})
+
+    def unsubscribe(self, args):
+        self._subscriptions = [a for a in self._subscriptions if a not in args]
+        if self.ready and args:
+            self.send({'op': 'unsubscribe', 'args': args})
+
+    def send(self, payload):
+        ws = self._ws
+        if ws is None:
+            raise ConnectionError('websocket is not connected')
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        with self._send_lock:
+            ws.send(data)
+
+    def request(self, op, args):
+        if getattr(self.tape, 'ws_request', None) is not None:
+            return self.tape.ws_request(self, op)
+        future = Future()
+        req_id = str(next(self._ids))
+        with self._pending_lock:
+            # checked under the lock: _on_close clears ready before failing what is pending
+            if not self.ready:
+                future.set_exception(NotSentError('websocket is not ready'))
+                return future
+            self._pending[req_id] = future
+        try:
+            self.send({'id': req_id, 'op': op, 'args': args})
+        except Exception as e:
+            with self._pending_lock:
+                self._pending.pop(req_id, None)
+            future.set_exception(NotSentError(str(e)))
+        return future
+
+    def _fail_pending(self, error):
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _login_args(self):
+        timestamp = utils.get_epoch_seconds()
+        sign = self._signer.sign(timestamp + c.GET + c.WS_LOGIN_PATH).decode()
+        return [{'apiKey': self.API_KEY, 'passphrase': self.PASSPHRASE, 'timestamp': timestamp, 'sign': sign}]
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self._ws = websocket.WebSocketApp(self.url, on_open=self._on_open, on_message=self._on_raw_message,
+                                              on_close=self._on_close, on_error=self._on_error)
+            self._ws.run_forever()
+            self._ws = None
+            if self._stop.is_set():
+                break
+            # back off only when the connection did not stay up
+            delay = self.reconnect_delay if time.monotonic() - started > 60 else min(delay * 2, self.max_reconnect_delay)
+            self._stop.wait(delay)
+
+    def _keepalive(self):
+        # OKX drops connections idle for 30s; a text 'ping' is answered with 'pong'
+        while not self._stop.wait(self.ping_interval / 2):
+            if self._ws is not None and self.ready and time.monotonic() - self._last_recv > self.ping_interval:
+                try:
+                    self.send('ping')
+                except Exception:
+                    pass
+
+    def _on_open(self, ws):
+        self._last_recv = time.monotonic()
+        if self.is_private:
+            self.send({'op': 'login', 'args': self._login_args()})
+        else:
+            self._set_ready()
+
+    def _set_ready(self):
+        self.ready = True
+        if self._subscriptions:
+            self.send({'op': 'subscribe', 'args': list(self._subscriptions)})
+        if self.on_connect:
+            self.on_connect()
+
+    def _on_raw_message(self, ws, message):
+        self._last_recv = time.monotonic()
+        if message == 'pong':
+            return
+        if ws is not None and self.tape is not None:
+            self.tape.record_ws(self.url, message)
+        msg = json.loads(message)
+        req_id = msg.get('id')
+        if req_id is not None:
+            with self._pending_lock:
+                future = self._pending.pop(req_id, None)
+            if future is not None:
+                future.set_result(msg)
+                return
+        event = msg.get('event')
+        if event == 'login':
+            if msg.get('code') == '0':
+                self._set_ready()
+            else:
+                ws.close()
+        if self.on_message:
+            self.on_message(msg)
+
+    def _on_error(self, ws, error):
+        if self.on_message:
+            self.on_message({'event': 'error', 'msg': str(error)})
+
+    def _on_close(self, ws, *args):
+        was_ready = self.ready
+        self.ready = False
+        # the outcome of in-flight requests is unknown; callers reconcile by clOrdId
+        self._fail_pending(ConnectionError('websocket closed with requests in flight'))
+        if was_ready and self.on_disconnect:
+            self.on_disconnect()
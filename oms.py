@@ -0,0 +1,284 @@
+"""
+订单管理（OMS）
+
+每个下单意图在本地生成确定性的 clOrdId 并登记一个 ManagedOrder，之后交易所的下单响应、
+私有 WebSocket 的订单推送、撤单结果都按 clOrdId/ordId 回写到同一个对象上，由一个紧凑的
+状态机约束状态变化。下单请求带 clOrdId，okx.Client 在网络超时后用同一个 clOrdId 重试，
+交易所会拒绝重复的 clOrdId，因此重试不会产生重复订单。
+按 (instId, side) 索引当前活跃订单，查询是 O(1)；同一 (instId, side) 同时只允许一个活跃订单。
+传入 journal（journal.Journal）时，每次订单变化都写入状态日志，重启后用 restore() 恢复。
+"""
+import collections
+import threading
+import time
+import zlib
+
+PENDING_NEW = 'pending_new'
+LIVE = 'live'
+PARTIALLY_FILLED = 'partially_filled'
+FILLED = 'filled'
+CANCELED = 'canceled'
+REJECTED = 'rejected'
+
+TERMINAL_STATES = (FILLED, CANCELED, REJECTED)
+ACTIVE_STATES = (PENDING_NEW, LIVE, PARTIALLY_FILLED)
+
+# 允许的状态变化；推送可能乱序或重复，不在表中的变化直接忽略
+TRANSITIONS = {
+    PENDING_NEW: (LIVE, PARTIALLY_FILLED, FILLED, CANCELED, REJECTED),
+    LIVE: (PARTIALLY_FILLED, FILLED, CANCELED),
+    PARTIALLY_FILLED: (PARTIALLY_FILLED, FILLED, CANCELED),
+    FILLED: (),
+    CANCELED: (),
+    REJECTED: (),
+}
+
+# 交易所订单状态 -> OMS 状态
+EXCHANGE_STATES = {
+    'live': LIVE,
+    'partially_filled': PARTIALLY_FILLED,
+    'filled': FILLED,
+    'canceled': CANCELED,
+    'mmp_canceled': CANCELED,
+}
+
+# 51016: clOrdId 重复，说明之前的请求已经被交易所接受
+DUPLICATE_CLORDID = '51016'
+
+_BASE36 = '0123456789abcdefghijklmnopqrstuvwxyz'
+
+
+def _base36(n):
+    if n == 0:
+        return '0'
+    digits = []
+    while n:
+        n, r = divmod(n, 36)
+        digits.append(_BASE36[r])
+    return ''.join(reversed(digits))
+
+
+class ManagedOrder(object):
+
+    __slots__ = ('clOrdId', 'instId', 'side', 'posSide', 'px', 'sz', 'state', 'ordId', 'filled_sz',
+                 'avg_px', 'created', 'updated', 'attempts', 'error')
+
+    def __init__(self, clOrdId, instId, side, posSide, px, sz):
+        self.clOrdId = clOrdId
+        self.instId = instId
+        self.side = side
+        self.posSide = posSide
+        self.px = px
+        self.sz = sz
+        self.state = PENDING_NEW
+        self.ordId = ''
+        self.filled_sz = 0.0
+        self.avg_px = 0.0
+        self.created = self.updated = time.time()
+        self.attempts = 0
+        self.error = ''
+
+    @property
+    def active(self):
+        return self.state in ACTIVE_STATES
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, values):
+        order = cls(values['clOrdId'], values['instId'], values['side'], values['posSide'], values['px'], values['sz'])
+        for name in cls.__slots__:
+            if name in values:
+                setattr(order, name, values[name])
+        return order
+
+    def __repr__(self):
+        return (f"ManagedOrder({self.clOrdId}, {self.instId} {self.side} {self.sz}@{self.px}, "
+                f"state={self.state}, ordId={self.ordId}, filled={self.filled_sz})")
+
+
+class OrderManager(object):
+    """
+    clOrdId 格式：前缀 + 会话号 + 合约哈希 + 方向 + 序号（全部为字母数字，不超过32位）
+    会话号取进程启动时间，保证重启后不会与上次运行的 clOrdId 冲突
+    """
+
+    def __init__(self, prefix='zj', session=None, logger=None, retention=2000, journal=None):
+        self.prefix = prefix
+        self.journal = journal
+        self.session = session if session is not None else _base36(int(time.time()))
+        self.logger = logger
+        self.retention = retention
+        self._lock = threading.RLock()
+        self._seq = 0
+        self._orders = {}  # clOrdId -> ManagedOrder
+        self._by_ordId = {}  # ordId -> ManagedOrder
+        self._active = {}  # (instId, side) -> ManagedOrder
+        self._terminal = collections.deque()  # 已结束订单的 clOrdId，超过 retention 时清理最早的
+
+    # ---- 订单登记 ----
+
+    def next_clOrdId(self, instId, side):
+        with self._lock:
+            self._seq += 1
+            inst_code = _base36(zlib.crc32(instId.encode()))[:5]
+            return f"{self.prefix}{self.session}{inst_code}{side[0]}{_base36(self._seq)}"
+
+    def new_order(self, instId, side, posSide, px, sz):
+        """
+        登记一个新订单
+        :return: ManagedOrder；同一 (instId, side) 还有活跃订单时返回 None（旧订单要先撤销或对账确认已结束，
+                 否则覆盖索引后旧订单仍挂在交易所上却不再出现在 active()/active_orders() 中）
+        """
+        with self._lock:
+            existing = self._active.get((instId, side))
+            if existing is not None:
+                if self.logger:
+                    self.logger.warning(f"{instId} {side} 仍有活跃订单 {existing}，不再新建订单")
+                return None
+            order = ManagedOrder(self.next_clOrdId(instId, side), instId, side, posSide, px, sz)
+            self._orders[order.clOrdId] = order
+            self._active[(instId, side)] = order
+            self.record(order)
+            return order
+
+    def submit(self, order, send):
+        """
+        发送下单请求并处理响应。只发送一次：REST 的超时/连接错误由 okx.Client 按 clOrdId 幂等重试，
+        在这里再重试会成倍增加请求次数；请求异常时订单保持 pending_new，之后按 clOrdId 对账
+        :param send: send(order) -> 交易所原始响应
+        """
+        order.attempts += 1
+        try:
+            response = send(order)
+        except Exception as e:
+            order.error = str(e)
+            if self.logger:
+                self.logger.warning(f"{order.instId} 下单请求异常，结果未知，之后按 clOrdId {order.clOrdId} 对账: {e}")
+            return None
+        self.on_ack(order.clOrdId, response)
+        return response
+
+    # ---- 交易所回报 ----
+
+    def on_ack(self, clOrdId, response):
+        """处理下单响应（REST 或 WebSocket 的 order 响应）"""
+        response = response or {}
+        data = response.get('data') or [{}]
+        result = data[0]
+        s_code = result.get('sCode', response.get('code'))
+        with self._lock:
+            order = self._orders.get(clOrdId)
+            if order is None:
+                return None
+            if s_code == '0' or s_code == DUPLICATE_CLORDID:
+                if result.get('ordId'):
+                    order.ordId = result['ordId']
+                    self._by_ordId[order.ordId] = order
+                self._transition(order, LIVE)
+            else:
+                order.error = result.get('sMsg') or response.get('msg', '')
+                self._transition(order, REJECTED)
+            self.record(order)
+            return order
+
+    def on_update(self, msg):
+        """处理私有 WebSocket orders 频道的订单推送，或 REST 查询到的订单"""
+        state = EXCHANGE_STATES.get(msg.get('state'))
+        if state is None:
+            return None
+        with self._lock:
+            order = self._orders.get(msg.get('clOrdId') or '') or self._by_ordId.get(msg.get('ordId'))
+            if order is None:
+                return None
+            if msg.get('ordId') and not order.ordId:
+                order.ordId = msg['ordId']
+                self._by_ordId[order.ordId] = order
+            if msg.get('accFillSz'):
+                order.filled_sz = float(msg['accFillSz'])
+            if msg.get('avgPx'):
+                order.avg_px = float(msg['avgPx'])
+            if msg.get('px'):
+                order.px = msg['px']
+            self._transition(order, state)
+            self.record(order)
+            return order
+
+    def mark_canceled(self, ordId='', clOrdId=''):
+        with self._lock:
+            order = self._orders.get(clOrdId) if clOrdId else self._by_ordId.get(ordId)
+            if order is not None and self._transition(order, CANCELED):
+                self.record(order)
+            return order
+
+    def _transition(self, order, state):
+        if state == order.state and state != PARTIALLY_FILLED:
+            return False
+        if state not in TRANSITIONS[order.state]:
+            return False
+        order.state = state
+        order.updated = time.time()
+        if state in TERMINAL_STATES:
+            key = (order.instId, order.side)
+            if self._active.get(key) is order:
+                del self._active[key]
+            self._terminal.append(order.clOrdId)
+            if len(self._terminal) > self.retention:
+                self._forget(self._terminal.popleft())
+        return True
+
+    def _forget(self, clOrdId):
+        order = self._orders.pop(clOrdId, None)
+        if order is not None and order.ordId:
+            self._by_ordId.pop(order.ordId, None)
+        if self.journal is not None:
+            self.journal.delete('orders', clOrdId)
+
+    # ---- 状态日志 ----
+
+    def record(self, order):
+        """订单有变化时写入状态日志（改单等在 OMS 之外修改订单字段后也要调用）"""
+        if self.journal is not None:
+            self.journal.put('orders', order.clOrdId, order.to_dict())
+
+    def restore(self, orders):
+        """
+        从状态日志恢复本前缀的订单
+        :param orders: {clOrdId: ManagedOrder.to_dict()}
+        :return: 恢复的活跃订单列表
+        """
+        restored = []
+        with self._lock:
+            for values in sorted(orders.values(), key=lambda v: v['created']):
+                if not self.owns(values['clOrdId']):
+                    continue
+                order = ManagedOrder.from_dict(values)
+                self._orders[order.clOrdId] = order
+                if order.ordId:
+                    self._by_ordId[order.ordId] = order
+                if order.active:
+                    self._active[(order.instId, order.side)] = order
+                    restored.append(order)
+                else:
+                    self._terminal.append(order.clOrdId)
+        return restored
+
+    # ---- 查询 ----
+
+    def get(self, clOrdId):
+        return self._orders.get(clOrdId)
+
+    def by_ordId(self, ordId):
+        return self._by_ordId.get(ordId)
+
+    def active(self, instId, side):
+        return self._active.get((instId, side))
+
+    def active_orders(self, instId=None):
+        with self._lock:
+            return [o for (i, _), o in self._active.items() if instId is None or i == instId]
+
+    def owns(self, clOrdId):
+        """clOrdId 是否由本进程（本前缀）生成"""
+        return bool(clOrdId) and clOrdId.startswith(self.prefix)
@@ -0,0 +1,90 @@
+"""
+下单通道
+
+下单、改单、撤单优先走已登录的私有 WebSocket（order / batch-orders / amend-order / cancel-order），
+省掉每次 REST 请求的 HTTP 开销，并且不占用 REST 的限速额度；WebSocket 未就绪时自动回退到
+TradeAPI 的 REST 接口。所有方法都返回 concurrent.futures.Future，结果是交易所原始响应
+（{'code', 'msg', 'data': [...]}，两种通道格式一致）。
+"""
+from concurrent.futures import Future
+
+from okx.ws_client import NotSentError
+
+# 与 TradeAPI.place_order 保持一致的 broker tag
+ORDER_TAG = 'f1ee03b510d5SUDE'
+# 批量接口单次最多 20 个订单
+BATCH_LIMIT = 20
+
+
+def _clean(args):
+    return {k: v for k, v in args.items() if v != '' and v is not None}
+
+
+def _done(result=None, error=None):
+    future = Future()
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+    return future
+
+
+class OrderGateway(object):
+
+    def __init__(self, trade_api, ws=None, logger=None):
+        self.trade_api = trade_api
+        self.ws = ws  # okx.ws_client.WsClient（私有连接），可以与 PrivateStream 共用
+        self.logger = logger
+
+    @property
+    def ws_ready(self):
+        return self.ws is not None and self.ws.ready
+
+    def _submit(self, op, args, rest_call):
+        if self.ws_ready:
+            future = self.ws.request(op, args)
+            # 只有在请求根本没有发出时才回退到 REST；已发出但连接断开的请求结果未知，交给调用方按 clOrdId 对账
+            if not (future.done() and isinstance(future.exception(), NotSentError)):
+                return future
+            if self.logger:
+                self.logger.warning(f"WebSocket {op} 发送失败，回退到REST")
+        try:
+            return _done(rest_call())
+        except Exception as e:
+            return _done(error=e)
+
+    def place_order(self, instId, tdMode, side, ordType, sz, px='', posSide='', clOrdId='', reduceOnly=''):
+        args = _clean({'instId': instId, 'tdMode': tdMode, 'side': side, 'ordType': ordType, 'sz': sz,
+                       'px': px, 'posSide': posSide, 'clOrdId': clOrdId, 'reduceOnly': reduceOnly,
+                       'tag': ORDER_TAG})
+        return self._submit('order', [args], lambda: self.trade_api.place_order(
+            instId=instId, tdMode=tdMode, side=side, ordType=ordType, sz=sz, px=px, posSide=posSide,
+            clOrdId=clOrdId, reduceOnly=reduceOnly))
+
+    def place_batch(self, orders):
+        """orders: place_order 参数字典列表，超过 20 个时拆成多个批次，返回 Future 列表"""
+        futures = []
+        for i in range(0, len(orders), BATCH_LIMIT):
+            batch = [_clean(dict(order, tag=ORDER_TAG)) for order in orders[i:i + BATCH_LIMIT]]
+            futures.append(self._submit('batch-orders', batch, lambda b=batch: self.trade_api.place_multiple_orders(b)))
+        return futures
+
+    def amend_order(self, instId, ordId='', clOrdId='', newPx='', newSz='', cxlOnFail=''):
+        args = _clean({'instId': instId, 'ordId': ordId, 'clOrdId': clOrdId, 'newPx': newPx, 'newSz': newSz,
+                       'cxlOnFail': cxlOnFail})
+        return self._submit('amend-order', [args], lambda: self.trade_api.amend_order(
+            instId=instId, ordId=ordId, clOrdId=clOrdId, newPx=newPx, newSz=newSz, cxlOnFail=cxlOnFail))
+
+    def cancel_order(self, instId, ordId='', clOrdId=''):
+        args = _clean({'instId': instId, 'ordId': ordId, 'clOrdId': clOrdId})
+        return self._submit('cancel-order', [args], lambda: self.trade_api.cancel_order(
+            instId=instId, ordId=ordId, clOrdId=clOrdId))
+
+    def cancel_batch(self, orders):
+        """orders: [{'instId':..., 'ordId':...}]，返回 Future 列表"""
+        futures = []
+        for i in range(0, len(orders), BATCH_LIMIT):
+            batch = [_clean(order) for order in orders[i:i + BATCH_LIMIT]]
+            futures.append(self._submit('batch-cancel-orders', batch,
+                                        lambda b=batch: self.trade_api.cancel_multiple_orders(b)))
+        return futures
@@ -0,0 +1,217 @@
+"""
+本地 L2 订单簿
+
+由公共 WebSocket 的 books（400档增量）或 books5（5档全量）频道维护。
+每一侧用有序价格数组 + 价格到档位的字典保存：查找档位用二分 O(log n)，插入/删除是数组内的
+memmove，在几百档的规模下比树结构更快。每次增量后按 OKX 规则校验 CRC32 checksum，
+seqId 不连续或校验失败时标记失效并重新订阅拿快照。
+"""
+import bisect
+import threading
+import zlib
+
+# checksum 只取前25档
+CHECKSUM_DEPTH = 25
+
+
+class BookSide(object):
+    """一侧盘口；买盘存负价格，使两侧数组都按“越靠前越优”升序排列"""
+
+    __slots__ = ('is_bid', 'keys', 'levels')
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.keys = []  # 升序，买盘为 -price
+        self.levels = {}  # key -> (px_str, sz_str, size)
+
+    def clear(self):
+        self.keys = []
+        self.levels = {}
+
+    def update(self, px_str, sz_str):
+        price = float(px_str)
+        key = -price if self.is_bid else price
+        size = float(sz_str)
+        if size == 0:
+            if self.levels.pop(key, None) is not None:
+                del self.keys[bisect.bisect_left(self.keys, key)]
+            return
+        if key not in self.levels:
+            bisect.insort(self.keys, key)
+        self.levels[key] = (px_str, sz_str, size)
+
+    def best(self):
+        if not self.keys:
+            return None
+        return self.levels[self.keys[0]]
+
+    def top(self, n):
+        levels = self.levels
+        return [levels[k] for k in self.keys[:n]]
+
+    def index_of(self, price):
+        """严格优于 price 的档位数量"""
+        key = -price if self.is_bid else price
+        return bisect.bisect_left(self.keys, key)
+
+    def size_better_than(self, price):
+        """比 price 更优（买盘更高 / 卖盘更低）的累计挂单量"""
+        levels = self.levels
+        return sum(levels[k][2] for k in self.keys[:self.index_of(price)])
+
+    def size_within(self, distance):
+        """距最优价 distance（比例）以内的累计挂单量"""
+        if not self.keys:
+            return 0.0
+        best = abs(self.keys[0])
+        limit = best * (1 - distance) if self.is_bid else best * (1 + distance)
+        key = -limit if self.is_bid else limit
+        levels = self.levels
+        return sum(levels[k][2] for k in self.keys[:bisect.bisect_right(self.keys, key)])
+
+
+class OrderBook(object):
+
+    def __init__(self, instId):
+        self.instId = instId
+        self.bids = BookSide(True)
+        self.asks = BookSide(False)
+        self.seq_id = None
+        self.ts = 0
+        self.valid = False
+        self._lock = threading.Lock()
+
+    def apply(self, data, action):
+        """
+        应用一条推送
+        :param data: 推送中的 data[0]
+        :param action: 'snapshot' / 'update'；books5 没有 action，按 snapshot 处理
+        :return: 应用后订单簿是否有效（seqId 连续且 checksum 通过）
+        """
+        with self._lock:
+            if action != 'update':
+                self.bids.clear()
+                self.asks.clear()
+            elif not self.valid or (data.get('prevSeqId') is not None and self.seq_id is not None
+                                    and int(data['prevSeqId']) != self.seq_id):
+                self.valid = False
+                return False
+            for level in data.get('bids', ()):
+                self.bids.update(level[0], level[1])
+            for level in data.get('asks', ()):
+                self.asks.update(level[0], level[1])
+            if data.get('seqId') is not None:
+                self.seq_id = int(data['seqId'])
+            self.ts = int(data.get('ts') or 0)
+            checksum = data.get('checksum')
+            self.valid = checksum is None or self.checksum() == int(checksum)
+            return self.valid
+
+    def checksum(self):
+        """OKX 规则：前25档按 买1价:买1量:卖1价:卖1量... 交替拼接（一侧不足时只取另一侧），CRC32 取有符号32位"""
+        bids = self.bids.top(CHECKSUM_DEPTH)
+        asks = self.asks.top(CHECKSUM_DEPTH)
+        parts = []
+        for i in range(max(len(bids), len(asks))):
+            if i < len(bids):
+                parts.append(bids[i][0])
+                parts.append(bids[i][1])
+            if i < len(asks):
+                parts.append(asks[i][0])
+                parts.append(asks[i][1])
+        crc = zlib.crc32(':'.join(parts).encode())
+        return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+    def best_bid(self):
+        level = self.bids.best()
+        return None if level is None else float(level[0])
+
+    def best_ask(self):
+        level = self.asks.best()
+        return None if level is None else float(level[0])
+
+    def mid(self):
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+    def depth_within(self, side, distance):
+        """side 为 'bids'/'asks'，返回距最优价 distance 比例以内的累计量"""
+        with self._lock:
+            return getattr(self, side).size_within(distance)
+
+    def queue_ahead(self, order_side, price):
+        """
+        以 price 挂单时排在前面的挂单量：买单看更高的买盘，卖单看更低的卖盘
+        用来判断 process_pair 算出的目标价前面还有多少挂单
+        """
+        with self._lock:
+            book_side = self.bids if order_side == 'buy' else self.asks
+            return book_side.size_better_than(price)
+
+
+class BookFeed(object):
+    """订阅多个交易对的订单簿，失效时自动重新订阅"""
+
+    def __init__(self, flag='0', channel='books', logger=None):
+        from okx.ws_client import WsClient
+
+        self.channel = channel
+        self.logger = logger
+        self.books = {}
+        self._resyncing = set()
+        self.ws = WsClient.public(flag, on_message=self._on_message, on_disconnect=self._on_disconnect)
+
+    def start(self):
+        self.ws.start()
+
+    def stop(self):
+        self.ws.stop()
+
+    def subscribe(self, instIds):
+        for instId in instIds:
+            self.books.setdefault(instId, OrderBook(instId))
+        self.ws.subscribe([{'channel': self.channel, 'instId': instId} for instId in instIds])
+
+    def unsubscribe(self, instIds):
+        self.ws.unsubscribe([{'channel': self.channel, 'instId': instId} for instId in instIds])
+        for instId in instIds:
+            self.books.pop(instId, None)
+
+    def get(self, instId):
+        """返回有效的订单簿，没有或正在重新同步时返回 None"""
+        book = self.books.get(instId)
+        return book if book is not None and book.valid else None
+
+    def _on_disconnect(self):
+        for book in self.books.values():
+            book.valid = False
+
+    def _on_message(self, msg):
+        if 'data' not in msg:
+            return
+        instId = msg['arg'].get('instId')
+        book = self.books.get(instId)
+        if book is None:
+            return
+        action = msg.get('action')
+        if instId in self._resyncing and action == 'update':
+            return  # 等待重新订阅后的快照
+        for data in msg['data']:
+            if not book.apply(data, action):
+                if self.logger:
+                    self.logger.warning(f"{instId} 订单簿校验失败，重新订阅")
+                self._resync(instId)
+                return
+        self._resyncing.discard(instId)
+
+    def _resync(self, instId):
+        self._resyncing.add(instId)
+        arg = [{'channel': self.channel, 'instId': instId}]
+        try:
+            self.ws.send({'op': 'unsubscribe', 'args': arg})
+            self.ws.send({'op': 'subscribe', 'args': arg})
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"{instId} 订单簿重新订阅失败: {e}")
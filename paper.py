@@ -0,0 +1,427 @@
+"""
+模拟盘（paper trading）
+
+PaperExchange 用实盘的逐笔成交（trades 频道）撮合模拟挂单，不向交易所发送任何订单。
+PaperAccount 实现引擎用到的 TradeAPI / AccountAPI 接口（下单、批量下单、改单、撤单、挂单查询、
+持仓查询、设置杠杆、cancel-all-after），响应格式与交易所一致，所以引擎、OMS、下单通道不需要任何改动。
+
+撮合模型（限价单只做 maker）：
+- 挂单时记录同价位已有的挂单量（需要启用 use_orderbook），作为排在前面的队列；
+- 逐笔成交价格穿过挂单价（买单: 成交价 < 挂单价）时全部成交；
+- 成交价等于挂单价时先消耗前方队列，剩余的成交量才给模拟挂单成交；
+- 没有逐笔成交推送时，引擎每个周期用最新价调用 on_price()，只撮合被穿过的挂单。
+
+所有账户的挂单按交易对、方向放在同一个按价格排序的数组里，每笔成交只二分定位并处理被穿过的挂单，
+因此在同一个行情上运行上百个账户/交易对配置，CPU 开销只与实际成交的挂单数有关。
+"""
+import bisect
+import itertools
+import threading
+import time
+
+# 51016: clOrdId 重复；51603: 订单不存在；51400: 撤单失败（订单已成交或已撤销）
+DUPLICATE_CLORDID = '51016'
+ORDER_NOT_EXIST = '51603'
+CANCEL_FAILED = '51400'
+
+
+def _ok(data):
+    return {'code': '0', 'msg': '', 'data': data}
+
+
+def _result(order, s_code='0', s_msg=''):
+    return {'ordId': order.ordId if order else '', 'clOrdId': order.clOrdId if order else '',
+            'tag': '', 'sCode': s_code, 'sMsg': s_msg}
+
+
+class PaperOrder(object):
+
+    __slots__ = ('account', 'ordId', 'clOrdId', 'instId', 'side', 'posSide', 'px', 'sz', 'filled_sz', 'fee',
+                 'queue', 'state', 'key', 'cTime', 'uTime')
+
+    def __init__(self, account, ordId, clOrdId, instId, side, posSide, px, sz, queue):
+        self.account = account
+        self.ordId = ordId
+        self.clOrdId = clOrdId
+        self.instId = instId
+        self.side = side
+        self.posSide = posSide
+        self.px = px
+        self.sz = sz
+        self.filled_sz = 0.0
+        self.fee = 0.0
+        self.queue = queue  # 排在前面的挂单量
+        self.state = 'live'
+        self.key = None  # 在 _BookSide 中的排序键
+        self.cTime = self.uTime = int(time.time() * 1000)
+
+    def to_msg(self, fill=None):
+        """
+        与私有 WebSocket orders 频道 / REST 订单查询相同的字段
+        :param fill: 本次成交 (tradeId, 张数, 手续费, 已实现盈亏)
+        """
+        msg = {'instId': self.instId, 'ordId': self.ordId, 'clOrdId': self.clOrdId, 'side': self.side,
+               'posSide': self.posSide, 'ordType': 'limit', 'px': _fmt(self.px), 'sz': _fmt(self.sz),
+               'accFillSz': _fmt(self.filled_sz), 'avgPx': _fmt(self.px) if self.filled_sz else '',
+               'fillSz': '0', 'fillPx': '', 'fee': _fmt(-self.fee),
+               'state': self.state, 'cTime': str(self.cTime), 'uTime': str(self.uTime)}
+        if fill is not None:
+            trade_id, fill_sz, fee, pnl = fill
+            msg.update(tradeId=str(trade_id), fillSz=_fmt(fill_sz), fillPx=_fmt(self.px), fillFee=_fmt(-fee),
+                       fillPnl=_fmt(pnl), fillTime=str(self.uTime))
+        return msg
+
+
+def _fmt(value):
+    return format(value, '.12g')
+
+
+class _BookSide(object):
+    """一个交易对一侧的模拟挂单，按“越靠前越先成交”排序；买单键为 (-px, 序号)，卖单为 (px, 序号)"""
+
+    __slots__ = ('is_bid', 'keys', 'orders')
+
+    def __init__(self, is_bid):
+        self.is_bid = is_bid
+        self.keys = []
+        self.orders = {}
+
+    def add(self, order, seq):
+        order.key = (-order.px if self.is_bid else order.px, seq)
+        bisect.insort(self.keys, order.key)
+        self.orders[order.key] = order
+
+    def remove(self, order):
+        index = bisect.bisect_left(self.keys, order.key)
+        if index < len(self.keys) and self.keys[index] == order.key:
+            del self.keys[index]
+        self.orders.pop(order.key, None)
+
+    def crossed(self, price, inclusive):
+        """价格不差于 price 的挂单（inclusive 为 False 时只取严格穿过的）"""
+        bound = -price if self.is_bid else price
+        end = bisect.bisect_right(self.keys, (bound, float('inf'))) if inclusive else \
+            bisect.bisect_left(self.keys, (bound, -1))
+        return [self.orders[key] for key in self.keys[:end]]
+
+
+class Position(object):
+
+    __slots__ = ('pos', 'avg_px', 'realized', 'fee')
+
+    def __init__(self):
+        self.pos = 0.0  # 张数
+        self.avg_px = 0.0
+        self.realized = 0.0  # 已实现盈亏（不含手续费）
+        self.fee = 0.0
+
+
+class PaperAccount(object):
+    """一个模拟账户；同时充当引擎的 trade_api 和 account_api"""
+
+    def __init__(self, exchange, name):
+        self.exchange = exchange
+        self.name = name
+        self.orders = {}  # ordId -> PaperOrder（含已结束的订单）
+        self.by_clOrdId = {}
+        self.positions = {}  # (instId, posSide) -> Position
+        self.on_order = None  # 订单状态变化回调，参数与私有 WebSocket 推送的订单相同
+        self.on_fill = None
+
+    # ---- TradeAPI ----
+
+    def place_order(self, instId, tdMode, side, ordType, sz, px='', posSide='', clOrdId='', reduceOnly='', **kwargs):
+        return self.exchange.place(self, instId, side, ordType, sz, px, posSide or 'net', clOrdId)
+
+    def place_multiple_orders(self, orders_data):
+        data = []
+        for order in orders_data:
+            response = self.exchange.place(self, order['instId'], order['side'], order['ordType'], order['sz'],
+                                           order.get('px', ''), order.get('posSide') or 'net',
+                                           order.get('clOrdId', ''))
+            data.extend(response['data'])
+        return _ok(data)
+
+    def amend_order(self, instId, ordId='', clOrdId='', newPx='', newSz='', cxlOnFail='', **kwargs):
+        return self.exchange.amend(self, self._find(ordId, clOrdId), newPx, newSz)
+
+    def cancel_order(self, instId, ordId='', clOrdId=''):
+        return self.exchange.cancel(self, self._find(ordId, clOrdId))
+
+    def cancel_multiple_orders(self, orders_data):
+        data = []
+        for order in orders_data:
+            response = self.exchange.cancel(self, self._find(order.get('ordId', ''), order.get('clOrdId', '')))
+            data.extend(response['data'])
+        return _ok(data)
+
+    def cancel_all_after(self, timeOut='', tag=''):
+        return _ok([{'triggerTime': '0', 'ts': str(int(time.time() * 1000))}])
+
+    def get_order_list(self, instType='', uly='', instId='', ordType='', state='', after='', before='', limit='',
+                       instFamily=''):
+        # ordId 递增，新的在前；after 为上一页最后一个 ordId
+        with self.exchange.lock:
+            orders = [o for o in self.orders.values() if o.state in ('live', 'partially_filled')
+                      and (not instId or o.instId == instId)]
+        orders.sort(key=lambda o: int(o.ordId), reverse=True)
+        if after:
+            orders = [o for o in orders if int(o.ordId) < int(after)]
+        return _ok([o.to_msg() for o in orders[:int(limit or 100)]])
+
+    def get_orders(self, instId, ordId='', clOrdId=''):
+        order = self._find(ordId, clOrdId)
+        if order is None:
+            return {'code': ORDER_NOT_EXIST, 'msg': 'Order does not exist', 'data': []}
+        return _ok([order.to_msg()])
+
+    # ---- AccountAPI ----
+
+    def get_positions(self, instType='', instId='', posId=''):
+        data = []
+        with self.exchange.lock:
+            for (pos_instId, posSide), position in self.positions.items():
+                if instId and pos_instId != instId:
+                    continue
+                last = self.exchange.last_prices.get(pos_instId, position.avg_px)
+                data.append({'instId': pos_instId, 'posSide': posSide, 'pos': _fmt(position.pos),
+                             'avgPx': _fmt(position.avg_px), 'last': _fmt(last),
+                             'upl': _fmt(self.exchange.unrealized(pos_instId, posSide, position, last)),
+                             'realizedPnl': _fmt(position.realized - position.fee), 'fee': _fmt(-position.fee)})
+        return _ok(data)
+
+    def set_leverage(self, **kwargs):
+        return _ok([{'lever': kwargs.get('lever'), 'instId': kwargs.get('instId'),
+                     'mgnMode': kwargs.get('mgnMode'), 'posSide': kwargs.get('posSide', '')}])
+
+    # ---- 统计 ----
+
+    def summary(self):
+        """{'realized', 'fee', 'unrealized', 'fills', 'positions'}，盈亏单位为 USDT"""
+        realized = fee = unrealized = 0.0
+        open_positions = 0
+        with self.exchange.lock:
+            for (instId, posSide), position in self.positions.items():
+                realized += position.realized
+                fee += position.fee
+                if position.pos:
+                    open_positions += 1
+                    last = self.exchange.last_prices.get(instId, position.avg_px)
+                    unrealized += self.exchange.unrealized(instId, posSide, position, last)
+            fills = sum(1 for o in self.orders.values() if o.filled_sz)
+        return {'realized': realized, 'fee': fee, 'unrealized': unrealized, 'fills': fills,
+                'positions': open_positions}
+
+    def _find(self, ordId, clOrdId):
+        if ordId:
+            return self.orders.get(ordId)
+        return self.by_clOrdId.get(clOrdId)
+
+
+class PaperExchange(object):
+    """
+    :param ct_val: ct_val(instId) -> 合约面值，用于计算盈亏和手续费
+    :param book: book(instId) -> orderbook.OrderBook 或 None，用于估计挂单的队列位置
+    :param maker_fee: maker 手续费率
+    """
+
+    def __init__(self, ct_val=None, book=None, maker_fee=0.0002, logger=None):
+        self.ct_val = ct_val or (lambda instId: 1.0)
+        self.book = book
+        self.maker_fee = maker_fee
+        self.logger = logger
+        self.lock = threading.RLock()
+        self.accounts = {}
+        self.books = {}  # (instId, side) -> _BookSide
+        self.last_prices = {}
+        self.trades = 0
+        self._ids = itertools.count(1)
+        # 成交编号跨进程重启不重复（成交分析按 tradeId 去重）
+        self._trade_ids = itertools.count(int(time.time() * 1000) * 1000)
+
+    def account(self, name):
+        with self.lock:
+            account = self.accounts.get(name)
+            if account is None:
+                account = self.accounts[name] = PaperAccount(self, name)
+            return account
+
+    def _side(self, instId, side):
+        book_side = self.books.get((instId, side))
+        if book_side is None:
+            book_side = self.books[(instId, side)] = _BookSide(side == 'buy')
+        return book_side
+
+    def _queue(self, instId, side, px):
+        book = self.book(instId) if self.book is not None else None
+        if book is None:
+            return 0.0
+        book_side = book.bids if side == 'buy' else book.asks
+        level = book_side.levels.get(-px if side == 'buy' else px)
+        return level[2] if level else 0.0
+
+    # ---- 订单 ----
+
+    def place(self, account, instId, side, ordType, sz, px, posSide, clOrdId):
+        if ordType != 'limit' or not px:
+            return {'code': '1', 'msg': 'paper trading only supports limit orders',
+                    'data': [_result(None, '51000', 'paper trading only supports limit orders')]}
+        with self.lock:
+            if clOrdId and clOrdId in account.by_clOrdId:
+                return {'code': '1', 'msg': '', 'data': [_result(account.by_clOrdId[clOrdId], DUPLICATE_CLORDID,
+                                                                 'Duplicated clOrdId')]}
+            price = float(px)
+            seq = next(self._ids)
+            order = PaperOrder(account, str(seq), clOrdId, instId, side, posSide, price, float(sz),
+                               self._queue(instId, side, price))
+            account.orders[order.ordId] = order
+            if clOrdId:
+                account.by_clOrdId[clOrdId] = order
+            self._side(instId, side).add(order, seq)
+        self._notify(order)
+        return _ok([_result(order)])
+
+    def amend(self, account, order, newPx, newSz):
+        with self.lock:
+            if order is None or order.state not in ('live', 'partially_filled'):
+                return {'code': '1', 'msg': '', 'data': [_result(order, ORDER_NOT_EXIST, 'Order does not exist')]}
+            book_side = self._side(order.instId, order.side)
+            if newSz:
+                order.sz = float(newSz)
+            if newPx and float(newPx) != order.px:
+                # 改价后重新排队
+                book_side.remove(order)
+                order.px = float(newPx)
+                order.queue = self._queue(order.instId, order.side, order.px)
+                book_side.add(order, next(self._ids))
+            order.uTime = int(time.time() * 1000)
+        self._notify(order)
+        return _ok([_result(order)])
+
+    def cancel(self, account, order):
+        with self.lock:
+            if order is None or order.state not in ('live', 'partially_filled'):
+                return {'code': '1', 'msg': '', 'data': [_result(order, CANCEL_FAILED, 'Order does not exist')]}
+            self._side(order.instId, order.side).remove(order)
+            order.state = 'canceled'
+            order.uTime = int(time.time() * 1000)
+        self._notify(order)
+        return _ok([_result(order)])
+
+    # ---- 撮合 ----
+
+    def on_trade(self, instId, px, sz, side):
+        """
+        一笔实盘成交
+        :param side: 主动方方向；主动卖出撮合模拟买单，主动买入撮合模拟卖单
+        """
+        fills = []
+        with self.lock:
+            self.trades += 1
+            self.last_prices[instId] = px
+            book_side = self.books.get((instId, 'buy' if side == 'sell' else 'sell'))
+            if book_side is None or not book_side.keys:
+                return
+            remaining = sz
+            for order in book_side.crossed(px, inclusive=True):
+                if order.px != px:
+                    fills.append((order, order.sz - order.filled_sz))
+                    continue
+                # 成交价等于挂单价：先消耗前方队列
+                if order.queue >= remaining:
+                    order.queue -= remaining
+                    remaining = 0.0
+                    continue
+                remaining -= order.queue
+                order.queue = 0.0
+                fill = min(remaining, order.sz - order.filled_sz)
+                remaining -= fill
+                if fill > 0:
+                    fills.append((order, fill))
+            fills = [(order, self._fill(book_side, order, fill)) for order, fill in fills]
+        for order, fill in fills:
+            self._notify(order, fill)
+
+    def on_price(self, instId, price):
+        """只有最新价时（没有逐笔成交），只撮合价格被严格穿过的挂单"""
+        fills = []
+        with self.lock:
+            self.last_prices[instId] = price
+            for side in ('buy', 'sell'):
+                book_side = self.books.get((instId, side))
+                if book_side is None or not book_side.keys:
+                    continue
+                for order in book_side.crossed(price, inclusive=False):
+                    fills.append((order, self._fill(book_side, order, order.sz - order.filled_sz)))
+        for order, fill in fills:
+            self._notify(order, fill)
+
+    def _fill(self, book_side, order, fill):
+        """:return: (tradeId, 张数, 手续费, 已实现盈亏)"""
+        order.filled_sz += fill
+        order.uTime = int(time.time() * 1000)
+        if order.filled_sz >= order.sz - 1e-12:
+            order.state = 'filled'
+            book_side.remove(order)
+        else:
+            order.state = 'partially_filled'
+        ct_val = self.ct_val(order.instId)
+        fee = order.px * fill * ct_val * self.maker_fee
+        order.fee += fee
+        position = order.account.positions.get((order.instId, order.posSide))
+        if position is None:
+            position = order.account.positions[(order.instId, order.posSide)] = Position()
+        position.fee += fee
+        # long: buy 开仓 sell 平仓；short: sell 开仓 buy 平仓
+        opening = (order.posSide == 'short') == (order.side == 'sell')
+        if opening:
+            total = position.pos + fill
+            position.avg_px = (position.avg_px * position.pos + order.px * fill) / total
+            position.pos = total
+            pnl = 0.0
+        else:
+            closed = min(fill, position.pos)
+            direction = 1 if order.posSide == 'long' else -1
+            pnl = (order.px - position.avg_px) * closed * ct_val * direction
+            position.realized += pnl
+            position.pos -= closed
+        return next(self._trade_ids), fill, fee, pnl
+
+    def unrealized(self, instId, posSide, position, last):
+        direction = 1 if posSide == 'long' else -1
+        return (last - position.avg_px) * position.pos * self.ct_val(instId) * direction
+
+    def _notify(self, order, fill=None):
+        account = order.account
+        msg = order.to_msg(fill)
+        if account.on_order is not None:
+            account.on_order(msg)
+        if fill is not None and account.on_fill is not None:
+            account.on_fill(msg)
+
+
+class TradeFeed(object):
+    """订阅 trades 频道，把逐笔成交交给 PaperExchange.on_trade"""
+
+    def __init__(self, exchange, flag='0', logger=None):
+        from okx.ws_client import WsClient
+
+        self.exchange = exchange
+        self.logger = logger
+        self.ws = WsClient.public(flag, on_message=self._on_message)
+
+    def start(self):
+        self.ws.start()
+
+    def stop(self):
+        self.ws.stop()
+
+    def subscribe(self, instIds):
+        self.ws.subscribe([{'channel': 'trades', 'instId': instId} for instId in instIds])
+
+    def unsubscribe(self, instIds):
+        self.ws.unsubscribe([{'channel': 'trades', 'instId': instId} for instId in instIds])
+
+    def _on_message(self, msg):
+        for trade in msg.get('data') or ():
+            self.exchange.on_trade(trade['instId'], float(trade['px']), float(trade['sz']), trade['side'])
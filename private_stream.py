@@ -0,0 +1,176 @@
+"""
+私有 WebSocket 订单/持仓流
+
+订阅 orders / positions / account 频道，在本地维护自己的挂单簿和持仓，策略读取挂单、成交、
+持仓时不再发起 REST 请求。orders 频道只推送变化，不推送已有挂单，因此每次(重新)连接成功后
+用一次分页的 get_order_list 和一次 get_positions 重建当前挂单和持仓（断线期间成交/撤销的挂单、
+平掉的持仓不会残留），之后全部由推送增量维护。
+"""
+import collections
+import threading
+
+from okx.exceptions import OkxRequestException
+from okx.paginate import paginate
+from okx.ws_client import WsClient
+
+# 订单结束状态，收到后从挂单簿移除
+FINAL_STATES = ('filled', 'canceled', 'mmp_canceled')
+# 本地保留的订单数量上限（含已结束的订单，用于丢弃乱序到达的旧推送）
+MAX_TRACKED_ORDERS = 10000
+
+
+class PrivateStream(object):
+
+    def __init__(self, api_key, api_secret_key, passphrase, flag='0', trade_api=None, account_api=None,
+                 instType='SWAP', logger=None, on_fill=None, on_order=None, max_fills=1000):
+        self.instType = instType
+        self.trade_api = trade_api
+        self.account_api = account_api
+        self.logger = logger
+        self.on_fill = on_fill
+        self.on_order = on_order  # 每条被采纳的订单推送都会回调，用于更新 OMS
+        self.ready = False
+
+        self._lock = threading.Lock()
+        self._orders = collections.OrderedDict()  # ordId -> 订单
+        self._live_by_inst = collections.defaultdict(dict)  # instId -> {ordId: 订单}
+        self._positions = {}  # (instId, posSide) -> 持仓
+        self._balances = {}  # ccy -> 账户币种详情
+        self.fills = collections.deque(maxlen=max_fills)  # 最近成交
+
+        self.ws = WsClient.private(api_key, api_secret_key, passphrase, flag, on_message=self._on_message,
+                                   on_connect=self._on_connect, on_disconnect=self._on_disconnect)
+        self.ws.subscribe([
+            {'channel': 'orders', 'instType': instType},
+            {'channel': 'positions', 'instType': instType},
+            {'channel': 'account'},
+        ])
+
+    def start(self):
+        self.ws.start()
+
+    def stop(self):
+        self.ws.stop()
+
+    # ---- 查询接口（策略线程调用，全部为本地读取） ----
+
+    def live_orders(self, instId):
+        with self._lock:
+            return list(self._live_by_inst.get(instId, {}).values())
+
+    def all_live_orders(self):
+        with self._lock:
+            return {instId: list(orders.values()) for instId, orders in self._live_by_inst.items() if orders}
+
+    def get_order(self, ordId):
+        return self._orders.get(ordId)
+
+    def position(self, instId, posSide):
+        return self._positions.get((instId, posSide))
+
+    def positions(self):
+        with self._lock:
+            return dict(self._positions)
+
+    def balance(self, ccy='USDT'):
+        return self._balances.get(ccy)
+
+    # ---- 推送处理（WebSocket 线程） ----
+
+    def _on_connect(self):
+        try:
+            self._bootstrap_orders()
+            self._bootstrap_positions()
+            self.ready = True
+            if self.logger:
+                self.logger.info("私有WebSocket已连接，订单/持仓改由推送维护")
+        except Exception as e:
+            if self.logger:
+                self.logger.error(f"私有WebSocket补齐挂单失败: {e}")
+
+    def _on_disconnect(self):
+        self.ready = False
+        # 断线期间的持仓变化收不到推送，重连后整体重建
+        with self._lock:
+            self._positions = {}
+        if self.logger:
+            self.logger.warning("私有WebSocket断开，挂单查询回退到REST")
+
+    def _bootstrap_orders(self):
+        if self.trade_api is None:
+            return
+        orders = list(paginate(self.trade_api.get_order_list, instType=self.instType))
+        # 挂单簿以快照为准整体替换：断线期间结束的挂单不在快照里，合并会让它们一直留着
+        live_by_inst = collections.defaultdict(dict)
+        with self._lock:
+            for order in orders:
+                self._apply_order(order)
+                current = self._orders.get(order['ordId'], order)
+                if current['state'] not in FINAL_STATES:
+                    live_by_inst[current['instId']][current['ordId']] = current
+            self._live_by_inst = live_by_inst
+
+    def _bootstrap_positions(self):
+        if self.account_api is None:
+            return
+        response = self.account_api.get_positions(instType=self.instType)
+        if response.get('code') != '0':
+            raise OkxRequestException(f"get_positions failed: {response.get('code')} {response.get('msg')}")
+        positions = {}
+        for pos in response.get('data') or []:
+            if pos.get('pos') not in ('', '0', None):
+                positions[(pos['instId'], pos.get('posSide', 'net'))] = pos
+        with self._lock:
+            self._positions = positions
+
+    def _on_message(self, msg):
+        if 'data' not in msg:
+            event = msg.get('event')
+            if event == 'error' and self.logger:
+                self.logger.error(f"私有WebSocket错误: {msg.get('code', '')} {msg.get('msg')}")
+            return
+        channel = msg.get('arg', {}).get('channel')
+        if channel == 'orders':
+            accepted = []
+            with self._lock:
+                for order in msg['data']:
+                    if self._apply_order(order):
+                        accepted.append(order)
+            if self.on_order:
+                for order in accepted:
+                    self.on_order(order)
+            for order in accepted:
+                if order.get('fillSz') in ('', '0', None):
+                    continue
+                self.fills.append(order)
+                if self.on_fill:
+                    self.on_fill(order)
+        elif channel == 'positions':
+            with self._lock:
+                for pos in msg['data']:
+                    key = (pos['instId'], pos.get('posSide', 'net'))
+                    if pos.get('pos') in ('', '0'):
+                        self._positions.pop(key, None)
+                    else:
+                        self._positions[key] = pos
+        elif channel == 'account':
+            for account in msg['data']:
+                for detail in account.get('details', []):
+                    self._balances[detail['ccy']] = detail
+
+    def _apply_order(self, order):
+        """按 uTime 合并订单更新，返回该更新是否被采纳（旧的推送会被丢弃）"""
+        ordId = order['ordId']
+        current = self._orders.get(ordId)
+        if current is not None and int(current.get('uTime') or 0) > int(order.get('uTime') or 0):
+            return False
+        self._orders[ordId] = order
+        self._orders.move_to_end(ordId)
+        if len(self._orders) > MAX_TRACKED_ORDERS:
+            self._orders.popitem(last=False)
+        live = self._live_by_inst[order['instId']]
+        if order['state'] in FINAL_STATES:
+            live.pop(ordId, None)
+        else:
+            live[ordId] = order
+        return True
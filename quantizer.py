@@ -0,0 +1,148 @@
+"""
+价格/数量量化器
+
+按合约的 tickSz / lotSz 预先计算整数步长与小数位数，之后每次取整只做一次乘以 10**小数位数
+的浮点乘法和整数运算，不再像 round_price_to_tick 那样每次调用都格式化 tick_size 计算小数位。
+不用 value / tick 的浮点除法：0.0001 等步长本身不能精确表示，步数大时商会偏离整数好几个 1e-9，
+已经在 tick 上的价格会被向下多取一个 tick。
+下单路径与回测/模拟盘共用同一套取整规则：
+    多单(买)价格向下取整，空单(卖)价格向上取整，数量一律向下取整到 lotSz。
+"""
+import math
+
+# 浮点误差容忍度（相对值，约 4 个 ulp），value * 10**decimals 与最近整数的差不超过
+# 其绝对值乘以该系数时视为正好落在最小单位上；随数值大小增长，不会像固定的绝对误差那样在大数值下失效
+_SNAP_REL = 2.0 ** -50
+
+ROUND_NEAREST = 'nearest'
+ROUND_DOWN = 'down'
+ROUND_UP = 'up'
+
+
+def _parse_step(step):
+    """
+    将 tickSz/lotSz 字符串拆成 (整数步长, 小数位数)，例如 '0.0001' -> (1, 4), '0.25' -> (25, 2)
+    :param step: 交易所返回的步长字符串（也接受 int/float）
+    :return: (units, decimals)
+    """
+    if not isinstance(step, str):
+        step = repr(float(step)) if isinstance(step, float) else str(step)
+    step = step.strip()
+    if 'e' in step or 'E' in step:
+        step = f"{float(step):.12f}"
+    if '.' in step:
+        int_part, frac_part = step.split('.', 1)
+        frac_part = frac_part.rstrip('0')
+    else:
+        int_part, frac_part = step, ''
+    decimals = len(frac_part)
+    units = int((int_part or '0') + frac_part)
+    if units <= 0:
+        raise ValueError(f"Invalid step size: {step}")
+    return units, decimals
+
+
+class Quantizer(object):
+    """单个步长（价格或数量）的整数量化"""
+
+    __slots__ = ('step', 'units', 'decimals', 'scale', '_fmt')
+
+    def __init__(self, step):
+        self.units, self.decimals = _parse_step(step)
+        self.scale = 10 ** self.decimals
+        self.step = self.units / self.scale
+        self._fmt = '%%.%df' % self.decimals
+
+    def _scaled(self, value):
+        """
+        value 换算成最小单位（10**-decimals）的个数
+        :return: (整数个数, 是否正好落在最小单位上)；不在单位上时返回向下取整的个数
+        """
+        x = value * self.scale
+        n = round(x)
+        if abs(x - n) <= abs(x) * _SNAP_REL:
+            return n, True
+        return math.floor(x), False
+
+    def floor_steps(self, value):
+        n, _ = self._scaled(value)
+        return n // self.units
+
+    def ceil_steps(self, value):
+        n, exact = self._scaled(value)
+        if not exact:
+            n += 1
+        return -(-n // self.units)
+
+    def to_steps(self, value, mode=ROUND_NEAREST):
+        """将数值换算成整数步数"""
+        if mode == ROUND_DOWN:
+            return self.floor_steps(value)
+        if mode == ROUND_UP:
+            return self.ceil_steps(value)
+        n, exact = self._scaled(value)
+        return int(round((n if exact else value * self.scale) / self.units))
+
+    def format_steps(self, steps):
+        """
+        将整数步数格式化为交易所接受的字符串
+        整数相除是正确舍入的，再按小数位数格式化即可还原精确的十进制表示（有效位数不超过15位）
+        """
+        return self._fmt % (steps * self.units / self.scale)
+
+    def round(self, value, mode=ROUND_NEAREST):
+        """取整并返回字符串"""
+        return self.format_steps(self.to_steps(value, mode))
+
+    def round_float(self, value, mode=ROUND_NEAREST):
+        """取整并返回浮点数（回测/模拟撮合使用）"""
+        return self.to_steps(value, mode) * self.units / self.scale
+
+
+class InstrumentQuantizer(object):
+    """合约级量化器，由 get_instruments 返回的合约信息构建"""
+
+    __slots__ = ('instId', 'price', 'size', 'min_size')
+
+    def __init__(self, instId, tick_size, lot_size='1', min_size=None):
+        self.instId = instId
+        self.price = Quantizer(tick_size)
+        self.size = Quantizer(lot_size)
+        self.min_size = float(min_size) if min_size not in (None, '') else self.size.step
+
+    @classmethod
+    def from_instrument(cls, instrument):
+        return cls(instrument['instId'], instrument['tickSz'], instrument.get('lotSz') or '1',
+                   instrument.get('minSz'))
+
+    def price_for_side(self, price, side):
+        """按方向取整：买单向下（不高于目标价），卖单向上（不低于目标价）"""
+        price_q = self.price
+        steps = price_q.floor_steps(price) if side == 'buy' else price_q.ceil_steps(price)
+        return price_q.format_steps(steps)
+
+    def price_float_for_side(self, price, side):
+        price_q = self.price
+        steps = price_q.floor_steps(price) if side == 'buy' else price_q.ceil_steps(price)
+        return steps * price_q.units / price_q.scale
+
+    def round_size(self, size):
+        """数量向下取整到 lotSz，不足 minSz 时返回 None"""
+        steps = self.size.floor_steps(float(size))
+        if steps * self.size.units / self.size.scale < self.min_size:
+            return None
+        return self.size.format_steps(steps)
+
+
+_quantizer_cache = {}
+
+
+def get_quantizer(instrument):
+    """按 instId 缓存量化器；合约的 tickSz/lotSz/minSz 变化时自动重建"""
+    instId = instrument['instId']
+    key = (instrument['tickSz'], instrument.get('lotSz'), instrument.get('minSz'))
+    cached = _quantizer_cache.get(instId)
+    if cached is None or cached[0] != key:
+        cached = (key, InstrumentQuantizer.from_instrument(instrument))
+        _quantizer_cache[instId] = cached
+    return cached[1]
@@ -0,0 +1,122 @@
+"""
+行情驱动的挂单重定位
+
+process_pair 每 monitor_interval 秒才重新计算一次目标价，期间价格向挂单移动时挂单偏移就过时了。
+这里订阅 tickers 频道，每条推送只做一次字典查找和一次浮点比较：当最新价相对挂单时的锚定价
+偏移超过 selected_value 的一定比例时，才触发该交易对的改单，其余推送直接丢弃。
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RepositionTrigger(object):
+    """
+    每个交易对一个触发器：(锚定价, 触发阈值(绝对价差), 多单价格因子, 空单价格因子, selected_value)
+    触发后自动解除，避免同一段行情重复触发；on_trigger 返回真值（改单后仍有挂单）时由触发器以触发价为锚
+    重新 arm。改单期间调用方重新 arm 或 disarm 过（新一轮挂单用的是新因子），就不再用触发时的旧因子覆盖
+    """
+
+    def __init__(self, on_trigger, fraction=0.25, min_interval=1.0, max_workers=4):
+        self.on_trigger = on_trigger  # on_trigger(instId, price, long_factor, short_factor, selected_value) -> bool
+        self.fraction = fraction
+        self.min_interval = min_interval
+        self._arms = {}
+        self._generation = {}  # instId -> arm/disarm 次数，判断改单期间是否被重新 arm 过
+        self._lock = threading.Lock()
+        self._last_fire = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reposition')
+        self.ticks = 0
+        self.fired = 0
+        self.closed = False
+
+    def arm(self, instId, anchor_price, selected_value, long_factor=None, short_factor=None, fraction=None):
+        """
+        :param anchor_price: 挂单时使用的价格
+        :param selected_value: process_pair 计算出的偏移百分比
+        :param long_factor/short_factor: 多/空单价格因子，None 表示该方向没有挂单
+        """
+        with self._lock:
+            self._generation[instId] = self._generation.get(instId, 0) + 1
+            if long_factor is None and short_factor is None:
+                self._arms.pop(instId, None)
+                return
+            threshold = anchor_price * selected_value / 100 * (self.fraction if fraction is None else fraction)
+            self._arms[instId] = (anchor_price, threshold, long_factor, short_factor, selected_value)
+
+    def disarm(self, instId):
+        with self._lock:
+            self._generation[instId] = self._generation.get(instId, 0) + 1
+            self._arms.pop(instId, None)
+
+    def on_tick(self, instId, price):
+        if self.closed:
+            return
+        self.ticks += 1
+        arm = self._arms.get(instId)
+        if arm is None or abs(price - arm[0]) <= arm[1]:
+            return
+        now = time.monotonic()
+        if now - self._last_fire.get(instId, 0.0) < self.min_interval:
+            return
+        with self._lock:
+            if self._arms.get(instId) is not arm:
+                return  # 刚被重新 arm / disarm
+            del self._arms[instId]
+            generation = self._generation.get(instId, 0)
+        self._last_fire[instId] = now
+        try:
+            self._executor.submit(self._fire, instId, price, arm, generation)
+        except RuntimeError:
+            # shutdown() 与这条推送同时发生，执行器已关闭
+            return
+        self.fired += 1
+
+    def _fire(self, instId, price, arm, generation):
+        anchor_price, threshold, long_factor, short_factor, selected_value = arm
+        if not self.on_trigger(instId, price, long_factor, short_factor, selected_value):
+            return
+        with self._lock:
+            if self.closed or self._generation.get(instId, 0) != generation:
+                return
+            self._arms[instId] = (price, threshold * price / anchor_price, long_factor, short_factor, selected_value)
+
+    def shutdown(self, wait=True):
+        """不再触发；丢弃排队中的改单，wait 时等正在执行的改单结束（退出撤单前调用，避免撤单后又改出新挂单）"""
+        self.closed = True
+        self._arms.clear()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class TickerFeed(object):
+    """订阅 tickers 频道，把最新价交给回调（通常是 RepositionTrigger.on_tick）"""
+
+    def __init__(self, on_tick, flag='0', logger=None):
+        from okx.ws_client import WsClient
+
+        self.on_tick = on_tick
+        self.logger = logger
+        self.last_prices = {}
+        self.ws = WsClient.public(flag, on_message=self._on_message)
+
+    def start(self):
+        self.ws.start()
+
+    def stop(self):
+        self.ws.stop()
+
+    def subscribe(self, instIds):
+        self.ws.subscribe([{'channel': 'tickers', 'instId': instId} for instId in instIds])
+
+    def unsubscribe(self, instIds):
+        self.ws.unsubscribe([{'channel': 'tickers', 'instId': instId} for instId in instIds])
+
+    def _on_message(self, msg):
+        data = msg.get('data')
+        if not data:
+            return
+        for ticker in data:
+            instId = ticker['instId']
+            price = float(ticker['last'])
+            self.last_prices[instId] = price
+            self.on_tick(instId, price)
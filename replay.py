@@ -0,0 +1,50 @@
+"""
+回放录制的交易所数据
+
+配置 record_tape 运行引擎时，所有 REST 响应和 WebSocket 消息都写入录制文件（见 okx/tape.py）。
+本脚本把录制文件接回同一套引擎代码：不连接网络，请求按录制顺序返回当时的响应，
+用来复现生产环境中某个周期的问题，也可以作为没有网络开销的性能测试输入。
+
+用法: python replay.py <录制文件> [策略名 ...] [--speed 倍速] [--config 配置文件]
+不指定 --speed 时不等待，按最快速度回放；--speed 1 按原始节奏回放。
+"""
+import argparse
+import time
+
+from engine import StrategyEngine
+from okx.tape import TapeReplay, install
+
+# 回放时不发通知、不写状态日志和成交分析、不连接行情总线；其余配置与录制时相同
+REPLAY_OVERRIDES = {'feishu_webhook': '', 'journal': False, 'analytics': False, 'market_bus': None, 'record_tape': None}
+
+
+def replay(path, strategy_names=None, config_path='config.json', speed=None, max_cycles=None):
+    tape = TapeReplay(path, speed=speed)
+    install(tape)
+    engine = StrategyEngine(strategy_names, config_path=config_path, log_file='log/replay.log',
+                            logger_name='replay', overrides=REPLAY_OVERRIDES)
+    started = time.perf_counter()
+    engine.start()
+    cycles = 0
+    while not tape.exhausted and (max_cycles is None or cycles < max_cycles):
+        served = tape.served
+        engine.run_cycle()
+        cycles += 1
+        if tape.served == served:
+            # 本周期没有取到任何录制的响应，剩下的只有用不到的记录
+            break
+    elapsed = time.perf_counter() - started
+    engine.logger.info(f"回放结束: {cycles} 个周期, {tape.served} 个响应, 耗时 {elapsed:.3f}s "
+                       f"({tape.served / elapsed if elapsed else 0:.0f} 响应/秒)")
+    return engine
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='回放录制的交易所数据')
+    parser.add_argument('tape')
+    parser.add_argument('strategies', nargs='*')
+    parser.add_argument('--speed', type=float, default=None)
+    parser.add_argument('--config', default='config.json')
+    parser.add_argument('--cycles', type=int, default=None)
+    args = parser.parse_args()
+    replay(args.tape, args.strategies or None, args.config, args.speed, args.cycles)
@@ -0,0 +1,186 @@
+"""
+策略插件
+
+zhen.py 与 zhen_2.py 的区别只有两处：趋势过滤（双EMA+多根K线确认 / 单EMA）和
+价格/ATR 比值的计算方式，其余的行情、下单、撤单逻辑完全相同，由 engine.StrategyEngine 统一负责。
+策略只根据引擎传入的行情数据给出挂单信号，不发起任何请求，因此同一进程中增加策略不会增加行情请求。
+
+新增策略：继承 Strategy，实现 trend() 和 price_atr_ratio()，并在 STRATEGIES 中注册。
+"""
+import numpy as np
+
+import indicators
+from okx.candles import CLOSE
+
+
+class Bars(object):
+    """
+    一个交易对本周期的K线及派生指标，按需计算并缓存，同一周期内所有策略共用
+    :param klines: 新的在前的K线数组（或 get_candlesticks 返回的字符串列表）
+    """
+
+    def __init__(self, klines):
+        self.klines = np.asarray(klines, dtype=np.float64)
+        self._cache = {}
+
+    def _cached(self, key, compute):
+        value = self._cache.get(key)
+        if value is None:
+            value = self._cache[key] = compute()
+        return value
+
+    @property
+    def closes(self):
+        """收盘价列表，旧的在前"""
+        return self._cached('closes', lambda: self.klines[::-1, CLOSE].tolist())
+
+    def ema_series(self, period):
+        return self._cached(('ema', period), lambda: indicators.ema_series(self.closes, period))
+
+    def ema(self, period):
+        return self.ema_series(period)[-1] if self.closes else None
+
+    def atr(self, period=60):
+        return self._cached(('atr', period), lambda: indicators.atr(self.klines, period))
+
+    def average_amplitude(self, period=60):
+        return self._cached(('amplitude', period), lambda: indicators.average_amplitude(self.klines, period))
+
+
+class Signal(object):
+    """策略给出的挂单信号：是否允许挂多/空单，以及挂单偏移百分比 selected_value"""
+
+    __slots__ = ('allow_long', 'allow_short', 'selected_value')
+
+    def __init__(self, allow_long, allow_short, selected_value):
+        self.allow_long = allow_long
+        self.allow_short = allow_short
+        self.selected_value = selected_value
+
+    @property
+    def long_factor(self):
+        return 1 - self.selected_value / 100
+
+    @property
+    def short_factor(self):
+        return 1 + self.selected_value / 100
+
+
+class Strategy(object):
+    """
+    策略基类
+    name: 配置 strategies 中的名字；prefix: 该策略订单 clOrdId 的前缀，各策略之间不能互为前缀
+    """
+
+    name = None
+    prefix = None
+
+    def __init__(self, logger=None):
+        self.logger = logger
+
+    def log(self, message):
+        if self.logger:
+            self.logger.info(f"[{self.name}] {message}")
+
+    def warn(self, message):
+        if self.logger:
+            self.logger.warning(f"[{self.name}] {message}")
+
+    def trend(self, instId, pair_config, bars, mark_price):
+        """返回 (是否允许挂多单, 是否允许挂空单)"""
+        raise NotImplementedError
+
+    def price_atr_ratio(self, atr, mark_price):
+        raise NotImplementedError
+
+    def evaluate(self, instId, pair_config, bars, mark_price):
+        """计算挂单信号；数据不足时返回 None，本周期不处理该交易对"""
+        if not bars.closes:
+            self.warn(f"{instId} no close prices available.")
+            return None
+        allow_long, allow_short = self.trend(instId, pair_config, bars, mark_price)
+
+        atr = bars.atr()
+        price_atr_ratio = self.price_atr_ratio(atr, mark_price)
+        self.log(f"{instId} ATR: {atr}, 当前价格/ATR比值: {price_atr_ratio:.3f}")
+        average_amplitude = bars.average_amplitude()
+        self.log(f"{instId} ATR: {atr}, 平均振幅: {average_amplitude:.2f}%")
+
+        value_multiplier = pair_config.get('value_multiplier', 2)
+        selected_value = (average_amplitude + price_atr_ratio) / 2 * value_multiplier
+        return Signal(allow_long, allow_short, selected_value)
+
+
+class ZhenStrategy(Strategy):
+    """zhen.py：双EMA判断趋势，要求两线分离超过 min_ema_separation_pct，并由最近 trend_confirmation_candles 根K线确认"""
+
+    name = 'zhen'
+    prefix = 'zj1'
+
+    def trend(self, instId, pair_config, bars, mark_price):
+        min_ema_separation_pct = pair_config.get('min_ema_separation_pct', 0.001)
+        trend_confirmation_candles = pair_config.get('trend_confirmation_candles', 1)
+        ema_short_period = pair_config.get('ema_short_period')
+        ema_long_period = pair_config.get('ema_long_period')
+        closes = bars.closes
+
+        if ema_long_period == 0:
+            # 长期EMA周期为0表示不区分方向
+            self.log(f"{instId} ema_long_period is 0, allowing both long and short orders.")
+            return True, True
+        if ema_short_period is None or ema_long_period is None:
+            self.warn(f"{instId} ema_short_period or ema_long_period is not configured. No trend identified.")
+            return False, False
+        if ema_short_period >= ema_long_period:
+            self.warn(f"{instId} ema_short_period ({ema_short_period}) should be less than ema_long_period ({ema_long_period}). No trend identified via dual EMA.")
+            return False, False
+        if len(closes) < ema_long_period or len(closes) < trend_confirmation_candles:
+            self.warn(f"{instId} Not enough data for Dual EMA calculation or trend confirmation. Need {max(ema_long_period, trend_confirmation_candles)}, got {len(closes)}.")
+            return False, False
+
+        ema_short = bars.ema_series(ema_short_period)
+        ema_long = bars.ema_series(ema_long_period)
+        current_price = closes[-1]
+        current_ema_short = ema_short[-1]
+        current_ema_long = ema_long[-1]
+
+        # 当前K线要求分离度，历史K线只检查排列和价格位置
+        bullish = (current_price > current_ema_short > current_ema_long and
+                   (current_ema_short - current_ema_long) / current_ema_long > min_ema_separation_pct)
+        if bullish:
+            bullish = all(closes[-1 - i] > ema_short[-1 - i] > ema_long[-1 - i]
+                          for i in range(1, trend_confirmation_candles))
+        bearish = (current_price < current_ema_short < current_ema_long and
+                   (current_ema_long - current_ema_short) / current_ema_long > min_ema_separation_pct)
+        if bearish:
+            bearish = all(closes[-1 - i] < ema_short[-1 - i] < ema_long[-1 - i]
+                          for i in range(1, trend_confirmation_candles))
+
+        self.log(f"{instId} Dual EMA: Short({ema_short_period}): {current_ema_short:.6f}, Long({ema_long_period}): {current_ema_long:.6f}, Price: {current_price:.6f}. Bullish: {bullish}, Bearish: {bearish}")
+        return bullish, bearish
+
+    def price_atr_ratio(self, atr, mark_price):
+        return atr / mark_price
+
+
+class Zhen2Strategy(Strategy):
+    """zhen_2.py：收盘价在 EMA(ema, 默认240) 之上只挂多单，之下只挂空单"""
+
+    name = 'zhen_2'
+    prefix = 'zj2'
+
+    def trend(self, instId, pair_config, bars, mark_price):
+        ema_value = pair_config.get('ema', 240)
+        if ema_value == 0:
+            # ema值为0 不区分方向，两头都挂单
+            return True, True
+        ema = bars.ema(ema_value)
+        self.log(f"{instId} EMA60: {ema:.6f}, 当前价格: {mark_price:.6f}")
+        close = bars.closes[-1]
+        return close > ema, close < ema
+
+    def price_atr_ratio(self, atr, mark_price):
+        return (mark_price / atr) / 100
+
+
+STRATEGIES = {cls.name: cls for cls in (ZhenStrategy, Zhen2Strategy)}
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def order_ack(ordId, clOrdId, s_code='0'):
+    """REST response to a single order request, as place/amend/cancel return it"""
+    return {'code': '0' if s_code == '0' else '1', 'msg': '', 'data': [{'ordId': ordId, 'clOrdId': clOrdId,
+                                                                         'sCode': s_code, 'sMsg': ''}]}
+
+
+@pytest.fixture
+def ack():
+    return order_ack
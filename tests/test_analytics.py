@@ -0,0 +1,86 @@
+import time
+
+import pytest
+
+from analytics import FillAnalytics
+
+T0 = 1700000000000
+
+
+def push(trade_id, ts, side, sz, px, pnl='0', fee='-0.01', pos_side='long'):
+    return {'instId': 'BTC-USDT-SWAP', 'tradeId': trade_id, 'fillTime': str(ts), 'uTime': str(ts), 'side': side,
+            'posSide': pos_side, 'fillPx': str(px), 'fillSz': str(sz), 'fillFee': fee, 'fillPnl': pnl}
+
+
+@pytest.fixture
+def analytics(tmp_path):
+    analytics = FillAnalytics(str(tmp_path / 'engine')).load()
+    yield analytics
+    analytics.close()
+
+
+def test_duplicate_trade_ids_are_counted_once(analytics):
+    assert analytics.on_order_fill(push('1', T0, 'buy', 2, 100))
+    assert not analytics.on_order_fill(push('1', T0, 'buy', 2, 100))
+    assert analytics.stats['BTC-USDT-SWAP'].fills == 1
+
+
+def test_fills_without_trade_id_are_left_for_sync(analytics):
+    now = int(time.time() * 1000)
+    assert not analytics.on_order_fill(push('', now - 5000, 'buy', 1, 100))
+    assert not analytics.on_order_fill(push(None, now - 9000, 'buy', 1, 100))
+    assert analytics.stats == {}
+    # a later fill with a trade id must not move the sync start past the skipped ones
+    assert analytics.on_order_fill(push('8', now - 1000, 'buy', 1, 100))
+
+    calls = []
+
+    class Trade(object):
+        def get_fills(self, **params):
+            calls.append(params)
+            return {'code': '0', 'data': [
+                {'instId': 'BTC-USDT-SWAP', 'tradeId': '7', 'billId': '1', 'ts': str(now - 9000), 'side': 'buy',
+                 'posSide': 'long', 'fillPx': '100', 'fillSz': '1', 'fee': '-0.01', 'fillPnl': '0'}]}
+
+    assert analytics.sync(Trade()) == 1
+    assert int(calls[0]['begin']) <= now - 9000
+    assert analytics.resync_from is None
+    assert analytics.stats['BTC-USDT-SWAP'].fills == 2
+
+
+def test_running_stats(analytics):
+    analytics.expect('BTC-USDT-SWAP', 100.0)
+    analytics.on_order_fill(push('1', T0, 'buy', 2, 99))
+    analytics.on_order_fill(push('2', T0 + 60000, 'sell', 2, 101, pnl='4'))
+    summary = analytics.summary()['BTC-USDT-SWAP']
+    assert summary['fills'] == 2
+    assert summary['realized'] == pytest.approx(4.0)
+    assert summary['fees'] == pytest.approx(0.02)
+    assert summary['win_rate'] == 1.0
+    assert summary['avg_depth_pct'] == pytest.approx(1.0)
+    assert summary['avg_holding_s'] == pytest.approx(60.0)
+
+
+def test_restore_matches_live_stats(tmp_path):
+    live = FillAnalytics(str(tmp_path / 'engine')).load()
+    live.on_order_fill(push('1', T0, 'buy', 2, 99))
+    live.on_order_fill(push('2', T0 + 1000, 'sell', 2, 101, pnl='4'))
+    live.on_order_fill(push('3', T0 + 2000, 'buy', 3, 100))
+    live.on_order_fill(push('4', T0 + 3000, 'sell', 1, 50, pnl='-1', pos_side='short'))
+    live.close()
+    restored = FillAnalytics(str(tmp_path / 'engine')).load()
+    assert restored.summary() == live.summary()
+    assert restored.stats['BTC-USDT-SWAP'].positions['long'] == live.stats['BTC-USDT-SWAP'].positions['long']
+    assert not restored.on_order_fill(push('3', T0 + 2000, 'buy', 3, 100))
+    restored.close()
+
+
+def test_daily_report_groups_by_day_and_pair(analytics):
+    analytics.on_order_fill(push('1', T0, 'buy', 1, 100))
+    analytics.on_order_fill(push('2', T0 + 1000, 'sell', 1, 110, pnl='10'))
+    analytics.on_order_fill(push('3', T0 + 86400000, 'buy', 1, 100))
+    report = analytics.daily_report()
+    assert [(row['day'], row['fills']) for row in report] == [('2023-11-14', 2), ('2023-11-15', 1)]
+    assert report[0]['realized'] == pytest.approx(10.0)
+    assert report[0]['wins'] == 1
+    assert len(analytics.daily_report(days=1)) == 1
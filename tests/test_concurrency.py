@@ -0,0 +1,57 @@
+import time
+
+from okx.concurrency import AimdController
+
+
+class FakeLimiter(object):
+    throttled = 0
+
+
+def complete(controller, latency, started=None):
+    controller.acquire()
+    controller.release(time.monotonic() - latency if started is None else started)
+
+
+def test_increases_while_callers_queue():
+    controller = AimdController(initial=2, maximum=6, tolerance=100.0, limiter=FakeLimiter())
+    try:
+        results = controller.map(lambda i: time.sleep(0.005) or i, range(60))
+    finally:
+        controller.close()
+    assert sorted(results) == list(range(60))
+    assert controller.increases >= 1 and 2 < controller.limit <= 6
+
+
+def test_holds_when_nobody_waits():
+    controller = AimdController(initial=4, limiter=FakeLimiter())
+    for _ in range(20):
+        complete(controller, 0.01)
+    assert controller.limit == 4 and controller.increases == 0 and controller.decision == 'hold'
+
+
+def test_rate_limit_cuts_once_per_window():
+    limiter = FakeLimiter()
+    controller = AimdController(initial=8, limiter=limiter)
+    before = time.monotonic()
+    complete(controller, 0.01)
+    limiter.throttled += 1
+    complete(controller, 0.01)
+    assert controller.limit == 4 and controller.decision == 'decrease' and controller.throttled == 1
+    # a task sent before the cut that comes back throttled doesn't cut again
+    limiter.throttled += 1
+    complete(controller, 0.0, started=before)
+    assert controller.limit == 4 and controller.decreases == 1 and controller.throttled == 2
+
+
+def test_latency_above_baseline_cuts_and_respects_minimum():
+    controller = AimdController(initial=2, minimum=1, smoothing=1.0, limiter=FakeLimiter())
+    complete(controller, 0.01)
+    complete(controller, 0.01)
+    complete(controller, 0.05)
+    complete(controller, 0.05)
+    assert controller.limit == 1 and controller.decreases == 1
+    assert controller.reason.startswith('latency')
+    for _ in range(4):
+        complete(controller, 0.05)
+    assert controller.limit == 1
+    assert controller.metrics()['limit'] == 1
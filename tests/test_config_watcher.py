@@ -0,0 +1,60 @@
+import json
+import os
+
+from config_watcher import ConfigWatcher
+
+CONFIG = {
+    'okx': {'apiKey': 'k', 'secret': 's', 'password': 'p'},
+    'monitor_interval': 60,
+    'tradingPairs': {'BTC-USDT-SWAP': {'long_amount_usdt': 10}},
+}
+
+
+def write(path, text, mtime_ns):
+    with open(path, 'w') as f:
+        f.write(text)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_pair_changes_are_reported(tmp_path):
+    path = str(tmp_path / 'config.json')
+    write(path, json.dumps(CONFIG), 1_000_000_000)
+    watcher = ConfigWatcher(path, json.loads(json.dumps(CONFIG)))
+    assert watcher.poll() is None
+
+    changed = json.loads(json.dumps(CONFIG))
+    changed['tradingPairs']['ETH-USDT-SWAP'] = {'long_amount_usdt': 5}
+    del changed['tradingPairs']['BTC-USDT-SWAP']
+    changed['monitor_interval'] = 30
+    write(path, json.dumps(changed), 2_000_000_000)
+    change = watcher.poll()
+    assert list(change.added) == ['ETH-USDT-SWAP']
+    assert change.removed == ['BTC-USDT-SWAP']
+    assert change.settings == {'monitor_interval': 30}
+
+
+def test_half_written_file_is_read_again_once_complete(tmp_path):
+    path = str(tmp_path / 'config.json')
+    write(path, json.dumps(CONFIG), 1_000_000_000)
+    watcher = ConfigWatcher(path, json.loads(json.dumps(CONFIG)))
+
+    changed = json.loads(json.dumps(CONFIG))
+    changed['monitor_interval'] = 30
+    text = json.dumps(changed)
+    # the editor's second write keeps the same mtime and size, so only a re-read notices it
+    write(path, text[:-1] + ' ', 2_000_000_000)
+    assert watcher.poll() is None
+    write(path, text, 2_000_000_000)
+    change = watcher.poll()
+    assert change is not None and change.settings == {'monitor_interval': 30}
+
+
+def test_invalid_config_is_rejected(tmp_path):
+    path = str(tmp_path / 'config.json')
+    write(path, json.dumps(CONFIG), 1_000_000_000)
+    watcher = ConfigWatcher(path, json.loads(json.dumps(CONFIG)))
+    broken = json.loads(json.dumps(CONFIG))
+    broken['tradingPairs']['BTC-USDT-SWAP']['long_amount_usdt'] = -1
+    write(path, json.dumps(broken), 2_000_000_000)
+    assert watcher.poll() is None
+    assert watcher.config == CONFIG
@@ -0,0 +1,104 @@
+import pytest
+
+from oms import CANCELED, FILLED, LIVE, PARTIALLY_FILLED, PENDING_NEW, REJECTED, OrderManager
+
+INST = 'BTC-USDT-SWAP'
+
+
+@pytest.fixture
+def oms():
+    return OrderManager(prefix='zj1', session='s')
+
+
+def test_clordids_are_unique_and_owned(oms):
+    ids = {oms.next_clOrdId(INST, 'buy') for _ in range(100)}
+    assert len(ids) == 100
+    assert all(oms.owns(i) and i.isalnum() and len(i) <= 32 for i in ids)
+    assert not OrderManager(prefix='zj2').owns(next(iter(ids)))
+
+
+def test_ack_push_and_fill(oms, ack):
+    order = oms.new_order(INST, 'buy', 'long', '100', '2')
+    assert order.state == PENDING_NEW and oms.active(INST, 'buy') is order
+    oms.submit(order, lambda o: ack('9', o.clOrdId))
+    assert order.state == LIVE and oms.by_ordId('9') is order
+    oms.on_update({'clOrdId': order.clOrdId, 'ordId': '9', 'state': 'partially_filled', 'accFillSz': '1'})
+    oms.on_update({'clOrdId': order.clOrdId, 'ordId': '9', 'state': 'partially_filled', 'accFillSz': '1.5'})
+    assert order.state == PARTIALLY_FILLED and order.filled_sz == 1.5
+    oms.on_update({'clOrdId': order.clOrdId, 'ordId': '9', 'state': 'filled', 'accFillSz': '2'})
+    assert order.state == FILLED and oms.active(INST, 'buy') is None
+
+
+def test_out_of_order_and_duplicate_pushes_are_ignored(oms):
+    order = oms.new_order(INST, 'sell', 'short', '100', '1')
+    oms.on_update({'clOrdId': order.clOrdId, 'ordId': '5', 'state': 'filled', 'accFillSz': '1'})
+    assert order.state == FILLED
+    # a late live push or cancel cannot bring a finished order back
+    oms.on_update({'ordId': '5', 'state': 'live'})
+    oms.mark_canceled(ordId='5')
+    assert order.state == FILLED
+    assert oms.on_update({'clOrdId': 'other', 'state': 'live'}) is None
+
+
+def test_duplicate_clordid_ack_means_accepted(oms, ack):
+    order = oms.new_order(INST, 'buy', 'long', '100', '1')
+    oms.on_ack(order.clOrdId, ack('7', order.clOrdId, s_code='51016'))
+    assert order.state == LIVE
+
+
+def test_rejected_order_frees_the_side(oms, ack):
+    order = oms.new_order(INST, 'buy', 'long', '100', '1')
+    oms.on_ack(order.clOrdId, ack('', order.clOrdId, s_code='51008'))
+    assert order.state == REJECTED
+    assert oms.new_order(INST, 'buy', 'long', '100', '1') is not None
+
+
+def test_new_order_refused_while_side_has_active_order(oms):
+    first = oms.new_order(INST, 'buy', 'long', '100', '1')
+    assert oms.new_order(INST, 'buy', 'long', '99', '1') is None
+    assert oms.active_orders(INST) == [first]
+    assert oms.new_order(INST, 'sell', 'short', '101', '1') is not None
+    oms.mark_canceled(clOrdId=first.clOrdId)
+    assert first.state == CANCELED
+    assert oms.new_order(INST, 'buy', 'long', '99', '1') is not None
+
+
+def test_submit_sends_once_and_leaves_unknown_outcome_pending(oms):
+    order = oms.new_order(INST, 'buy', 'long', '100', '1')
+    calls = []
+
+    def send(o):
+        calls.append(o.clOrdId)
+        raise TimeoutError('no answer')
+
+    assert oms.submit(order, send) is None
+    assert calls == [order.clOrdId]
+    assert order.state == PENDING_NEW and order.attempts == 1
+
+
+def test_terminal_orders_are_forgotten_after_retention(ack):
+    oms = OrderManager(prefix='zj1', session='s', retention=2)
+    orders = []
+    for i in range(3):
+        order = oms.new_order(INST, 'buy', 'long', '100', '1')
+        oms.on_ack(order.clOrdId, ack(str(i), order.clOrdId))
+        oms.mark_canceled(ordId=str(i))
+        orders.append(order)
+    assert oms.get(orders[0].clOrdId) is None and oms.by_ordId('0') is None
+    assert oms.get(orders[2].clOrdId) is orders[2]
+
+
+def test_restore_round_trip(oms, ack):
+    live = oms.new_order(INST, 'buy', 'long', '100', '1')
+    oms.on_ack(live.clOrdId, ack('1', live.clOrdId))
+    done = oms.new_order(INST, 'sell', 'short', '101', '1')
+    oms.mark_canceled(clOrdId=done.clOrdId)
+    saved = {o.clOrdId: o.to_dict() for o in (live, done)}
+    saved['zj2other'] = dict(live.to_dict(), clOrdId='zj2other')
+
+    restored_oms = OrderManager(prefix='zj1', session='t')
+    restored = restored_oms.restore(saved)
+    assert [o.clOrdId for o in restored] == [live.clOrdId]
+    assert restored_oms.active(INST, 'buy').ordId == '1'
+    assert restored_oms.get(done.clOrdId).state == CANCELED
+    assert restored_oms.get('zj2other') is None
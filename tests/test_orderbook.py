@@ -0,0 +1,86 @@
+import zlib
+
+from orderbook import BookFeed, OrderBook
+
+
+def signed_crc(text):
+    crc = zlib.crc32(text.encode())
+    return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+
+SNAPSHOT = {
+    'bids': [['100.1', '2', '0', '1'], ['100.0', '3', '0', '1']],
+    'asks': [['100.2', '1', '0', '1'], ['100.3', '4', '0', '1'], ['100.4', '5', '0', '1']],
+    'seqId': 10, 'prevSeqId': -1, 'ts': '1',
+}
+
+
+def snapshot():
+    data = dict(SNAPSHOT)
+    data['checksum'] = signed_crc('100.1:2:100.2:1:100.0:3:100.3:4:100.4:5')
+    return data
+
+
+def test_checksum_interleaves_sides_and_keeps_strings():
+    book = OrderBook('BTC-USDT')
+    assert book.apply(snapshot(), 'snapshot')
+    assert book.best_bid() == 100.1 and book.best_ask() == 100.2
+    assert book.queue_ahead('buy', 100.0) == 2.0
+    assert book.queue_ahead('sell', 100.4) == 5.0
+
+
+def test_update_applies_deletes_and_validates():
+    book = OrderBook('BTC-USDT')
+    book.apply(snapshot(), 'snapshot')
+    update = {'bids': [['100.1', '0', '0', '0'], ['99.9', '7', '0', '1']], 'asks': [['100.2', '1.5', '0', '1']],
+              'seqId': 11, 'prevSeqId': 10, 'ts': '2'}
+    update['checksum'] = signed_crc('100.0:3:100.2:1.5:99.9:7:100.3:4:100.4:5')
+    assert book.apply(update, 'update')
+    assert book.best_bid() == 100.0 and book.seq_id == 11
+
+
+def test_bad_checksum_or_sequence_gap_invalidates():
+    book = OrderBook('BTC-USDT')
+    book.apply(snapshot(), 'snapshot')
+    assert not book.apply({'asks': [['100.2', '2', '0', '1']], 'seqId': 11, 'prevSeqId': 10, 'checksum': 1},
+                          'update')
+    assert not book.valid
+
+    book.apply(snapshot(), 'snapshot')
+    assert not book.apply({'asks': [], 'seqId': 13, 'prevSeqId': 12}, 'update')
+    # once invalid, updates are refused until the next snapshot
+    assert not book.apply({'asks': [], 'seqId': 14, 'prevSeqId': 13}, 'update')
+    assert book.apply(snapshot(), 'snapshot')
+
+
+class FakeWs(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def subscribe(self, args):
+        pass
+
+    def send(self, payload):
+        self.sent.append(payload)
+
+
+def test_feed_resubscribes_and_waits_for_snapshot():
+    feed = BookFeed()
+    feed.ws = FakeWs()
+    feed.subscribe(['BTC-USDT'])
+    arg = {'channel': 'books', 'instId': 'BTC-USDT'}
+
+    feed._on_message({'arg': arg, 'action': 'snapshot', 'data': [snapshot()]})
+    assert feed.get('BTC-USDT') is not None
+
+    feed._on_message({'arg': arg, 'action': 'update',
+                      'data': [{'asks': [], 'seqId': 20, 'prevSeqId': 19}]})
+    assert feed.get('BTC-USDT') is None
+    assert [m['op'] for m in feed.ws.sent] == ['unsubscribe', 'subscribe']
+
+    # updates still in flight from the old subscription are dropped until the snapshot arrives
+    feed._on_message({'arg': arg, 'action': 'update', 'data': [{'asks': [], 'seqId': 21, 'prevSeqId': 20}]})
+    assert feed.get('BTC-USDT') is None and len(feed.ws.sent) == 2
+    feed._on_message({'arg': arg, 'action': 'snapshot', 'data': [snapshot()]})
+    assert feed.get('BTC-USDT') is not None
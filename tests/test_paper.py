@@ -0,0 +1,81 @@
+import pytest
+
+from orderbook import OrderBook
+from paper import DUPLICATE_CLORDID, PaperExchange
+
+INST = 'BTC-USDT-SWAP'
+
+
+def make_exchange(bids=(), asks=()):
+    book = OrderBook(INST)
+    book.apply({'bids': [[px, sz, '0', '1'] for px, sz in bids],
+                'asks': [[px, sz, '0', '1'] for px, sz in asks]}, 'snapshot')
+    exchange = PaperExchange(book=lambda instId: book, maker_fee=0.0)
+    account = exchange.account('a')
+    pushes, fills = [], []
+    account.on_order = pushes.append
+    account.on_fill = fills.append
+    return exchange, account, pushes, fills
+
+
+def place(account, side, px, sz, clOrdId, posSide='long'):
+    return account.place_order(INST, 'cross', side, 'limit', sz, px=px, posSide=posSide, clOrdId=clOrdId)
+
+
+def test_trades_at_price_consume_the_queue_ahead_first():
+    exchange, account, _, fills = make_exchange(bids=[('100', '3')])
+    place(account, 'buy', '100', '2', 'b1')
+    order = account.by_clOrdId['b1']
+    assert order.queue == 3.0
+
+    exchange.on_trade(INST, 100.0, 2.0, 'sell')
+    assert order.queue == 1.0 and fills == []
+    exchange.on_trade(INST, 100.0, 2.0, 'sell')  # 1 clears the queue, 1 fills
+    assert order.state == 'partially_filled' and order.filled_sz == 1.0
+    assert fills[-1]['fillSz'] == '1' and fills[-1]['tradeId']
+    exchange.on_trade(INST, 100.0, 5.0, 'sell')
+    assert order.state == 'filled' and order.filled_sz == 2.0
+    assert len({f['tradeId'] for f in fills}) == 2
+
+
+def test_trade_through_fills_everything_and_aggressor_side_matters():
+    exchange, account, _, fills = make_exchange(asks=[('101', '10')])
+    place(account, 'sell', '101', '1', 's1', posSide='short')
+    exchange.on_trade(INST, 102.0, 0.001, 'sell')  # a sell aggressor never fills a resting sell
+    assert fills == []
+    exchange.on_trade(INST, 101.5, 0.001, 'buy')  # traded through: filled regardless of queue and size
+    assert account.by_clOrdId['s1'].state == 'filled'
+
+
+def test_on_price_only_fills_strictly_crossed_orders():
+    exchange, account, _, fills = make_exchange()
+    place(account, 'buy', '100', '1', 'b1')
+    place(account, 'buy', '99', '1', 'b2')
+    exchange.on_price(INST, 100.0)
+    assert fills == []
+    exchange.on_price(INST, 99.5)
+    assert [f['clOrdId'] for f in fills] == ['b1']
+
+
+def test_amend_requeues_and_positions_track_pnl():
+    exchange, account, _, _ = make_exchange(bids=[('100', '3'), ('99', '4')])
+    place(account, 'buy', '100', '1', 'b1')
+    account.amend_order(INST, clOrdId='b1', newPx='99')
+    order = account.by_clOrdId['b1']
+    assert order.px == 99.0 and order.queue == 4.0
+    exchange.on_trade(INST, 98.0, 1.0, 'sell')
+    place(account, 'sell', '105', '1', 's1')
+    exchange.on_trade(INST, 106.0, 1.0, 'buy')
+    summary = account.summary()
+    assert summary['realized'] == pytest.approx(6.0) and summary['positions'] == 0
+
+
+def test_duplicate_clordid_and_cancel():
+    exchange, account, pushes, _ = make_exchange()
+    assert place(account, 'buy', '100', '1', 'b1')['code'] == '0'
+    assert place(account, 'buy', '100', '1', 'b1')['data'][0]['sCode'] == DUPLICATE_CLORDID
+    assert account.cancel_order(INST, clOrdId='b1')['code'] == '0'
+    assert pushes[-1]['state'] == 'canceled'
+    assert account.cancel_order(INST, clOrdId='b1')['code'] == '1'
+    exchange.on_trade(INST, 50.0, 1.0, 'sell')
+    assert account.get_order_list()['data'] == []
@@ -0,0 +1,66 @@
+from private_stream import PrivateStream
+
+INST = 'BTC-USDT-SWAP'
+
+
+def order(ordId, state='live', uTime='1', instId=INST):
+    return {'ordId': ordId, 'clOrdId': '', 'instId': instId, 'state': state, 'uTime': uTime, 'fillSz': '0'}
+
+
+class FakeApi(object):
+
+    def __init__(self):
+        self.orders = []
+        self.positions = []
+
+    def get_order_list(self, **params):
+        after = params.get('after')
+        rows = [o for o in self.orders if not after or int(o['ordId']) < int(after)]
+        return {'code': '0', 'msg': '', 'data': rows[:int(params.get('limit') or 100)]}
+
+    def get_positions(self, instType=''):
+        return {'code': '0', 'msg': '', 'data': self.positions}
+
+
+def make_stream(api):
+    return PrivateStream('key', 'secret', 'pass', trade_api=api, account_api=api)
+
+
+def test_reconnect_drops_orders_and_positions_that_ended_during_the_outage():
+    api = FakeApi()
+    api.orders = [order('2'), order('1', instId='ETH-USDT-SWAP')]
+    api.positions = [{'instId': INST, 'posSide': 'long', 'pos': '3'}, {'instId': INST, 'posSide': 'short', 'pos': '0'}]
+    stream = make_stream(api)
+    stream._on_connect()
+    assert stream.ready
+    assert {i: [o['ordId'] for o in orders] for i, orders in stream.all_live_orders().items()} == \
+        {INST: ['2'], 'ETH-USDT-SWAP': ['1']}
+    assert stream.position(INST, 'long') is not None and stream.position(INST, 'short') is None
+
+    stream._on_disconnect()
+    assert not stream.ready and stream.positions() == {}
+    # while disconnected order 1 filled, order 2 was canceled and the long was closed
+    api.orders = [order('3', uTime='5')]
+    api.positions = []
+    stream._on_connect()
+    assert stream.all_live_orders() == {INST: [api.orders[0]]}
+    assert stream.position(INST, 'long') is None
+
+
+def test_snapshot_older_than_a_push_keeps_the_push():
+    api = FakeApi()
+    stream = make_stream(api)
+    stream._on_connect()
+    stream._on_message({'arg': {'channel': 'orders'}, 'data': [order('7', state='canceled', uTime='9')]})
+    api.orders = [order('7', uTime='4')]
+    stream._on_disconnect()
+    stream._on_connect()
+    assert stream.live_orders(INST) == []
+
+
+def test_failed_position_snapshot_leaves_the_stream_not_ready():
+    api = FakeApi()
+    api.get_positions = lambda instType='': {'code': '50001', 'msg': 'busy', 'data': []}
+    stream = make_stream(api)
+    stream._on_connect()
+    assert not stream.ready
@@ -0,0 +1,55 @@
+import random
+from decimal import ROUND_CEILING, ROUND_FLOOR, Decimal
+
+import pytest
+
+from quantizer import ROUND_DOWN, ROUND_NEAREST, ROUND_UP, InstrumentQuantizer, Quantizer
+
+
+@pytest.mark.parametrize('price', [2834.7477, 84743.374, 99999.9999, 1.0001, 0.0001])
+def test_on_tick_prices_are_unchanged_on_both_sides(price):
+    quantizer = InstrumentQuantizer('X', '0.0001')
+    expect = '%.4f' % price
+    assert quantizer.price_for_side(price, 'buy') == expect
+    assert quantizer.price_for_side(price, 'sell') == expect
+
+
+@pytest.mark.parametrize('tick, price, buy, sell', [
+    ('0.0001', 84743.37745, '84743.3774', '84743.3775'),
+    ('0.0001', 2834.74765, '2834.7476', '2834.7477'),
+    ('0.00000001', 61234.567891235, '61234.56789123', '61234.56789124'),
+    ('0.25', 70001.125, '70001.00', '70001.25'),
+    ('5', 98762.5, '98760', '98765'),
+])
+def test_half_tick_prices_round_away_from_the_market(tick, price, buy, sell):
+    quantizer = InstrumentQuantizer('X', tick)
+    assert quantizer.price_for_side(price, 'buy') == buy
+    assert quantizer.price_for_side(price, 'sell') == sell
+
+
+@pytest.mark.parametrize('tick', ['0.0001', '0.001', '0.1', '0.25', '5'])
+def test_random_prices_match_decimal(tick):
+    rnd = random.Random(tick)
+    quantizer = InstrumentQuantizer('X', tick)
+    step = Decimal(tick)
+    for _ in range(5000):
+        price = rnd.uniform(1, 100000)
+        exact = Decimal(repr(price)) / step
+        on_tick = exact.to_integral_value(ROUND_FLOOR) * step
+        assert Decimal(quantizer.price_for_side(price, 'buy')) == on_tick
+        assert Decimal(quantizer.price_for_side(price, 'sell')) == exact.to_integral_value(ROUND_CEILING) * step
+        assert Decimal(quantizer.price_for_side(float(on_tick), 'sell')) == on_tick
+
+
+def test_arithmetic_noise_snaps_to_the_tick():
+    quantizer = Quantizer('0.0001')
+    noisy = 84743.374 * 1.1 / 1.1
+    assert quantizer.round(noisy, ROUND_DOWN) == quantizer.round(noisy, ROUND_UP) == '84743.3740'
+    assert quantizer.to_steps(noisy, ROUND_NEAREST) == 847433740
+
+
+def test_sizes_floor_to_lot_and_respect_min_size():
+    quantizer = InstrumentQuantizer('X', '0.1', lot_size='0.001', min_size='0.01')
+    assert quantizer.round_size('12345.678') == '12345.678'
+    assert quantizer.round_size(0.0299) == '0.029'
+    assert quantizer.round_size(0.0099) is None
@@ -0,0 +1,87 @@
+import threading
+import time
+
+from reactive import RepositionTrigger
+
+
+def test_fires_once_past_threshold():
+    calls = []
+    trigger = RepositionTrigger(lambda *args: calls.append(args), fraction=0.5, min_interval=0.0)
+    trigger.arm('BTC-USDT-SWAP', 100.0, 1.0, long_factor=0.99)
+    trigger.on_tick('BTC-USDT-SWAP', 100.4)
+    trigger.on_tick('BTC-USDT-SWAP', 100.6)
+    trigger.on_tick('BTC-USDT-SWAP', 100.8)
+    trigger.shutdown()
+    assert calls == [('BTC-USDT-SWAP', 100.6, 0.99, None, 1.0)]
+    assert trigger.fired == 1
+
+
+def test_shutdown_waits_for_running_and_drops_queued():
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def on_trigger(instId, *args):
+        calls.append(instId)
+        started.set()
+        release.wait(5)
+
+    trigger = RepositionTrigger(on_trigger, fraction=0.5, min_interval=0.0, max_workers=1)
+    trigger.arm('A', 100.0, 1.0, long_factor=0.99)
+    trigger.arm('B', 100.0, 1.0, long_factor=0.99)
+    trigger.on_tick('A', 101.0)
+    assert started.wait(5)
+    trigger.on_tick('B', 101.0)  # queued behind A on the single worker
+
+    done = threading.Event()
+    threading.Thread(target=lambda: (trigger.shutdown(), done.set())).start()
+    assert not done.wait(0.2)  # still waiting for A
+    release.set()
+    assert done.wait(5)
+    assert calls == ['A']
+
+
+def test_ticks_after_shutdown_are_ignored():
+    calls = []
+    trigger = RepositionTrigger(lambda *args: calls.append(args), fraction=0.5, min_interval=0.0)
+    trigger.shutdown()
+    trigger.arm('A', 100.0, 1.0, long_factor=0.99)
+    trigger.on_tick('A', 105.0)
+    assert calls == [] and trigger.fired == 0
+
+
+def test_rearms_at_the_trigger_price_when_orders_remain():
+    calls = []
+    trigger = RepositionTrigger(lambda *args: calls.append(args) or True, fraction=0.5, min_interval=0.0)
+    trigger.arm('A', 100.0, 1.0, long_factor=0.99)
+    trigger.on_tick('A', 101.0)
+    trigger._executor.shutdown(wait=True)
+    anchor, threshold, long_factor, _, _ = trigger._arms['A']
+    assert anchor == 101.0 and threshold == 101.0 * 1.0 / 100 * 0.5 and long_factor == 0.99
+
+
+def test_rearm_during_reposition_is_not_overwritten():
+    started, release = threading.Event(), threading.Event()
+
+    def on_trigger(*args):
+        started.set()
+        release.wait(5)
+        return True
+
+    trigger = RepositionTrigger(on_trigger, fraction=0.5, min_interval=0.0)
+    trigger.arm('A', 100.0, 1.0, long_factor=0.99)
+    trigger.on_tick('A', 101.0)
+    assert started.wait(5)
+    # a new cycle places orders with fresh factors while the amend is still running
+    trigger.arm('A', 102.0, 2.0, long_factor=0.98)
+    release.set()
+    trigger._executor.shutdown(wait=True)
+    assert trigger._arms['A'] == (102.0, 102.0 * 2.0 / 100 * 0.5, 0.98, None, 2.0)
+
+    # likewise a cycle that ends with no orders leaves it disarmed
+    trigger = RepositionTrigger(lambda *args: True, fraction=0.5, min_interval=0.0, max_workers=1)
+    trigger.arm('A', 100.0, 1.0, long_factor=0.99)
+    trigger._executor.submit(time.sleep, 0.1)
+    trigger.on_tick('A', 101.0)
+    trigger.disarm('A')
+    trigger._executor.shutdown(wait=True)
+    assert 'A' not in trigger._arms
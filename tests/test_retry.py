@@ -0,0 +1,99 @@
+import pytest
+import requests
+
+from okx import consts as c
+from okx.client import Client
+from okx.exceptions import OkxAPIException, OkxRequestException
+from okx.ratelimit import RateLimiter
+from okx.retry import CircuitBreaker, RequestPolicy
+from okx.tape import TapeResponse
+
+
+class FakeTransport(object):
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.sent = 0
+
+    def send(self, method, url, body, header, timeout):
+        self.sent += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return TapeResponse(outcome, '{"code":"0","msg":"","data":[]}')
+
+
+def make_client(transport, monkeypatch, **policy):
+    policy.setdefault('backoff_base', 0.0)
+    client = Client('key', 'secret', 'pass', policy=RequestPolicy(**policy), limiter=RateLimiter(limits={}))
+    monkeypatch.setattr(Client, 'transport', transport)
+    return client
+
+
+def open_breaker(client, monkeypatch):
+    breaker = client.policy.breaker(c.SERVER_TIMESTAMP_URL)
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    monkeypatch.setattr(breaker, 'opened_at', breaker.opened_at - breaker.reset_timeout)
+    return breaker
+
+
+def test_breaker_transitions(monkeypatch):
+    breaker = CircuitBreaker('/x', failure_threshold=2, reset_timeout=30.0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(OkxRequestException):
+        breaker.before_request()
+    breaker.opened_at -= 30.0
+    breaker.before_request()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    # only the trial goes through while half open
+    with pytest.raises(OkxRequestException):
+        breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    breaker.opened_at -= 30.0
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_request()
+
+
+@pytest.mark.parametrize('outcome, state', [
+    (400, CircuitBreaker.CLOSED),
+    (404, CircuitBreaker.CLOSED),
+    (requests.exceptions.InvalidURL('bad'), CircuitBreaker.OPEN),
+    (ValueError('transport bug'), CircuitBreaker.OPEN),
+])
+def test_half_open_trial_always_reports(monkeypatch, outcome, state):
+    client = make_client(FakeTransport(outcome), monkeypatch, max_attempts=1)
+    breaker = open_breaker(client, monkeypatch)
+    with pytest.raises(Exception):
+        client._request(c.GET, c.SERVER_TIMESTAMP_URL, {})
+    assert breaker.state == state
+
+
+def test_retries_idempotent_get_until_success(monkeypatch):
+    transport = FakeTransport(requests.exceptions.ConnectionError(), 503, 200)
+    client = make_client(transport, monkeypatch)
+    assert client._request(c.GET, c.SERVER_TIMESTAMP_URL, {})['code'] == '0'
+    assert transport.sent == 3
+    assert client.policy.breaker(c.SERVER_TIMESTAMP_URL).state == CircuitBreaker.CLOSED
+
+
+def test_post_without_clordid_is_not_retried(monkeypatch):
+    transport = FakeTransport(503, 200)
+    client = make_client(transport, monkeypatch)
+    with pytest.raises(OkxAPIException):
+        client._request(c.POST, c.PLACR_ORDER, {'instId': 'BTC-USDT-SWAP'})
+    assert transport.sent == 1
+
+
+def test_429_penalizes_rate_limiter(monkeypatch):
+    client = make_client(FakeTransport(429), monkeypatch, max_attempts=1)
+    with pytest.raises(OkxAPIException):
+        client._request(c.GET, c.SERVER_TIMESTAMP_URL, {})
+    assert client.limiter.throttled == 1
@@ -0,0 +1,153 @@
+import gzip
+import json
+import threading
+import time
+
+from okx import consts as c
+from okx import tape as tape_module
+from okx.client import Client
+from okx.ratelimit import RateLimiter
+from okx.retry import RequestPolicy
+from okx.tape import TapeRecorder, TapeReplay, TapeResponse
+
+ORDERS_ARG = {'channel': 'orders', 'instType': 'SWAP'}
+
+
+def write_tape(path, records):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def rest(t, url, content):
+    return {'t': t, 'k': 'rest', 'm': c.GET, 'u': c.API_URL + url, 'b': '', 's': 200, 'c': content}
+
+
+def push(t, data):
+    return {'t': t, 'k': 'ws', 'u': 'wss://private', 'c': json.dumps({'arg': ORDERS_ARG, 'data': data})}
+
+
+class FakeWs(object):
+
+    def __init__(self):
+        self.url = 'wss://private'
+        self._subscriptions = [ORDERS_ARG]
+        self._stop = threading.Event()
+        self.on_connect = None
+        self.ready = False
+        self.messages = []
+
+    def _on_raw_message(self, ws, message):
+        self.messages.append(json.loads(message)['data'])
+
+
+def client_for(tape, monkeypatch):
+    monkeypatch.setattr(Client, 'transport', tape)
+    return Client('key', 'secret', 'pass', policy=RequestPolicy(max_attempts=1), limiter=RateLimiter(limits={}))
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_round_trip(tmp_path, monkeypatch):
+    path = str(tmp_path / 't.tape.gz')
+    recorder = TapeRecorder(path, flush_every=1)
+    answers = iter(['{"code":"0","data":["a"]}', '{"code":"0","data":["b"]}'])
+    monkeypatch.setattr(tape_module.requests, 'get', lambda url, headers, timeout: TapeResponse(200, next(answers)))
+    client = client_for(recorder, monkeypatch)
+    live = [client._request(c.GET, c.SERVER_TIMESTAMP_URL, {'n': str(i)}) for i in range(2)]
+    recorder.record_ws('wss://private', '{"arg":{},"data":[]}')
+    recorder.close()
+
+    replay = TapeReplay(path)
+    client = client_for(replay, monkeypatch)
+    assert [client._request(c.GET, c.SERVER_TIMESTAMP_URL, {'n': str(i)}) for i in range(2)] == live
+    assert replay.served == 2
+
+
+def test_truncated_tape_is_read_up_to_the_damage(tmp_path):
+    path = str(tmp_path / 't.tape.gz')
+    write_tape(path, [rest(1.0, '/a', '{}'), rest(2.0, '/b', '{}')])
+    with open(path, 'rb') as f:
+        data = f.read()
+    with open(path, 'wb') as f:
+        f.write(data[:-8])
+    assert len(list(tape_module.read_tape(path))) <= 2
+
+
+def test_push_waits_for_earlier_rest_responses(tmp_path, monkeypatch):
+    path = str(tmp_path / 't.tape.gz')
+    write_tape(path, [rest(1.0, '/a', '{"code":"0","data":[]}'), push(1.1, [1]),
+                      rest(1.2, '/b', '{"code":"0","data":[]}'), push(1.3, [2])])
+    replay = TapeReplay(path, stall_timeout=30.0)
+    client = client_for(replay, monkeypatch)
+    ws = FakeWs()
+    replay.play_ws(ws)
+    try:
+        time.sleep(0.1)
+        assert ws.messages == []
+        client._request(c.GET, '/a', {})
+        assert wait_for(lambda: ws.messages == [[1]])
+        time.sleep(0.1)
+        assert ws.messages == [[1]]
+        client._request(c.GET, '/b', {})
+        assert wait_for(lambda: ws.messages == [[1], [2]])
+    finally:
+        ws._stop.set()
+
+
+def test_push_does_not_read_past_unserved_rest(tmp_path):
+    path = str(tmp_path / 't.tape.gz')
+    write_tape(path, [rest(1.0, '/a', '{}')] + [push(2.0 + i, [i]) for i in range(50)])
+    replay = TapeReplay(path, stall_timeout=30.0)
+    ws = FakeWs()
+    replay.play_ws(ws)
+    try:
+        time.sleep(0.1)
+        assert replay._read == 1
+    finally:
+        ws._stop.set()
+
+
+def test_unrequested_rest_record_is_skipped_after_stall(tmp_path):
+    path = str(tmp_path / 't.tape.gz')
+    write_tape(path, [rest(1.0, '/never', '{}'), push(1.1, [1])])
+    replay = TapeReplay(path, stall_timeout=0.05)
+    ws = FakeWs()
+    replay.play_ws(ws)
+    try:
+        assert wait_for(lambda: ws.messages == [[1]])
+    finally:
+        ws._stop.set()
+
+
+def test_concurrent_orders_get_their_own_instrument_ack(tmp_path, monkeypatch, ack):
+    path = str(tmp_path / 't.tape.gz')
+    insts = ['INST%d-USDT-SWAP' % i for i in range(8)]
+    records = []
+    for i, instId in enumerate(insts):
+        body = json.dumps({'instId': instId, 'side': 'buy', 'ordType': 'limit', 'clOrdId': 'run1x%d' % i})
+        records.append({'t': i, 'k': 'rest', 'm': c.POST, 'u': c.API_URL + c.PLACR_ORDER, 'b': body, 's': 200,
+                        'c': json.dumps(ack(instId, 'run1x%d' % i))})
+    write_tape(path, records)
+
+    client = client_for(TapeReplay(path), monkeypatch)
+    acks = {}
+    start = threading.Barrier(len(insts))
+
+    def place(i, instId):
+        start.wait()
+        # a later run generates different clOrdIds, so only the fallback match can answer
+        params = {'instId': instId, 'side': 'buy', 'ordType': 'limit', 'clOrdId': 'run2x%d' % i}
+        acks[instId] = client._request(c.POST, c.PLACR_ORDER, params)['data'][0]['ordId']
+
+    threads = [threading.Thread(target=place, args=(i, instId)) for i, instId in reversed(list(enumerate(insts)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert acks == {instId: instId for instId in insts}
@@ -0,0 +1,60 @@
+import json
+import threading
+
+import pytest
+
+from okx.ws_client import NotSentError, WsClient
+
+
+class FakeSocket(object):
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def client():
+    client = WsClient('wss://test')
+    client._ws = FakeSocket()
+    client.ready = True
+    return client
+
+
+def test_response_resolves_request(client):
+    future = client.request('order', [{'instId': 'BTC-USDT-SWAP'}])
+    req_id = client._ws.sent[0]['id']
+    client._on_raw_message(None, json.dumps({'id': req_id, 'op': 'order', 'code': '0', 'data': []}))
+    assert future.result(timeout=1)['code'] == '0'
+
+
+def test_close_fails_requests_in_flight(client):
+    future = client.request('order', [])
+    client._on_close(None)
+    with pytest.raises(ConnectionError):
+        future.result(timeout=1)
+    with pytest.raises(NotSentError):
+        client.request('order', []).result(timeout=1)
+
+
+def test_no_request_is_lost_when_closing_concurrently(client):
+    futures = []
+    start = threading.Barrier(2)
+
+    def send_many():
+        start.wait()
+        for _ in range(2000):
+            futures.append(client.request('order', []))
+
+    thread = threading.Thread(target=send_many)
+    thread.start()
+    start.wait()
+    client._on_close(None)
+    thread.join()
+    # every future is either still pending on a live connection or already failed; none hangs after close
+    assert all(f.done() for f in futures)